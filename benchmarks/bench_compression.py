@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+请求体压缩基准测试
+
+模拟慢速链路，对比不同时长的会议转写在 identity/gzip/zstd 编码下的
+传输字节数、客户端压缩耗时、服务端解压解析耗时和端到端上传时间。
+
+用法:
+    python benchmarks/bench_compression.py [--bandwidth-mbps 2] [--rtt-ms 80]
+"""
+
+import os
+import sys
+import io
+import json
+import time
+import zlib
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import make_srt
+from src.compression import load_json_body, supported_encodings
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == 'gzip':
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        return compressor.compress(data) + compressor.flush()
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    return data
+
+
+def run(bandwidth_mbps: float, rtt_ms: float, durations: list) -> None:
+    encodings = ['identity'] + list(reversed(supported_encodings()))
+    print(f"模拟链路: {bandwidth_mbps} Mbit/s, RTT {rtt_ms} ms")
+    print(f"{'时长':>6} {'编码':>8} {'字节数':>12} {'压缩比':>7} {'压缩ms':>8} {'解压解析ms':>10} {'上传总耗时ms':>12}")
+    for minutes in durations:
+        body = json.dumps({
+            "log_id": "bench",
+            "srt_text": make_srt(minutes, 'zh'),
+            "meeting_id": "bench",
+            "stream": False
+        }, ensure_ascii=False).encode('utf-8')
+        for encoding in encodings:
+            start = time.perf_counter()
+            payload = compress(body, encoding)
+            compress_ms = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            load_json_body(io.BytesIO(payload), encoding, len(body) + 1)
+            decode_ms = (time.perf_counter() - start) * 1000
+
+            transfer_ms = len(payload) * 8 / (bandwidth_mbps * 1000) + rtt_ms
+            total_ms = compress_ms + transfer_ms + decode_ms
+            print(f"{minutes:>5}m {encoding:>8} {len(payload):>12,} {len(body) / len(payload):>7.1f} "
+                  f"{compress_ms:>8.1f} {decode_ms:>10.1f} {total_ms:>12.0f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='请求体压缩基准测试')
+    parser.add_argument('--bandwidth-mbps', type=float, default=2.0, help='模拟上行带宽（Mbit/s）')
+    parser.add_argument('--rtt-ms', type=float, default=80.0, help='模拟往返时延（毫秒）')
+    parser.add_argument('--durations', type=int, nargs='+', default=[30, 180, 480], help='会议时长（分钟）')
+    args = parser.parse_args()
+    run(args.bandwidth_mbps, args.rtt_ms, args.durations)
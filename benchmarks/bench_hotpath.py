@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+本地热路径微基准测试
+
+在10分钟到8小时的中文/英文合成转写上，分别测量各个本地处理阶段的耗时和峰值内存：
+SRT解析、字幕条目解析、纪要/问答提示词构造、流式帧编码、转写存储和问答缓存读取。
+结果与保存的基线比较，任一阶段超过容差时以非零状态退出，可直接用于CI。不调用LLM，完全离线运行。
+
+每个阶段紧接着测量一个固定的参照负载，比较耗时时使用与参照负载的比值，
+以抵消CPU频率、共享主机负载等造成的整体快慢。基线仍与解释器版本相关，更换运行环境后需先重新生成（多轮运行，每项取最大值）：
+    python benchmarks/bench_hotpath.py --update-baseline
+
+用法:
+    python benchmarks/bench_hotpath.py [--durations 10 60 240 480] [--langs zh en]
+                                       [--time-tolerance 0.3] [--memory-tolerance 0.2]
+"""
+
+import os
+import sys
+import json
+import gc
+import time
+import argparse
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 离线运行：不持久化，不连接真实提供商
+os.environ.setdefault('LLM_PROVIDER', 'deepseek')
+os.environ.setdefault('DEEPSEEK_API_KEY', 'bench')
+os.environ['MEETING_STORE_PATH'] = ''
+os.environ['TOKEN_USAGE_PATH'] = ''
+# 不建立检索索引，避免后台索引线程与计时争用CPU
+os.environ['SEARCH_INDEX_DIR'] = ''
+
+from benchmarks.synthetic import make_srt
+from src import run_server
+from src.answer_cache import AnswerCache
+from src.subtitles import parse_srt_cues
+from src.transcript_store import TranscriptStore
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines', 'hotpath.json')
+
+# 低于该值的耗时差异视为计时噪声，不判为回归（以参照负载耗时的倍数计）
+MIN_RELATIVE_DELTA = 0.2
+MIN_MEMORY_DELTA_KB = 64
+
+CHAT_TURNS = 10
+ANSWER = '会议决定下个月十五号发布新版本，由张三负责测试环境，李四跟进数据迁移的风险评估。' * 20
+
+
+def make_stages(srt_text: str, meeting_id: str) -> Dict[str, Callable[[], object]]:
+    """
+    构造各阶段的测量函数，输入数据预先准备好，只测量阶段本身
+
+    Args:
+        srt_text: SRT文本
+        meeting_id: 会议ID，转写会先保存到该会议下（纪要提示词需要发言统计）
+
+    Returns:
+        阶段名 -> 无参函数
+    """
+    run_server.ingest_transcript(meeting_id, srt_text)
+    text_content = run_server.parse_srt_text(srt_text)
+    text_hash = run_server.content_hash(text_content)
+    summary = ANSWER[:400]
+    history = []
+    for i in range(CHAT_TURNS):
+        history.append({"role": "user", "content": f"第{i + 1}个问题：这个事项由谁负责？"})
+        history.append({"role": "assistant", "content": ANSWER[:200]})
+    history.append({"role": "user", "content": "还有哪些待办事项？"})
+    # 模拟LLM逐段返回的回答，每段几个字符
+    answer_parts = [ANSWER[i:i + 4] for i in range(0, len(ANSWER), 4)]
+
+    store = TranscriptStore(level=run_server.TRANSCRIPT_COMPRESSION_LEVEL, cache_size=0)
+    store_key = store.put(text_content)
+    cache = AnswerCache(max_entries=1024, ttl=0)
+    questions = [f"问题{i}：发布时间是什么时候？" for i in range(200)]
+    for question in questions:
+        cache.put(text_hash, question, ANSWER)
+
+    def frames():
+        for part in answer_parts:
+            run_server.format_stream_chunk(part, 0)
+        run_server.format_stream_chunk('', 1, model='bench')
+
+    def answer_cache_lookup():
+        for question in questions:
+            cache.get(text_hash, question)
+
+    return {
+        'parse_srt_text': lambda: run_server.parse_srt_text(srt_text),
+        'parse_srt_cues': lambda: parse_srt_cues(srt_text),
+        'content_hash': lambda: run_server.content_hash(text_content),
+        'summary_prompt': lambda: run_server.build_summary_prompt(text_content, meeting_id),
+        'chat_messages': lambda: run_server.build_chat_messages(summary, text_content, history),
+        'stream_frames': frames,
+        'transcript_decompress': lambda: store.get(store_key),
+        'answer_cache': answer_cache_lookup,
+    }
+
+
+def reference_workload() -> None:
+    # 固定的纯Python负载（字符串处理和字典操作），耗时约1毫秒
+    counts: Dict[str, int] = {}
+    for i in range(2000):
+        word = f"word{i % 97}".upper()
+        counts[word] = counts.get(word, 0) + len(word)
+    '\n'.join(sorted(counts))
+
+
+def best_time(fn: Callable[[], object], repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def measure(fn: Callable[[], object], repeat: int) -> Tuple[float, float, float]:
+    """
+    测量一个阶段
+
+    Args:
+        fn: 阶段函数
+        repeat: 计时重复次数，取最小值以减少调度噪声
+
+    Returns:
+        (耗时毫秒, 参照负载耗时毫秒, 峰值内存KB)，峰值内存为单次执行期间新分配的最大值
+    """
+    fn()
+    # 与 timeit 一样在计时期间关闭垃圾回收，避免回收停顿落在个别阶段上
+    gc.collect()
+    gc.disable()
+    try:
+        # 阶段与参照负载交替计时，使两者受到相同的整体负载影响
+        ms = ref_ms = float('inf')
+        for _ in range(repeat):
+            ms = min(ms, best_time(fn, 1))
+            ref_ms = min(ref_ms, best_time(reference_workload, 1))
+    finally:
+        gc.enable()
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return ms, ref_ms, peak / 1024
+
+
+def run_config(lang: str, minutes: int, repeat: int, only: Optional[Set[str]] = None) -> Dict[str, Dict[str, float]]:
+    """
+    在一种语言和时长的转写上运行各阶段
+
+    Args:
+        lang: 转写语言
+        minutes: 会议时长（分钟）
+        repeat: 每个阶段的计时次数
+        only: 只运行这些阶段，为空时运行全部
+
+    Returns:
+        "阶段/语言/时长m" -> {"ms": 耗时, "relative": 与参照负载的耗时比, "peak_kb": 峰值内存}
+    """
+    results = {}
+    stages = make_stages(make_srt(minutes, lang), f"bench-{lang}-{minutes}")
+    for stage, fn in stages.items():
+        if only is not None and stage not in only:
+            continue
+        ms, ref_ms, peak_kb = measure(fn, repeat)
+        results[f"{stage}/{lang}/{minutes}m"] = {
+            "ms": round(ms, 3),
+            "relative": round(ms / ref_ms, 3),
+            "peak_kb": round(peak_kb, 1),
+        }
+        print(f"{stage:<22} {lang:>4} {minutes:>5}m {ms:>10.3f} {ms / ref_ms:>10.3f} {peak_kb:>10.1f}")
+    return results
+
+
+def run(durations: List[int], langs: List[str], repeat: int) -> Dict[str, Dict[str, float]]:
+    """运行所有语言、时长和阶段"""
+    results = {}
+    print(f"{'阶段':<22} {'语言':>4} {'时长':>6} {'耗时ms':>10} {'相对耗时':>10} {'峰值KB':>10}")
+    for lang in langs:
+        for minutes in durations:
+            results.update(run_config(lang, minutes, repeat))
+    return results
+
+
+def rerun(results: Dict[str, Dict[str, float]], names: List[str], repeat: int) -> None:
+    """
+    重新测量指定阶段，每项保留两次测量中较好的结果（用于排除偶发的计时噪声）
+
+    Args:
+        results: 测量结果，原地更新
+        names: "阶段/语言/时长m" 列表
+        repeat: 每个阶段的计时次数
+    """
+    configs: Dict[Tuple[str, int], Set[str]] = {}
+    for name in names:
+        stage, lang, minutes = name.split('/')
+        configs.setdefault((lang, int(minutes[:-1])), set()).add(stage)
+    for (lang, minutes), stages in configs.items():
+        for name, result in run_config(lang, minutes, repeat, stages).items():
+            results[name] = {field: min(value, results[name][field]) for field, value in result.items()}
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            time_tolerance: float, memory_tolerance: float) -> Dict[str, str]:
+    """
+    与基线比较
+
+    Args:
+        results: 本次结果
+        baseline: 基线结果
+        time_tolerance: 允许的相对耗时增长比例
+        memory_tolerance: 允许的峰值内存增长比例
+
+    Returns:
+        "阶段/语言/时长m" -> 回归描述，为空表示没有回归
+    """
+    regressions = {}
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        problems = []
+        limit = max(base['relative'] * (1 + time_tolerance), base['relative'] + MIN_RELATIVE_DELTA)
+        if current['relative'] > limit:
+            problems.append(f"relative time {current['relative']:.3f} > {base['relative']:.3f} "
+                            f"(+{time_tolerance:.0%}, {current['ms']:.3f}ms)")
+        kb_limit = max(base['peak_kb'] * (1 + memory_tolerance), base['peak_kb'] + MIN_MEMORY_DELTA_KB)
+        if current['peak_kb'] > kb_limit:
+            problems.append(f"{current['peak_kb']:.1f}KB > {base['peak_kb']:.1f}KB (+{memory_tolerance:.0%})")
+        if problems:
+            regressions[name] = '; '.join(problems)
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='本地热路径微基准测试')
+    parser.add_argument('--durations', type=int, nargs='+', default=[10, 60, 240, 480], help='会议时长（分钟）')
+    parser.add_argument('--langs', nargs='+', default=['zh', 'en'], choices=['zh', 'en'], help='转写语言')
+    parser.add_argument('--repeat', type=int, default=15, help='每个阶段的计时次数')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='基线文件路径')
+    parser.add_argument('--update-baseline', action='store_true', help='用本次结果覆盖基线')
+    parser.add_argument('--baseline-rounds', type=int, default=3,
+                        help='生成基线时的运行轮数，每项取各轮中的最大值，避免基线偏快导致误报')
+    parser.add_argument('--confirm-rounds', type=int, default=2,
+                        help='超出容差的阶段重新测量的最多次数，仍超出时才判为回归')
+    parser.add_argument('--time-tolerance', type=float, default=0.3, help='允许的相对耗时增长比例')
+    parser.add_argument('--memory-tolerance', type=float, default=0.2, help='允许的峰值内存增长比例')
+    args = parser.parse_args()
+
+    results = run(args.durations, args.langs, args.repeat)
+
+    if args.update_baseline:
+        for _ in range(args.baseline_rounds - 1):
+            print()
+            for name, result in run(args.durations, args.langs, args.repeat).items():
+                results[name] = {field: max(value, results[name][field]) for field, value in result.items()}
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(dict(sorted(baseline.items())), f, indent=2, ensure_ascii=False)
+            f.write('\n')
+        print(f"\n基线已更新: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\n基线文件不存在: {args.baseline}，请先使用 --update-baseline 生成")
+        return 2
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    missing = [name for name in results if name not in baseline]
+    if missing:
+        print(f"\n{len(missing)} 项没有基线，未参与比较")
+    regressions = compare(results, baseline, args.time_tolerance, args.memory_tolerance)
+    for _ in range(args.confirm_rounds):
+        if not regressions:
+            break
+        print(f"\n{len(regressions)} 项超出容差，重新测量确认:")
+        rerun(results, list(regressions), args.repeat)
+        regressions = compare(results, baseline, args.time_tolerance, args.memory_tolerance)
+    if regressions:
+        print(f"\n发现 {len(regressions)} 项性能回归:")
+        for name, regression in regressions.items():
+            print(f"  {name}: {regression}")
+        return 1
+    print("\n未发现性能回归")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
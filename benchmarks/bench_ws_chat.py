@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+WebSocket多轮问答基准测试
+
+使用立即返回的本地提供商（不调用真实LLM），对比多轮问答中每轮的服务端耗时：
+POST /chat 每轮都要上传并解析完整转写和不断增长的对话历史，
+WebSocket会话只在建立连接时加载一次会议文本，之后每轮只发送问题。
+
+用法:
+    python benchmarks/bench_ws_chat.py [--turns 10] [--durations 30 180 480]
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import argparse
+import tempfile
+import threading
+from statistics import median
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 离线运行：不持久化，不连接真实提供商
+os.environ.setdefault('LLM_PROVIDER', 'deepseek')
+os.environ.setdefault('DEEPSEEK_API_KEY', 'bench')
+os.environ['MEETING_STORE_PATH'] = ''
+os.environ['TOKEN_USAGE_PATH'] = ''
+os.environ['SEARCH_INDEX_DIR'] = tempfile.mkdtemp()
+
+from benchmarks.synthetic import make_srt
+from src import run_server
+from src.llm_providers import LLMProvider
+
+
+class EchoProvider(LLMProvider):
+    """立即返回固定回答的提供商，使测得的耗时只包含服务端开销"""
+
+    name = 'bench'
+    ANSWER = ['这是', '一个', '固定的', '回答']
+
+    def _report_usage(self, usage) -> None:
+        # 与真实提供商一样返回用量，避免服务端回退到按字符估算
+        if usage is not None:
+            usage.update(prompt_tokens=1, completion_tokens=len(self.ANSWER))
+
+    def stream(self, messages, model=None, usage=None):
+        self._report_usage(usage)
+        yield from self.ANSWER
+
+    def complete(self, messages, model=None, usage=None):
+        self._report_usage(usage)
+        return ''.join(self.ANSWER)
+
+
+class QueueSocket:
+    """内存中的WebSocket连接，提供 run_chat_session 使用的 send / receive / connected"""
+
+    def __init__(self):
+        self.inbox: "queue.Queue" = queue.Queue()
+        self.outbox: "queue.Queue" = queue.Queue()
+        self.connected = True
+
+    def send(self, data: str) -> None:
+        self.outbox.put(json.loads(data))
+
+    def receive(self):
+        return self.inbox.get()
+
+    def read_turn(self) -> None:
+        while True:
+            frame = self.outbox.get()
+            if frame['data']['is_end'] == 1:
+                return
+
+
+def bench_http(client, srt_text: str, meeting_id: str, questions: list) -> list:
+    history = []
+    timings = []
+    for i, question in enumerate(questions):
+        history.append({"role": "user", "content": question})
+        start = time.perf_counter()
+        resp = client.post('/chat', json={
+            "log_id": f"bench-http-{meeting_id}-{i}",
+            "srt_text": srt_text,
+            "meeting_id": meeting_id,
+            "messages": history,
+            "stream": True
+        })
+        answer = ''.join(json.loads(line)['data']['answer']
+                         for line in resp.get_data(as_text=True).splitlines() if line.strip())
+        timings.append((time.perf_counter() - start) * 1000)
+        history.append({"role": "assistant", "content": answer})
+    return timings
+
+
+def bench_ws(srt_text: str, meeting_id: str, questions: list) -> list:
+    run_server.app.test_client().put(f'/meetings/{meeting_id}/transcript', json={"srt_text": srt_text})
+    ws = QueueSocket()
+    session = threading.Thread(target=run_server.run_chat_session, args=(ws, meeting_id, f"bench-ws-{meeting_id}"))
+    session.start()
+    ws.read_turn()
+    timings = []
+    for question in questions:
+        start = time.perf_counter()
+        ws.inbox.put(json.dumps({"question": question}, ensure_ascii=False))
+        ws.read_turn()
+        timings.append((time.perf_counter() - start) * 1000)
+    ws.inbox.put(None)
+    session.join()
+    return timings
+
+
+def run(turns: int, durations: list) -> None:
+    run_server.provider_registry.register('bench', lambda: EchoProvider('bench'))
+    run_server.ACTIVE_PROVIDER = 'bench'
+    client = run_server.app.test_client()
+    questions = [f"第{i + 1}个问题：这个事项由谁负责？" for i in range(turns)]
+
+    print(f"每种方式 {turns} 轮问答，耗时为每轮服务端处理时间（毫秒）")
+    print(f"{'时长':>6} {'请求体KB':>9} {'POST中位':>9} {'POST末轮':>9} {'WS中位':>8} {'WS末轮':>8} {'每轮节省':>9}")
+    for minutes in durations:
+        srt_text = make_srt(minutes, 'zh')
+        http = bench_http(client, srt_text, f"bench-http-{minutes}", questions)
+        ws = bench_ws(srt_text, f"bench-ws-{minutes}", questions)
+        body_kb = len(json.dumps({"srt_text": srt_text}, ensure_ascii=False).encode('utf-8')) / 1024
+        saved = median(http) - median(ws)
+        print(f"{minutes:>5}m {body_kb:>9.0f} {median(http):>9.1f} {http[-1]:>9.1f} "
+              f"{median(ws):>8.1f} {ws[-1]:>8.1f} {saved:>9.1f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='WebSocket多轮问答基准测试')
+    parser.add_argument('--turns', type=int, default=10, help='每个会议的问答轮数')
+    parser.add_argument('--durations', type=int, nargs='+', default=[30, 180, 480], help='会议时长（分钟）')
+    args = parser.parse_args()
+    run(args.turns, args.durations)
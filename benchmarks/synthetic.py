@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+合成会议转写数据
+
+生成指定时长的中文/英文SRT文本，供基准测试离线使用。
+"""
+
+import random
+from typing import List
+
+ZH_SPEAKERS = ['张三', '李四', '王五', '赵六']
+EN_SPEAKERS = ['Alice', 'Bob', 'Carol', 'Dave']
+
+ZH_PHRASES = [
+    '我们先回顾一下上周的进展', '这个需求需要和产品再确认一下', '预算方面第三季度还有缺口',
+    '测试环境下周一之前准备好', '用户反馈导出功能不稳定', '这个问题由我来跟进',
+    '接口的响应时间还需要优化', '发布时间暂定在下个月十五号', '大家对这个方案有没有意见',
+    '数据迁移的风险需要评估', '市场部希望提前拿到演示版本', '我们需要补充一些监控指标',
+]
+EN_PHRASES = [
+    "let's review last week's progress first", 'we need to confirm this requirement with product',
+    'the Q3 budget still has a gap', 'the staging environment should be ready by Monday',
+    'users report that export is unstable', "I'll follow up on this issue",
+    'API latency still needs optimization', 'the release is tentatively set for the fifteenth',
+    'does anyone have concerns about this plan', 'we need to assess the data migration risk',
+    'marketing wants an early demo build', 'we should add more monitoring metrics',
+]
+
+
+def _format_time(ms: int) -> str:
+    hours, rest = divmod(ms, 3600 * 1000)
+    minutes, rest = divmod(rest, 60 * 1000)
+    seconds, millis = divmod(rest, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{millis:03d}"
+
+
+def make_srt(minutes: float, lang: str = 'zh', seed: int = 42, speakers: bool = True) -> str:
+    """
+    生成合成SRT文本
+
+    Args:
+        minutes: 会议时长（分钟）
+        lang: 语言，zh 或 en
+        seed: 随机种子，保证多次生成结果一致
+        speakers: 是否在字幕前添加说话人前缀
+
+    Returns:
+        SRT格式文本
+    """
+    rng = random.Random(seed)
+    phrases = ZH_PHRASES if lang == 'zh' else EN_PHRASES
+    names = ZH_SPEAKERS if lang == 'zh' else EN_SPEAKERS
+    separator = '，' if lang == 'zh' else ', '
+    colon = '：' if lang == 'zh' else ': '
+
+    blocks: List[str] = []
+    total_ms = int(minutes * 60 * 1000)
+    now = 0
+    index = 1
+    speaker = rng.choice(names)
+    while now < total_ms:
+        duration = rng.randint(2000, 6000)
+        if rng.random() < 0.3:
+            speaker = rng.choice(names)
+        text = separator.join(rng.sample(phrases, rng.randint(1, 3)))
+        if speakers:
+            text = f"{speaker}{colon}{text}"
+        blocks.append(f"{index}\n{_format_time(now)} --> {_format_time(now + duration)}\n{text}\n")
+        now += duration + rng.randint(100, 800)
+        index += 1
+    return '\n'.join(blocks)
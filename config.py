@@ -33,3 +33,105 @@ DEFAULT_MODEL = os.getenv('DEFAULT_MODEL', 'ERNIE-4.0-8K')
 # 日志配置
 LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
 
+
+# 问答缓存配置
+ANSWER_CACHE_ENABLED = os.getenv('ANSWER_CACHE_ENABLED', 'true').lower() == 'true'
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv('ANSWER_CACHE_MAX_ENTRIES', 1024))
+ANSWER_CACHE_TTL = int(os.getenv('ANSWER_CACHE_TTL', 3600))
+
+# 会议数据持久化配置（为空时不持久化）
+MEETING_STORE_PATH = os.getenv('MEETING_STORE_PATH', 'data/meetings.db')
+MEETING_STORE_WARM_LIMIT = int(os.getenv('MEETING_STORE_WARM_LIMIT', 200))
+
+# 请求/响应压缩配置
+MAX_REQUEST_BODY_BYTES = int(os.getenv('MAX_REQUEST_BODY_BYTES', 64 * 1024 * 1024))
+# multipart上传时，转写文件以外的单个表单字段（如 messages）的最大字节数
+MAX_FORM_FIELD_BYTES = int(os.getenv('MAX_FORM_FIELD_BYTES', 4 * 1024 * 1024))
+RESPONSE_COMPRESSION_ENABLED = os.getenv('RESPONSE_COMPRESSION_ENABLED', 'true').lower() == 'true'
+RESPONSE_COMPRESSION_MIN_BYTES = int(os.getenv('RESPONSE_COMPRESSION_MIN_BYTES', 1024))
+STREAM_COMPRESSION_ENABLED = os.getenv('STREAM_COMPRESSION_ENABLED', 'false').lower() == 'true'
+
+# 问答时无缓存纪要的处理方式：background 先基于原文回答并在后台生成纪要，blocking 先生成纪要再回答
+CHAT_SUMMARY_MODE = os.getenv('CHAT_SUMMARY_MODE', 'background')
+BACKGROUND_SUMMARY_WORKERS = int(os.getenv('BACKGROUND_SUMMARY_WORKERS', 2))
+
+# 纪要生成后在空闲时预先回答常见问题
+PRECOMPUTE_ENABLED = os.getenv('PRECOMPUTE_ENABLED', 'false').lower() == 'true'
+# 预先回答的问题列表，以 | 分隔
+PRECOMPUTE_QUESTIONS = os.getenv(
+    'PRECOMPUTE_QUESTIONS',
+    '本次会议有哪些行动项？|各项任务的负责人是谁？|会议做出了哪些决策？|还有哪些待解决的问题？'
+)
+# 进行中的纪要/问答请求数超过该值时暂停预计算
+PRECOMPUTE_MAX_LIVE_REQUESTS = int(os.getenv('PRECOMPUTE_MAX_LIVE_REQUESTS', 0))
+
+# 客户端断开检测间隔（秒，0表示仅在写入失败时发现断开）
+CANCEL_CHECK_INTERVAL = float(os.getenv('CANCEL_CHECK_INTERVAL', 0.5))
+# 流式纪要生成被取消时已生成部分的处理方式：drop 丢弃，cache 作为部分纪要缓存
+PARTIAL_OUTPUT_POLICY = os.getenv('PARTIAL_OUTPUT_POLICY', 'drop')
+
+# 分段总结树叶子片段时长（秒）
+SEGMENT_LEAF_SECONDS = int(os.getenv('SEGMENT_LEAF_SECONDS', 300))
+
+# 分块纪要（默认关闭）：转写超过该字数时按块分别总结再合并，块总结随会议缓存保存，
+# 修正后重新提交转写时只重新总结有改动的块；0表示始终整体生成
+SUMMARY_CHUNK_CHARS = int(os.getenv('SUMMARY_CHUNK_CHARS', 0))
+
+# 话题切分配置
+TOPIC_BLOCK_CUES = int(os.getenv('TOPIC_BLOCK_CUES', 8))
+TOPIC_MIN_SECONDS = int(os.getenv('TOPIC_MIN_SECONDS', 120))
+
+# 抽取式摘要的关键句数量
+EXTRACTIVE_MAX_SENTENCES = int(os.getenv('EXTRACTIVE_MAX_SENTENCES', 15))
+# LLM失败或超过截止时间时，纪要接口返回抽取式摘要
+SUMMARY_FALLBACK_ENABLED = os.getenv('SUMMARY_FALLBACK_ENABLED', 'true').lower() == 'true'
+# 纪要LLM调用截止时间（秒，流式为首个片段的等待时间，0表示不限制）
+SUMMARY_LLM_DEADLINE = float(os.getenv('SUMMARY_LLM_DEADLINE', 60))
+
+# 模型分级路由规则（JSON数组），按顺序匹配，为空时所有请求使用默认模型
+MODEL_ROUTING_RULES = os.getenv('MODEL_ROUTING_RULES', '')
+
+# 准入控制：每个进程同时处理的纪要/问答请求上限，问答优先于纪要
+ADMISSION_CONTROL_ENABLED = os.getenv('ADMISSION_CONTROL_ENABLED', 'true').lower() == 'true'
+ADMISSION_MAX_CONCURRENT = int(os.getenv('ADMISSION_MAX_CONCURRENT', 8))
+# 纪要请求最多占用的处理名额，其余名额留给问答
+ADMISSION_SUMMARY_MAX_CONCURRENT = int(os.getenv('ADMISSION_SUMMARY_MAX_CONCURRENT', 6))
+# 各类请求的排队上限和最长排队时间（秒），超出时返回503和 Retry-After
+ADMISSION_CHAT_QUEUE = int(os.getenv('ADMISSION_CHAT_QUEUE', 16))
+ADMISSION_SUMMARY_QUEUE = int(os.getenv('ADMISSION_SUMMARY_QUEUE', 8))
+ADMISSION_CHAT_MAX_WAIT = float(os.getenv('ADMISSION_CHAT_MAX_WAIT', 10))
+ADMISSION_SUMMARY_MAX_WAIT = float(os.getenv('ADMISSION_SUMMARY_MAX_WAIT', 5))
+# 每个进程同时保持的WebSocket问答会话上限：每个会话占用一个worker线程，超出时拒绝新会话，0表示不限制
+WS_MAX_SESSIONS = int(os.getenv('WS_MAX_SESSIONS', 16))
+
+# 会议转写在内存中压缩保存：zlib压缩级别、保留的已解压转写数量
+TRANSCRIPT_COMPRESSION_LEVEL = int(os.getenv('TRANSCRIPT_COMPRESSION_LEVEL', 6))
+TRANSCRIPT_CACHE_SIZE = int(os.getenv('TRANSCRIPT_CACHE_SIZE', 4))
+
+# 相同 log_id 的纪要/问答请求在该时间（秒）内复用已完成或进行中的生成，0表示不启用
+IDEMPOTENCY_WINDOW = float(os.getenv('IDEMPOTENCY_WINDOW', 300))
+# 携带幂等键请求头的流式请求，客户端全部断开后等待重试接入的时间（秒），超时后取消生成；
+# 未携带该请求头的请求断开后立即取消
+IDEMPOTENCY_KEY_HEADER = os.getenv('IDEMPOTENCY_KEY_HEADER', 'Idempotency-Key')
+GENERATION_ORPHAN_GRACE = float(os.getenv('GENERATION_ORPHAN_GRACE', 10))
+
+# 租户token用量与配额：租户请求头、未携带请求头时的租户
+TENANT_HEADER = os.getenv('TENANT_HEADER', 'X-Tenant-ID')
+DEFAULT_TENANT = os.getenv('DEFAULT_TENANT', 'default')
+# 租户配额（JSON对象，租户 -> 每个窗口的token上限，"*" 为其他租户的默认上限，为空不限制）
+TENANT_QUOTAS = os.getenv('TENANT_QUOTAS', '')
+# 配额窗口长度（秒）
+TENANT_QUOTA_WINDOW = int(os.getenv('TENANT_QUOTA_WINDOW', 86400))
+# token用量数据库路径（为空则只在进程内统计）
+TOKEN_USAGE_PATH = os.getenv('TOKEN_USAGE_PATH', 'data/usage.db')
+# 配额检查重新汇总数据库用量的间隔（秒），期间使用进程内的累计值，其他worker的用量最多延迟这么久计入
+TOKEN_USAGE_SYNC_INTERVAL = float(os.getenv('TOKEN_USAGE_SYNC_INTERVAL', 1.0))
+# 可以通过 /usage?tenant= 查询其他租户用量的管理租户（逗号分隔），其他租户只能查询自己的用量
+USAGE_ADMIN_TENANTS = os.getenv('USAGE_ADMIN_TENANTS', '')
+
+# 跨会议检索索引目录（为空则禁用检索）
+SEARCH_INDEX_DIR = os.getenv('SEARCH_INDEX_DIR', 'data/search_index')
+# 内存中累积该数量的会议后写为新的磁盘段
+SEARCH_INDEX_FLUSH_MEETINGS = int(os.getenv('SEARCH_INDEX_FLUSH_MEETINGS', 20))
+# 磁盘段数量超过该值时合并
+SEARCH_INDEX_MAX_SEGMENTS = int(os.getenv('SEARCH_INDEX_MAX_SEGMENTS', 8))
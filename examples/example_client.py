@@ -4,140 +4,17 @@
 """
 会议助手服务客户端示例
 
-展示如何在Python项目中调用会议助手API
+展示如何在Python项目中使用 meeting_assistant_client 调用会议助手API
 """
 
-import requests
-import json
-from typing import Generator, Dict, Any
+import os
+import sys
 
+import httpx
 
-class MeetingAssistantClient:
-    """会议助手客户端"""
-    
-    def __init__(self, base_url: str = "http://localhost:8000"):
-        """
-        初始化客户端
-        
-        Args:
-            base_url: 服务地址
-        """
-        self.base_url = base_url
-        self.session = requests.Session()
-        self.session.headers.update({'Content-Type': 'application/json'})
-    
-    def generate_summary(
-        self,
-        srt_text: str,
-        meeting_id: str,
-        log_id: str = None,
-        stream: bool = False
-    ) -> Dict[str, Any] | Generator[Dict[str, Any], None, None]:
-        """
-        生成会议纪要
-        
-        Args:
-            srt_text: SRT格式的会议转写文本
-            meeting_id: 会议ID
-            log_id: 日志ID（可选）
-            stream: 是否流式返回
-            
-        Returns:
-            如果stream=False，返回完整结果字典
-            如果stream=True，返回生成器
-        """
-        if log_id is None:
-            log_id = f"summary_{meeting_id}"
-        
-        data = {
-            "log_id": log_id,
-            "srt_text": srt_text,
-            "meeting_id": meeting_id,
-            "stream": stream
-        }
-        
-        response = self.session.post(
-            f"{self.base_url}/summary",
-            json=data,
-            stream=stream
-        )
-        
-        if stream:
-            return self._stream_response(response)
-        else:
-            return response.json()
-    
-    def chat(
-        self,
-        srt_text: str,
-        meeting_id: str,
-        messages: list,
-        log_id: str = None,
-        stream: bool = False
-    ) -> Dict[str, Any] | Generator[Dict[str, Any], None, None]:
-        """
-        会议问答
-        
-        Args:
-            srt_text: SRT格式的会议转写文本
-            meeting_id: 会议ID
-            messages: 对话历史
-            log_id: 日志ID（可选）
-            stream: 是否流式返回
-            
-        Returns:
-            如果stream=False，返回完整结果字典
-            如果stream=True，返回生成器
-        """
-        if log_id is None:
-            log_id = f"chat_{meeting_id}"
-        
-        data = {
-            "log_id": log_id,
-            "srt_text": srt_text,
-            "meeting_id": meeting_id,
-            "messages": messages,
-            "stream": stream
-        }
-        
-        response = self.session.post(
-            f"{self.base_url}/chat",
-            json=data,
-            stream=stream
-        )
-        
-        if stream:
-            return self._stream_response(response)
-        else:
-            return response.json()
-    
-    def health_check(self) -> Dict[str, Any]:
-        """
-        健康检查
-        
-        Returns:
-            服务状态信息
-        """
-        response = self.session.get(f"{self.base_url}/health")
-        return response.json()
-    
-    def _stream_response(self, response) -> Generator[Dict[str, Any], None, None]:
-        """
-        处理流式响应
-        
-        Args:
-            response: requests响应对象
-            
-        Yields:
-            每行的JSON数据
-        """
-        for line in response.iter_lines():
-            if line:
-                try:
-                    yield json.loads(line.decode('utf-8'))
-                except json.JSONDecodeError as e:
-                    print(f"JSON解析错误: {e}")
-                    continue
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from meeting_assistant_client import MeetingAssistantClient
 
 
 # ===== 使用示例 =====
@@ -151,7 +28,7 @@ def example_non_stream():
     client = MeetingAssistantClient()
     
     # 检查服务状态
-    health = client.health_check()
+    health = client.health()
     print(f"服务状态: {health}\n")
     
     # 会议文本
@@ -177,7 +54,7 @@ def example_non_stream():
 """
     
     # 生成会议纪要
-    result = client.generate_summary(
+    result = client.summarize(
         srt_text=srt_text,
         meeting_id="meeting_001",
         stream=False
@@ -207,7 +84,7 @@ def example_stream():
     # 流式生成会议纪要
     print("会议纪要: ", end='', flush=True)
     
-    for chunk in client.generate_summary(
+    for chunk in client.summarize(
         srt_text=srt_text,
         meeting_id="meeting_002",
         stream=True
@@ -255,7 +132,7 @@ def example_chat():
     
     # 先生成会议纪要（非流式）
     print("正在生成会议纪要...")
-    client.generate_summary(
+    client.summarize(
         srt_text=srt_text,
         meeting_id="meeting_003",
         stream=False
@@ -309,7 +186,7 @@ def example_multi_turn_chat():
     
     # 先生成会议纪要
     print("正在生成会议纪要...")
-    client.generate_summary(
+    client.summarize(
         srt_text=srt_text,
         meeting_id="meeting_004",
         stream=False
@@ -353,6 +230,34 @@ def example_multi_turn_chat():
     print(f"助手: {answer2}\n")
 
 
+def example_batch_summarize():
+    """示例5: 批量生成会议纪要"""
+    print("=" * 60)
+    print("示例5: 批量生成会议纪要")
+    print("=" * 60)
+    
+    srt_text = """1
+00:00:01,000 --> 00:00:03,000
+大家好，欢迎参加今天的产品讨论会。
+
+2
+00:00:04,500 --> 00:00:08,000
+今天我们主要讨论新版本的功能规划。
+"""
+    meetings = [(f"batch_{i:03d}", srt_text.replace("产品讨论会", f"第{i}次产品讨论会")) for i in range(10)]
+    
+    # 所有请求共用连接池，最多同时进行4个请求；服务端繁忙（503）时按 Retry-After 自动重试
+    with MeetingAssistantClient(max_connections=4) as client:
+        items = client.batch_summarize(meetings, concurrency=4)
+    
+    for item in items:
+        if item.error:
+            print(f"{item.meeting_id}: 失败 - {item.error}")
+        else:
+            print(f"{item.meeting_id}: {item.result['data']['answer'][:30]}...")
+    print()
+
+
 if __name__ == "__main__":
     try:
         # 运行各个示例
@@ -360,12 +265,13 @@ if __name__ == "__main__":
         example_stream()
         example_chat()
         example_multi_turn_chat()
+        example_batch_summarize()
         
         print("=" * 60)
         print("所有示例运行完成！")
         print("=" * 60)
         
-    except requests.exceptions.ConnectionError:
+    except httpx.ConnectError:
         print("❌ 错误: 无法连接到服务器")
         print("请确保服务已启动: python src/run_server.py")
     except Exception as e:
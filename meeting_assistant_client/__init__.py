@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+会议助手服务Python客户端
+
+提供同步（MeetingAssistantClient）和异步（AsyncMeetingAssistantClient）两种客户端，依赖 httpx：
+- 所有请求共用连接池，批量任务不会为每个请求新建连接
+- 流式响应按网络分块增量解析NDJSON
+- 失败的请求以相同的 log_id 重试，服务端复用已有的生成，不会重复调用LLM；
+  503/429 按 Retry-After 等待，流式响应中断后从已收到的帧之后续传
+- batch_summarize 按指定并发数批量生成纪要
+"""
+
+from meeting_assistant_client._base import (
+    BatchItem,
+    MeetingAssistantError,
+    NDJSONDecoder,
+    RetryPolicy,
+    StreamInterrupted,
+)
+from meeting_assistant_client.client import MeetingAssistantClient
+from meeting_assistant_client.async_client import AsyncMeetingAssistantClient
+
+__all__ = [
+    'AsyncMeetingAssistantClient',
+    'BatchItem',
+    'MeetingAssistantClient',
+    'MeetingAssistantError',
+    'NDJSONDecoder',
+    'RetryPolicy',
+    'StreamInterrupted',
+]
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+同步和异步客户端共用的部分：错误类型、重试策略、NDJSON增量解码和流式续传状态
+"""
+
+import gzip
+import json
+import uuid
+import random
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+# 幂等键请求头：流式请求携带后，连接断开时服务端保留生成等待续传，否则立即取消
+IDEMPOTENCY_KEY_HEADER = 'Idempotency-Key'
+
+# 可以用相同 log_id 安全重试的HTTP状态码（服务端按 log_id 复用生成，不会重复调用LLM）
+RETRY_STATUSES = (429, 502, 503, 504)
+
+
+class MeetingAssistantError(Exception):
+    """服务端返回错误，或重试次数用完"""
+
+    def __init__(self, status: int, message: str, retry_after: Optional[float] = None):
+        """
+        Args:
+            status: HTTP状态码，连接失败等没有响应时为0
+            message: 错误信息
+            retry_after: 服务端建议的重试等待秒数
+        """
+        super().__init__(f"[{status}] {message}")
+        self.status = status
+        self.message = message
+        self.retry_after = retry_after
+
+
+class StreamInterrupted(MeetingAssistantError):
+    """流式响应中断且无法续传（如续传窗口已过期，或服务端未启用幂等）"""
+
+    def __init__(self, message: str, received: int):
+        super().__init__(0, message)
+        self.received = received
+
+
+class RetryPolicy(NamedTuple):
+    """重试策略"""
+    # 每个请求最多尝试的次数（含首次）；流式请求每收到新的帧后重新计数
+    max_attempts: int = 4
+    # 指数退避的初始等待时间（秒）
+    backoff: float = 0.5
+    # 单次等待的上限（秒）
+    max_backoff: float = 10.0
+    # 服务端要求的等待时间超过该值时不再重试（如租户配额要到下个窗口才恢复）
+    max_retry_after: float = 60.0
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        计算第 attempt 次失败后的等待时间
+
+        Args:
+            attempt: 已失败的次数（从1开始）
+            retry_after: 服务端 Retry-After 给出的秒数
+
+        Returns:
+            等待秒数，优先遵循 Retry-After，否则为带随机抖动的指数退避
+        """
+        if retry_after is not None:
+            return retry_after
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** (attempt - 1))))
+
+    def should_retry(self, error: Exception, attempt: int) -> bool:
+        """
+        判断失败后是否重试
+
+        Args:
+            error: 本次失败的异常（传输层异常或 MeetingAssistantError）
+            attempt: 已失败的次数
+
+        Returns:
+            是否重试
+        """
+        if attempt >= self.max_attempts or isinstance(error, StreamInterrupted):
+            return False
+        if isinstance(error, MeetingAssistantError):
+            if error.status not in RETRY_STATUSES:
+                return False
+            return error.retry_after is None or error.retry_after <= self.max_retry_after
+        return True
+
+
+class BatchItem(NamedTuple):
+    """批量纪要中一个会议的结果"""
+    meeting_id: str
+    # 成功时为响应数据
+    result: Optional[Dict[str, Any]]
+    # 失败时为异常
+    error: Optional[Exception]
+
+
+class NDJSONDecoder:
+    """
+    增量解析NDJSON：按网络分块喂入字节，返回其中已完整的行
+
+    只在找到换行符时切分，不按行逐次解码；UTF-8多字节字符被分块截断时留在缓冲区中等待后续数据。
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def feed(self, chunk: bytes) -> List[Dict[str, Any]]:
+        """
+        喂入一块数据
+
+        Args:
+            chunk: 网络读取到的字节
+
+        Returns:
+            本块数据补全的帧
+        """
+        self._buffer += chunk
+        end = self._buffer.rfind(b'\n')
+        if end < 0:
+            return []
+        complete = bytes(self._buffer[:end])
+        del self._buffer[:end + 1]
+        return [json.loads(line) for line in complete.split(b'\n') if line.strip()]
+
+    def close(self) -> List[Dict[str, Any]]:
+        """
+        结束解析，返回最后一行没有换行符结尾的帧
+
+        Returns:
+            剩余的帧
+        """
+        rest = bytes(self._buffer).strip()
+        self._buffer.clear()
+        return [json.loads(rest)] if rest else []
+
+
+class StreamCursor:
+    """流式响应的接收进度，用于断线后从已收到的帧之后续传"""
+
+    def __init__(self, path: str, body: bytes, headers: Dict[str, str], log_id: str):
+        """
+        Args:
+            path: 请求路径
+            body: 请求体
+            headers: 请求头
+            log_id: 日志ID，同时作为幂等键请求头，使服务端在断线后保留生成等待续传
+        """
+        self.path = path
+        self.body = body
+        self.headers = dict(headers, **{IDEMPOTENCY_KEY_HEADER: log_id})
+        self.stream_id: Optional[str] = None
+        self.received = 0
+        self.finished = False
+
+    def next_request(self) -> Tuple[str, str, Optional[bytes], Dict[str, str]]:
+        """
+        下一次尝试的请求：尚未收到帧时（重新）提交原请求，否则按流ID续传
+
+        Returns:
+            (方法, 路径, 请求体, 请求头)
+
+        Raises:
+            StreamInterrupted: 已收到部分帧但没有流ID，无法续传
+        """
+        if self.received == 0:
+            return 'POST', self.path, self.body, self.headers
+        if self.stream_id is None:
+            raise StreamInterrupted("服务端未返回stream_id，无法续传", self.received)
+        return 'GET', f"/streams/{self.stream_id}?offset={self.received}", None, {}
+
+    def observe(self, frame: Dict[str, Any]) -> None:
+        """记录收到的一帧"""
+        data = frame.get('data') or {}
+        if self.received == 0 and data.get('stream_id'):
+            self.stream_id = data['stream_id']
+        self.received += 1
+        self.finished = data.get('is_end') == 1
+
+    def interrupted(self) -> MeetingAssistantError:
+        """响应在结束帧之前关闭时的错误（可重试）"""
+        return MeetingAssistantError(503, f"流式响应在第 {self.received} 帧后中断")
+
+    def resume_failed(self, error: MeetingAssistantError) -> MeetingAssistantError:
+        """续传请求失败时的错误：流已过期或被取消时无法再续传"""
+        if error.status == 404:
+            return StreamInterrupted(error.message, self.received)
+        return error
+
+
+def new_log_id(kind: str) -> str:
+    """
+    生成日志ID，同一次调用的所有重试使用同一个ID，服务端据此复用生成
+
+    Args:
+        kind: 请求类型，作为前缀
+
+    Returns:
+        日志ID
+    """
+    return f"{kind}-{uuid.uuid4().hex}"
+
+
+def encode_json(payload: Dict[str, Any], compress_min_bytes: int) -> Tuple[bytes, Dict[str, str]]:
+    """
+    编码JSON请求体，超过阈值时gzip压缩（服务端支持 Content-Encoding: gzip）
+
+    Args:
+        payload: 请求参数
+        compress_min_bytes: 压缩阈值，<=0 表示不压缩
+
+    Returns:
+        (请求体, 请求头)
+    """
+    body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    headers = {'Content-Type': 'application/json'}
+    if 0 < compress_min_bytes <= len(body):
+        body = gzip.compress(body, compresslevel=6)
+        headers['Content-Encoding'] = 'gzip'
+    return body, headers
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析 Retry-After 响应头（秒数）"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+def error_from_response(status: int, content: bytes, headers: Any) -> MeetingAssistantError:
+    """
+    根据错误响应构造异常
+
+    Args:
+        status: HTTP状态码
+        content: 响应体
+        headers: 响应头
+
+    Returns:
+        异常
+    """
+    try:
+        message = json.loads(content)['data']['answer']
+    except (ValueError, KeyError, TypeError):
+        message = content.decode('utf-8', errors='replace')[:200] or f"HTTP {status}"
+    return MeetingAssistantError(status, message, parse_retry_after(headers.get('Retry-After')))
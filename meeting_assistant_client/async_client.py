@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+会议助手异步客户端（asyncio）
+"""
+
+import asyncio
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union
+
+import httpx
+
+from meeting_assistant_client._base import (
+    BatchItem, MeetingAssistantError, NDJSONDecoder, RetryPolicy, StreamCursor,
+    encode_json, error_from_response, new_log_id,
+)
+
+
+class AsyncMeetingAssistantClient:
+    """
+    会议助手异步客户端，接口与 MeetingAssistantClient 相同，方法均为协程
+
+    流式接口返回异步迭代器：
+        async for frame in await client.summarize(srt_text, meeting_id, stream=True): ...
+    """
+
+    def __init__(self, base_url: str = "http://localhost:8000", tenant: Optional[str] = None,
+                 timeout: float = 300.0, max_connections: int = 32, retry: RetryPolicy = RetryPolicy(),
+                 compress_min_bytes: int = 64 * 1024, transport: Optional[httpx.AsyncBaseTransport] = None):
+        """
+        初始化客户端
+
+        Args:
+            base_url: 服务地址
+            tenant: 租户，通过 X-Tenant-ID 请求头传递
+            timeout: 读取超时（秒），流式响应为相邻两帧之间的最长间隔
+            max_connections: 连接池大小，并发请求数超过时排队等待连接
+            retry: 重试策略
+            compress_min_bytes: 请求体超过该字节数时gzip压缩，<=0 表示不压缩
+            transport: 自定义的httpx异步传输层
+        """
+        headers = {'X-Tenant-ID': tenant} if tenant else {}
+        self.retry = retry
+        self.compress_min_bytes = compress_min_bytes
+        self._http = httpx.AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=httpx.Timeout(timeout, connect=10.0),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            transport=transport,
+        )
+
+    async def close(self) -> None:
+        """关闭连接池"""
+        await self._http.aclose()
+
+    async def __aenter__(self) -> 'AsyncMeetingAssistantClient':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    # ===== 接口 =====
+
+    async def summarize(self, srt_text: str, meeting_id: str, log_id: Optional[str] = None,
+                        stream: bool = False, **options) -> Union[Dict[str, Any], AsyncIterator[Dict[str, Any]]]:
+        """
+        生成会议纪要，参数见 MeetingAssistantClient.summarize
+        """
+        payload = dict(options, log_id=log_id or new_log_id('summary'), srt_text=srt_text,
+                       meeting_id=meeting_id, stream=stream)
+        if stream:
+            return self._stream('/summary', payload)
+        return await self._request('POST', '/summary', payload)
+
+    async def chat(self, srt_text: str, meeting_id: str, messages: list, log_id: Optional[str] = None,
+                   stream: bool = False, **options) -> Union[Dict[str, Any], AsyncIterator[Dict[str, Any]]]:
+        """
+        会议问答，参数见 MeetingAssistantClient.chat
+        """
+        payload = dict(options, log_id=log_id or new_log_id('chat'), srt_text=srt_text,
+                       meeting_id=meeting_id, messages=messages, stream=stream)
+        if stream:
+            return self._stream('/chat', payload)
+        return await self._request('POST', '/chat', payload)
+
+    async def upload_transcript(self, meeting_id: str, srt_text: str) -> Dict[str, Any]:
+        """上传会议转写"""
+        return await self._request('PUT', f'/meetings/{meeting_id}/transcript', {"srt_text": srt_text})
+
+    async def health(self) -> Dict[str, Any]:
+        """健康检查"""
+        return await self._request('GET', '/health')
+
+    async def usage(self) -> Dict[str, Any]:
+        """查询当前租户的token用量"""
+        return await self._request('GET', '/usage')
+
+    async def batch_summarize(self, meetings: Iterable[Tuple[str, str]], concurrency: int = 8,
+                              **options) -> List[BatchItem]:
+        """
+        并发生成多个会议的纪要，参数和返回值见 MeetingAssistantClient.batch_summarize
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(meeting_id: str, srt_text: str) -> BatchItem:
+            async with semaphore:
+                try:
+                    return BatchItem(meeting_id, await self.summarize(srt_text, meeting_id, **options), None)
+                except (MeetingAssistantError, httpx.HTTPError) as e:
+                    return BatchItem(meeting_id, None, e)
+
+        return list(await asyncio.gather(*(run(meeting_id, srt_text) for meeting_id, srt_text in meetings)))
+
+    # ===== 请求与重试 =====
+
+    async def _request(self, method: str, path: str, payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        body, headers = encode_json(payload, self.compress_min_bytes) if payload is not None else (None, {})
+        attempt = 0
+        while True:
+            try:
+                response = await self._http.request(method, path, content=body, headers=headers)
+                if response.status_code >= 400:
+                    raise error_from_response(response.status_code, response.content, response.headers)
+                return response.json()
+            except (MeetingAssistantError, httpx.TransportError) as e:
+                attempt += 1
+                if not self.retry.should_retry(e, attempt):
+                    raise
+                await asyncio.sleep(self.retry.delay(attempt, getattr(e, 'retry_after', None)))
+
+    async def _stream(self, path: str, payload: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        cursor = StreamCursor(path, *encode_json(payload, self.compress_min_bytes), payload['log_id'])
+        attempt = 0
+        while True:
+            received = cursor.received
+            try:
+                method, url, body, headers = cursor.next_request()
+                async with self._http.stream(method, url, content=body, headers=headers) as response:
+                    if response.status_code >= 400:
+                        error = error_from_response(response.status_code, await response.aread(), response.headers)
+                        raise cursor.resume_failed(error) if received else error
+                    decoder = NDJSONDecoder()
+                    async for chunk in response.aiter_bytes():
+                        for frame in decoder.feed(chunk):
+                            cursor.observe(frame)
+                            yield frame
+                            if cursor.finished:
+                                return
+                    for frame in decoder.close():
+                        cursor.observe(frame)
+                        yield frame
+                    if cursor.finished:
+                        return
+                raise cursor.interrupted()
+            except (MeetingAssistantError, httpx.TransportError) as e:
+                # 本次尝试收到了新的帧，说明连接曾经正常，重新计算重试次数
+                attempt = 1 if cursor.received > received else attempt + 1
+                if not self.retry.should_retry(e, attempt):
+                    raise
+                await asyncio.sleep(self.retry.delay(attempt, getattr(e, 'retry_after', None)))
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+会议助手同步客户端
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import httpx
+
+from meeting_assistant_client._base import (
+    BatchItem, MeetingAssistantError, NDJSONDecoder, RetryPolicy, StreamCursor,
+    encode_json, error_from_response, new_log_id,
+)
+
+
+class MeetingAssistantClient:
+    """
+    会议助手客户端（线程安全，多个线程可共用一个实例）
+
+    所有请求共用一个连接池；失败的请求以相同的 log_id 重试，服务端据此复用已有的生成，
+    流式响应中断时从已收到的帧之后续传。
+    """
+
+    def __init__(self, base_url: str = "http://localhost:8000", tenant: Optional[str] = None,
+                 timeout: float = 300.0, max_connections: int = 32, retry: RetryPolicy = RetryPolicy(),
+                 compress_min_bytes: int = 64 * 1024, transport: Optional[httpx.BaseTransport] = None):
+        """
+        初始化客户端
+
+        Args:
+            base_url: 服务地址
+            tenant: 租户，通过 X-Tenant-ID 请求头传递
+            timeout: 读取超时（秒），流式响应为相邻两帧之间的最长间隔
+            max_connections: 连接池大小，并发请求数超过时排队等待连接
+            retry: 重试策略
+            compress_min_bytes: 请求体超过该字节数时gzip压缩，<=0 表示不压缩
+            transport: 自定义的httpx传输层（如测试时直接调用WSGI应用）
+        """
+        headers = {'X-Tenant-ID': tenant} if tenant else {}
+        self.retry = retry
+        self.compress_min_bytes = compress_min_bytes
+        self._http = httpx.Client(
+            base_url=base_url,
+            headers=headers,
+            timeout=httpx.Timeout(timeout, connect=10.0),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            transport=transport,
+        )
+
+    def close(self) -> None:
+        """关闭连接池"""
+        self._http.close()
+
+    def __enter__(self) -> 'MeetingAssistantClient':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    # ===== 接口 =====
+
+    def summarize(self, srt_text: str, meeting_id: str, log_id: Optional[str] = None,
+                  stream: bool = False, **options) -> Union[Dict[str, Any], Iterator[Dict[str, Any]]]:
+        """
+        生成会议纪要
+
+        Args:
+            srt_text: SRT格式的会议转写文本
+            meeting_id: 会议ID
+            log_id: 日志ID，为空时自动生成；重试时沿用
+            stream: 是否流式返回
+            **options: 其他请求参数（如 format、mode）
+
+        Returns:
+            stream=False 时返回响应数据，stream=True 时返回逐帧产出的迭代器
+
+        Raises:
+            MeetingAssistantError: 服务端返回错误，或重试次数用完
+        """
+        payload = dict(options, log_id=log_id or new_log_id('summary'), srt_text=srt_text,
+                       meeting_id=meeting_id, stream=stream)
+        if stream:
+            return self._stream('/summary', payload)
+        return self._request('POST', '/summary', payload)
+
+    def chat(self, srt_text: str, meeting_id: str, messages: list, log_id: Optional[str] = None,
+             stream: bool = False, **options) -> Union[Dict[str, Any], Iterator[Dict[str, Any]]]:
+        """
+        会议问答
+
+        Args:
+            srt_text: SRT格式的会议转写文本，已上传转写时可以为空
+            meeting_id: 会议ID
+            messages: 对话历史
+            log_id: 日志ID，为空时自动生成；重试时沿用
+            stream: 是否流式返回
+            **options: 其他请求参数（如 history_independent）
+
+        Returns:
+            stream=False 时返回响应数据，stream=True 时返回逐帧产出的迭代器
+
+        Raises:
+            MeetingAssistantError: 服务端返回错误，或重试次数用完
+        """
+        payload = dict(options, log_id=log_id or new_log_id('chat'), srt_text=srt_text,
+                       meeting_id=meeting_id, messages=messages, stream=stream)
+        if stream:
+            return self._stream('/chat', payload)
+        return self._request('POST', '/chat', payload)
+
+    def upload_transcript(self, meeting_id: str, srt_text: str) -> Dict[str, Any]:
+        """
+        上传会议转写
+
+        Args:
+            meeting_id: 会议ID
+            srt_text: SRT格式的会议转写文本
+
+        Returns:
+            响应数据
+        """
+        return self._request('PUT', f'/meetings/{meeting_id}/transcript', {"srt_text": srt_text})
+
+    def health(self) -> Dict[str, Any]:
+        """健康检查"""
+        return self._request('GET', '/health')
+
+    def usage(self) -> Dict[str, Any]:
+        """查询当前租户的token用量"""
+        return self._request('GET', '/usage')
+
+    def batch_summarize(self, meetings: Iterable[Tuple[str, str]], concurrency: int = 8,
+                        **options) -> List[BatchItem]:
+        """
+        并发生成多个会议的纪要
+
+        服务端过载（503）时按 Retry-After 退避重试，不会因并发过高而失败。
+
+        Args:
+            meetings: (会议ID, SRT文本) 列表
+            concurrency: 同时进行的请求数，应不大于连接池大小
+            **options: 传给 summarize 的其他参数
+
+        Returns:
+            与输入顺序一致的结果，单个会议失败不影响其他会议
+        """
+        def run(meeting: Tuple[str, str]) -> BatchItem:
+            meeting_id, srt_text = meeting
+            try:
+                return BatchItem(meeting_id, self.summarize(srt_text, meeting_id, **options), None)
+            except (MeetingAssistantError, httpx.HTTPError) as e:
+                return BatchItem(meeting_id, None, e)
+
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='batch-summarize') as executor:
+            return list(executor.map(run, meetings))
+
+    # ===== 请求与重试 =====
+
+    def _request(self, method: str, path: str, payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        body, headers = encode_json(payload, self.compress_min_bytes) if payload is not None else (None, {})
+        attempt = 0
+        while True:
+            try:
+                response = self._http.request(method, path, content=body, headers=headers)
+                if response.status_code >= 400:
+                    raise error_from_response(response.status_code, response.content, response.headers)
+                return response.json()
+            except (MeetingAssistantError, httpx.TransportError) as e:
+                attempt += 1
+                if not self.retry.should_retry(e, attempt):
+                    raise
+                time.sleep(self.retry.delay(attempt, getattr(e, 'retry_after', None)))
+
+    def _stream(self, path: str, payload: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        cursor = StreamCursor(path, *encode_json(payload, self.compress_min_bytes), payload['log_id'])
+        attempt = 0
+        while True:
+            received = cursor.received
+            try:
+                method, url, body, headers = cursor.next_request()
+                with self._http.stream(method, url, content=body, headers=headers) as response:
+                    if response.status_code >= 400:
+                        error = error_from_response(response.status_code, response.read(), response.headers)
+                        raise cursor.resume_failed(error) if received else error
+                    decoder = NDJSONDecoder()
+                    for chunk in response.iter_bytes():
+                        for frame in decoder.feed(chunk):
+                            cursor.observe(frame)
+                            yield frame
+                            if cursor.finished:
+                                return
+                    for frame in decoder.close():
+                        cursor.observe(frame)
+                        yield frame
+                    if cursor.finished:
+                        return
+                raise cursor.interrupted()
+            except (MeetingAssistantError, httpx.TransportError) as e:
+                # 本次尝试收到了新的帧，说明连接曾经正常，重新计算重试次数
+                attempt = 1 if cursor.received > received else attempt + 1
+                if not self.retry.should_retry(e, attempt):
+                    raise
+                time.sleep(self.retry.delay(attempt, getattr(e, 'retry_after', None)))
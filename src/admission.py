@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+准入控制与过载保护
+
+每个worker进程限制同时处理的LLM请求数，超出的请求按优先级排队（交互式问答优先于批量纪要）。
+队列已满或排队超时的请求立即被拒绝，由调用方返回503和 Retry-After，而不是在积压中等到超时。
+"""
+
+import math
+import time
+import itertools
+import threading
+from typing import Dict, List, NamedTuple, Optional
+
+
+class PriorityClass(NamedTuple):
+    """一个优先级类别"""
+    name: str
+    # 数值越小优先级越高
+    priority: int
+    # 最多排队的请求数
+    max_queue: int
+    # 最长排队时间（秒）
+    max_wait: float
+    # 该类别最多同时处理的请求数，None 表示只受总并发限制
+    max_concurrent: Optional[int] = None
+
+
+class AdmissionRejected(Exception):
+    """请求未被准入"""
+
+    def __init__(self, class_name: str, reason: str, retry_after: int):
+        """
+        Args:
+            class_name: 优先级类别
+            reason: queue_full（队列已满）或 timeout（排队超时）
+            retry_after: 建议的重试等待秒数
+        """
+        super().__init__(f"{class_name} request rejected: {reason}")
+        self.class_name = class_name
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class Ticket:
+    """准入凭证，处理完成后需调用 AdmissionController.release 归还"""
+
+    __slots__ = ('class_name', 'priority', 'seq', 'enqueued_at', 'admitted_at')
+
+    def __init__(self, class_name: str, priority: int, seq: int):
+        self.class_name = class_name
+        self.priority = priority
+        self.seq = seq
+        self.enqueued_at = time.monotonic()
+        self.admitted_at = 0.0
+
+    @property
+    def wait_seconds(self) -> float:
+        return self.admitted_at - self.enqueued_at
+
+
+class AdmissionController:
+    """按优先级排队的并发限制器（进程内，线程安全）"""
+
+    # 平均处理时长的指数平滑系数，用于估算 Retry-After
+    EWMA_ALPHA = 0.2
+
+    def __init__(self, max_concurrent: int, classes: List[PriorityClass]):
+        """
+        初始化准入控制
+
+        Args:
+            max_concurrent: 所有类别合计的最大并发数
+            classes: 优先级类别
+        """
+        self.max_concurrent = max_concurrent
+        self.classes: Dict[str, PriorityClass] = {cls.name: cls for cls in classes}
+        self._cond = threading.Condition()
+        self._active: Dict[str, int] = {cls.name: 0 for cls in classes}
+        self._waiting: List[Ticket] = []
+        self._seq = itertools.count()
+        self._service_seconds = 1.0
+
+    def _can_run(self, class_name: str) -> bool:
+        if sum(self._active.values()) >= self.max_concurrent:
+            return False
+        limit = self.classes[class_name].max_concurrent
+        return limit is None or self._active[class_name] < limit
+
+    def _next_eligible(self) -> Optional[Ticket]:
+        # 按 (优先级, 到达顺序) 找到第一个当前可以运行的请求；
+        # 类别自身并发已满时不阻塞其他类别
+        for ticket in sorted(self._waiting, key=lambda t: (t.priority, t.seq)):
+            if self._can_run(ticket.class_name):
+                return ticket
+        return None
+
+    def _retry_after(self) -> int:
+        # 估算排在前面的请求处理完所需的时间
+        backlog = len(self._waiting) + sum(self._active.values())
+        return max(1, min(120, math.ceil(self._service_seconds * backlog / max(self.max_concurrent, 1))))
+
+    def acquire(self, class_name: str) -> Ticket:
+        """
+        申请处理请求，必要时排队等待
+
+        Args:
+            class_name: 优先级类别
+
+        Returns:
+            准入凭证
+
+        Raises:
+            AdmissionRejected: 队列已满或排队超时
+        """
+        cls = self.classes[class_name]
+        with self._cond:
+            ticket = Ticket(class_name, cls.priority, next(self._seq))
+            queued = sum(1 for waiting in self._waiting if waiting.class_name == class_name)
+            if queued >= cls.max_queue and not self._can_run(class_name):
+                raise AdmissionRejected(class_name, 'queue_full', self._retry_after())
+            self._waiting.append(ticket)
+
+            deadline = ticket.enqueued_at + cls.max_wait
+            while self._next_eligible() is not ticket:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._waiting.remove(ticket)
+                    self._cond.notify_all()
+                    raise AdmissionRejected(class_name, 'timeout', self._retry_after())
+                self._cond.wait(remaining)
+
+            self._waiting.remove(ticket)
+            self._active[class_name] += 1
+            ticket.admitted_at = time.monotonic()
+            # 准入后可能还有空闲并发，唤醒其他等待者
+            self._cond.notify_all()
+            return ticket
+
+    def release(self, ticket: Ticket) -> None:
+        """
+        归还准入凭证
+
+        Args:
+            ticket: acquire 返回的凭证
+        """
+        with self._cond:
+            self._active[ticket.class_name] -= 1
+            elapsed = time.monotonic() - ticket.admitted_at
+            self._service_seconds += self.EWMA_ALPHA * (elapsed - self._service_seconds)
+            self._cond.notify_all()
+
+    def queue_depths(self) -> Dict[str, int]:
+        """返回各类别的排队数"""
+        with self._cond:
+            depths = {name: 0 for name in self.classes}
+            for ticket in self._waiting:
+                depths[ticket.class_name] += 1
+            return depths
+
+    def active_counts(self) -> Dict[str, int]:
+        """返回各类别正在处理的请求数"""
+        with self._cond:
+            return dict(self._active)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+问答结果缓存
+
+以 会议内容哈希 + 归一化问题 为键缓存问答结果，支持LRU淘汰和过期时间(TTL)。
+"""
+
+import time
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+
+# 带有含义、不作为标点忽略的字符（如“50%”“C#”“R&D”）
+_MEANINGFUL_PUNCTUATION = frozenset('%#&@')
+
+
+def normalize_question(question: str) -> str:
+    """
+    归一化问题文本，使仅在标点、空白、全半角、大小写上不同的问题命中同一缓存
+
+    符号（如“C++”中的“+”、“$”）、_MEANINGFUL_PUNCTUATION 中的字符以及数字间的小数点会保留，
+    只在这些字符上不同的问题不会共用缓存。
+
+    Args:
+        question: 原始问题
+
+    Returns:
+        归一化后的问题
+    """
+    text = unicodedata.normalize('NFKC', question or '').lower()
+    kept = []
+    for index, ch in enumerate(text):
+        category = unicodedata.category(ch)
+        if category.startswith(('Z', 'C')):
+            continue
+        if category.startswith('P') and ch not in _MEANINGFUL_PUNCTUATION and not (
+                ch == '.' and 0 < index < len(text) - 1 and text[index - 1].isdigit() and text[index + 1].isdigit()):
+            continue
+        kept.append(ch)
+    return ''.join(kept)
+
+
+class AnswerCache:
+    """线程安全的问答LRU缓存"""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600):
+        """
+        初始化缓存
+
+        Args:
+            max_entries: 最大缓存条目数，超出后淘汰最久未使用的条目
+            ttl: 条目有效期（秒），<=0 表示不过期
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, content_hash: str, question: str) -> Optional[str]:
+        """
+        查询缓存的回答
+
+        Args:
+            content_hash: 会议内容哈希
+            question: 用户问题（未归一化）
+
+        Returns:
+            命中时返回回答，否则返回None
+        """
+        key = (content_hash, normalize_question(question))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            created_at, answer = entry
+            if self.ttl > 0 and time.time() - created_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return answer
+
+    def put(self, content_hash: str, question: str, answer: str) -> None:
+        """
+        写入回答
+
+        Args:
+            content_hash: 会议内容哈希
+            question: 用户问题（未归一化）
+            answer: 完整回答
+        """
+        key = (content_hash, normalize_question(question))
+        if not key[1] or not answer:
+            return
+        with self._lock:
+            self._entries[key] = (time.time(), answer)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
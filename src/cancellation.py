@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+流式生成的取消检测
+
+WSGI应用通常只有在下一次写入失败时才知道客户端已断开。DisconnectMonitor 在两次上游
+输出之间直接探测客户端连接，断开后生成器可以立即关闭上游LLM流。
+"""
+
+import time
+import select
+import socket
+from typing import Any, Dict, Optional
+
+
+class GenerationCancelled(Exception):
+    """生成过程被取消（如客户端已断开）"""
+
+
+def _client_socket(environ: Dict[str, Any]) -> Optional[socket.socket]:
+    # gunicorn 和 werkzeug 开发服务器都会在environ中暴露客户端连接
+    return environ.get('gunicorn.socket') or environ.get('werkzeug.socket')
+
+
+class DisconnectMonitor:
+    """探测客户端连接是否已关闭，按时间间隔限频"""
+
+    def __init__(self, environ: Dict[str, Any], interval: float = 0.5):
+        """
+        初始化探测器
+
+        Args:
+            environ: WSGI environ
+            interval: 两次探测的最小间隔（秒），<=0 表示不探测
+        """
+        self._sock = _client_socket(environ) if interval > 0 else None
+        self._interval = interval
+        self._last_check = time.monotonic()
+        self._disconnected = False
+
+    def __call__(self) -> bool:
+        """
+        返回客户端是否已断开
+        """
+        if self._disconnected or self._sock is None:
+            return self._disconnected
+        now = time.monotonic()
+        if now - self._last_check < self._interval:
+            return False
+        self._last_check = now
+        try:
+            readable, _, _ = select.select([self._sock], [], [], 0)
+            # 对端关闭后连接可读且读到EOF；有未读数据（如流水线请求）则视为仍然连接
+            if readable and self._sock.recv(1, socket.MSG_PEEK) == b'':
+                self._disconnected = True
+        except OSError:
+            # 连接被重置或已关闭
+            self._disconnected = True
+        except ValueError:
+            # TLS套接字不支持MSG_PEEK，此时只能依赖写入失败来发现断开
+            self._sock = None
+        return self._disconnected
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+分块纪要的增量更新
+
+长会议按字幕条目切分为若干块，先分别总结再合并为会议纪要，块总结随会议缓存保存。
+编辑修正少量字幕后重新提交转写时，在字幕条目级别与旧转写做差异比较：
+内容完全未变的块沿用原有总结，只有受修改影响的块需要重新总结。
+"""
+
+import difflib
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from src.subtitles import Cue, format_timestamp
+
+
+class SummaryChunk(NamedTuple):
+    """一个字幕块，字幕条目下标区间为 [start, end)"""
+    start: int
+    end: int
+    # 可沿用的块总结，需要重新生成时为None
+    summary: Optional[str] = None
+
+
+def split_chunks(cues: Sequence[Cue], start: int, end: int, max_chars: int) -> List[SummaryChunk]:
+    """
+    将字幕条目区间按字数切分为块，每块不超过 max_chars 字（单条字幕超长时独占一块）
+
+    Args:
+        cues: 字幕条目
+        start: 起始下标
+        end: 结束下标（不含）
+        max_chars: 每块的最大字数
+
+    Returns:
+        按顺序排列的块
+    """
+    chunks: List[SummaryChunk] = []
+    chunk_start, chunk_chars = start, 0
+    for index in range(start, end):
+        size = len(cues[index].text) + 1
+        if chunk_chars and chunk_chars + size > max_chars:
+            chunks.append(SummaryChunk(chunk_start, index))
+            chunk_start, chunk_chars = index, 0
+        chunk_chars += size
+    if chunk_start < end:
+        chunks.append(SummaryChunk(chunk_start, end))
+    return chunks
+
+
+def carry_over(old_texts: Sequence[str], old_chunks: Sequence[SummaryChunk],
+               new_texts: Sequence[str]) -> List[SummaryChunk]:
+    """
+    在字幕条目级别比较新旧转写，找出内容未变、总结可以沿用的旧块
+
+    旧块的全部字幕条目都落在同一段相同内容内时，块总结仍然有效，映射到新转写中的对应区间。
+
+    Args:
+        old_texts: 旧转写各字幕条目的文本
+        old_chunks: 旧转写的块及其总结
+        new_texts: 新转写各字幕条目的文本
+
+    Returns:
+        可沿用的块（下标为新转写中的位置），按顺序排列
+    """
+    matcher = difflib.SequenceMatcher(None, old_texts, new_texts)
+    blocks = matcher.get_matching_blocks()
+    carried: List[SummaryChunk] = []
+    block_index = 0
+    # 旧块和相同内容段都按位置排序，双指针一次扫描
+    for chunk in sorted(old_chunks):
+        if chunk.summary is None:
+            continue
+        while block_index < len(blocks) and blocks[block_index].a + blocks[block_index].size < chunk.end:
+            block_index += 1
+        if block_index == len(blocks):
+            break
+        old_start, new_start, size = blocks[block_index]
+        if size and old_start <= chunk.start:
+            offset = new_start - old_start
+            carried.append(SummaryChunk(chunk.start + offset, chunk.end + offset, chunk.summary))
+    return carried
+
+
+def plan_chunks(cues: Sequence[Cue], carried: Sequence[SummaryChunk], max_chars: int) -> List[SummaryChunk]:
+    """
+    规划新转写的全部块：沿用的块保持原有边界，其余字幕条目按字数重新切分
+
+    Args:
+        cues: 新转写的字幕条目
+        carried: carry_over 返回的可沿用块
+        max_chars: 每块的最大字数
+
+    Returns:
+        覆盖全部字幕条目、按顺序排列的块，需要重新总结的块 summary 为None
+    """
+    chunks: List[SummaryChunk] = []
+    position = 0
+    for chunk in carried:
+        chunks.extend(split_chunks(cues, position, chunk.start, max_chars))
+        chunks.append(chunk)
+        position = chunk.end
+    chunks.extend(split_chunks(cues, position, len(cues), max_chars))
+    return chunks
+
+
+def chunk_text(cues: Sequence[Cue], chunk: SummaryChunk) -> Tuple[str, str]:
+    """
+    块的文本和时间范围描述
+
+    Args:
+        cues: 字幕条目
+        chunk: 块
+
+    Returns:
+        (块文本, 时间范围描述)
+    """
+    span = f"{format_timestamp(cues[chunk.start].start_ms)} - {format_timestamp(cues[chunk.end - 1].end_ms)}"
+    return '\n'.join(cue.text for cue in cues[chunk.start:chunk.end]), span
+
+
+def dump_chunks(chunks: Sequence[SummaryChunk], max_chars: int) -> Dict[str, object]:
+    """
+    块总结的缓存格式（可JSON序列化）
+
+    Args:
+        chunks: 已全部生成总结的块
+        max_chars: 切分时使用的每块最大字数
+
+    Returns:
+        缓存数据
+    """
+    return {
+        "max_chars": max_chars,
+        "chunks": [[chunk.start, chunk.end, chunk.summary] for chunk in chunks]
+    }
+
+
+def load_chunks(data: Optional[Dict[str, object]], max_chars: int) -> List[SummaryChunk]:
+    """
+    读取缓存的块总结，切分参数变化后不再沿用
+
+    Args:
+        data: dump_chunks 的结果
+        max_chars: 当前的每块最大字数
+
+    Returns:
+        块列表
+    """
+    if not data or data.get('max_chars') != max_chars:
+        return []
+    return [SummaryChunk(start, end, summary) for start, end, summary in data.get('chunks', [])]
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+请求/响应压缩
+
+- 解码 Content-Encoding 为 gzip/zstd 的请求体，解压过程内存有界
+- 按 Accept-Encoding 协商压缩非流式响应
+- 流式NDJSON响应逐帧 flush，客户端可以实时解码每一行
+"""
+
+import json
+import zlib
+from typing import Any, Dict, Generator, Iterable, Optional
+
+try:
+    import zstandard
+except ImportError:  # zstd为可选依赖
+    zstandard = None
+
+# 每次从请求流读取的字节数
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class RequestBodyError(Exception):
+    """请求体无法解码"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def supported_encodings() -> list:
+    """
+    返回服务端支持的压缩算法，按优先级排序
+    """
+    return (['zstd'] if zstandard is not None else []) + ['gzip']
+
+
+def _check_encoding(encoding: str) -> None:
+    if encoding in ('gzip', 'x-gzip', 'deflate'):
+        return
+    if encoding == 'zstd':
+        if zstandard is None:
+            raise RequestBodyError(415, "服务端未安装zstandard，不支持zstd压缩的请求体")
+        return
+    raise RequestBodyError(415, f"不支持的Content-Encoding: {encoding}")
+
+
+def _iter_decompressed(stream, encoding: str) -> Generator[bytes, None, None]:
+    """按块读取并解压请求流，每块输出不超过 READ_CHUNK_SIZE"""
+    if encoding == 'identity':
+        while True:
+            chunk = stream.read(READ_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+    if encoding == 'zstd':
+        reader = zstandard.ZstdDecompressor().stream_reader(stream, read_size=READ_CHUNK_SIZE)
+        while True:
+            chunk = reader.read(READ_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+    wbits = zlib.MAX_WBITS if encoding == 'deflate' else 16 + zlib.MAX_WBITS
+    decompressor = zlib.decompressobj(wbits)
+    while True:
+        data = stream.read(READ_CHUNK_SIZE)
+        if not data:
+            break
+        # 限制单次解压的输出长度，防止压缩炸弹一次性展开
+        while data:
+            yield decompressor.decompress(data, READ_CHUNK_SIZE)
+            data = decompressor.unconsumed_tail
+    yield decompressor.flush()
+
+
+def iter_request_body(stream, content_encoding: Optional[str], max_bytes: int) -> Generator[bytes, None, None]:
+    """
+    按块读取并解压请求体，数据到达后立即产出，解压后的大小超过上限时立即中止
+
+    Args:
+        stream: 请求体输入流
+        content_encoding: 请求头 Content-Encoding
+        max_bytes: 解压后请求体的最大字节数
+
+    Yields:
+        解压后的数据块，每块不超过 READ_CHUNK_SIZE
+    """
+    encoding = (content_encoding or '').strip().lower() or 'identity'
+    if encoding != 'identity':
+        _check_encoding(encoding)
+
+    total = 0
+    chunks = _iter_decompressed(stream, encoding)
+    while True:
+        try:
+            chunk = next(chunks, None)
+        except Exception as e:
+            raise RequestBodyError(400, f"请求体解压失败: {str(e)}")
+        if chunk is None:
+            return
+        total += len(chunk)
+        if total > max_bytes:
+            raise RequestBodyError(413, f"请求体超过大小限制: {max_bytes} 字节")
+        yield chunk
+
+
+def read_request_body(stream, content_encoding: Optional[str], max_bytes: int) -> bytes:
+    """
+    读取并解压请求体，解压后的大小超过上限时立即中止
+
+    Args:
+        stream: 请求体输入流
+        content_encoding: 请求头 Content-Encoding
+        max_bytes: 解压后请求体的最大字节数
+
+    Returns:
+        解压后的请求体
+    """
+    body = bytearray()
+    for chunk in iter_request_body(stream, content_encoding, max_bytes):
+        body += chunk
+    return bytes(body)
+
+
+def load_json_body(stream, content_encoding: Optional[str], max_bytes: int) -> Dict[str, Any]:
+    """
+    读取、解压并解析JSON请求体
+
+    Args:
+        stream: 请求体输入流
+        content_encoding: 请求头 Content-Encoding
+        max_bytes: 解压后请求体的最大字节数
+
+    Returns:
+        解析后的JSON对象
+    """
+    body = read_request_body(stream, content_encoding, max_bytes)
+    try:
+        data = json.loads(body)
+    except ValueError as e:
+        raise RequestBodyError(400, f"请求体不是合法的JSON: {str(e)}")
+    if not isinstance(data, dict):
+        raise RequestBodyError(400, "请求体必须是JSON对象")
+    return data
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    根据 Accept-Encoding 选择响应压缩算法
+
+    Args:
+        accept_encoding: 请求头 Accept-Encoding
+
+    Returns:
+        选中的压缩算法，不压缩时返回None
+    """
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for item in accept_encoding.split(','):
+        parts = item.strip().split(';')
+        name = parts[0].strip().lower()
+        quality = 1.0
+        for param in parts[1:]:
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name:
+            accepted[name] = quality
+    for encoding in supported_encodings():
+        if accepted.get(encoding, accepted.get('*', 0.0)) > 0:
+            return encoding
+    return None
+
+
+def compress_body(data: bytes, encoding: str, level: int = 6) -> bytes:
+    """
+    一次性压缩响应体
+
+    Args:
+        data: 原始响应体
+        encoding: 压缩算法（gzip/zstd）
+        level: 压缩级别
+
+    Returns:
+        压缩后的响应体
+    """
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor(level=min(level, 19)).compress(data)
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+def compress_stream(chunks: Iterable[str], encoding: str, level: int = 6) -> Generator[bytes, None, None]:
+    """
+    压缩流式响应，每一帧后执行同步flush，保证客户端收到完整可解码的行
+
+    压缩上下文在帧之间共享，后续帧可以引用前面出现过的内容。
+
+    Args:
+        chunks: 原始NDJSON帧
+        encoding: 压缩算法（gzip/zstd）
+        level: 压缩级别
+
+    Yields:
+        压缩后的数据块
+    """
+    if encoding == 'zstd':
+        compressor = zstandard.ZstdCompressor(level=min(level, 19)).compressobj()
+
+        def flush_frame():
+            return compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+        def finish():
+            return compressor.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+        def flush_frame():
+            return compressor.flush(zlib.Z_SYNC_FLUSH)
+
+        def finish():
+            return compressor.flush(zlib.Z_FINISH)
+
+    iterator = iter(chunks)
+    try:
+        for chunk in iterator:
+            data = chunk.encode('utf-8') if isinstance(chunk, str) else chunk
+            yield compressor.compress(data) + flush_frame()
+        yield finish()
+    finally:
+        close = getattr(iterator, 'close', None)
+        if close is not None:
+            close()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+抽取式会议摘要
+
+TextRank：以字幕条目为节点、TF-IDF余弦相似度为边权，幂迭代求中心度，选出关键句并按时间排序。
+相似度矩阵 X·Xᵀ 不显式构造，每轮迭代只做两次稀疏矩阵-向量乘法（用 bincount 实现），
+计算量与词项数线性相关，多小时的转写也能在毫秒级完成。不调用LLM，可在LLM不可用时兜底。
+"""
+
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from src.subtitles import Cue, format_timestamp, split_speaker
+from src.tokenizer import encode_documents
+
+# TextRank 阻尼系数与迭代参数
+DAMPING = 0.85
+MAX_ITERATIONS = 50
+TOLERANCE = 1e-6
+
+# 候选句至少包含的词项数，过滤"好的""嗯"之类的短句
+MIN_SENTENCE_TOKENS = 4
+
+# 与已选句子的相似度超过该值时视为重复
+REDUNDANCY_THRESHOLD = 0.6
+
+
+def _tfidf_coo(token_ids: np.ndarray, doc_ids: np.ndarray, n_docs: int, vocab_size: int):
+    # 合并重复的 (句子, 词项)，按 TF-IDF 加权后对每个句子做L2归一化
+    pairs, counts = np.unique(doc_ids * vocab_size + token_ids, return_counts=True)
+    rows, cols = pairs // vocab_size, pairs % vocab_size
+    document_freq = np.bincount(cols, minlength=vocab_size)
+    values = (1 + np.log(counts)) * np.log((n_docs + 1) / (document_freq[cols] + 1) + 1)
+    norms = np.sqrt(np.bincount(rows, weights=values * values, minlength=n_docs))
+    values = values / norms[rows]
+    return rows, cols, values, np.bincount(rows, minlength=n_docs)
+
+
+def _textrank(rows: np.ndarray, cols: np.ndarray, values: np.ndarray, n: int, vocab_size: int) -> np.ndarray:
+    def similarity_times(vector: np.ndarray) -> np.ndarray:
+        # (X·Xᵀ - I)·v，去掉自环；X 的每行已归一化，对角线为1
+        projected = np.bincount(cols, weights=values * vector[rows], minlength=vocab_size)
+        return np.bincount(rows, weights=values * projected[cols], minlength=n) - vector * has_terms
+
+    has_terms = np.zeros(n)
+    has_terms[np.unique(rows)] = 1.0
+    degree = similarity_times(np.ones(n))
+    active = degree > 1e-12
+    if not active.any():
+        return has_terms / max(has_terms.sum(), 1)
+    inverse_degree = np.where(active, 1.0 / np.where(active, degree, 1.0), 0.0)
+
+    count = int(active.sum())
+    scores = active / count
+    for _ in range(MAX_ITERATIONS):
+        updated = ((1 - DAMPING) / count + DAMPING * similarity_times(scores * inverse_degree)) * active
+        converged = np.abs(updated - scores).sum() < TOLERANCE
+        scores = updated
+        if converged:
+            break
+    return scores
+
+
+def rank_sentences(texts: Sequence[str]) -> np.ndarray:
+    """
+    计算每个句子的TextRank中心度
+
+    Args:
+        texts: 句子列表
+
+    Returns:
+        与输入等长的得分数组，没有有效词项的句子得分为0
+    """
+    token_ids, doc_ids, terms = encode_documents(texts)
+    if not len(token_ids):
+        return np.zeros(len(texts))
+    rows, cols, values, _ = _tfidf_coo(token_ids, doc_ids, len(texts), len(terms))
+    return _textrank(rows, cols, values, len(texts), len(terms))
+
+
+def extract_key_sentences(cues: Sequence[Cue], max_sentences: int = 15) -> List[Dict[str, Any]]:
+    """
+    从字幕中抽取关键句
+
+    Args:
+        cues: 字幕条目
+        max_sentences: 最多抽取的句子数
+
+    Returns:
+        按时间排序的关键句，包含时间轴、发言人、文本和得分
+    """
+    if not cues:
+        return []
+    speakers, texts = zip(*(split_speaker(cue.text) for cue in cues))
+    token_ids, doc_ids, terms = encode_documents(texts)
+    if not len(token_ids):
+        return []
+    rows, cols, values, token_counts = _tfidf_coo(token_ids, doc_ids, len(cues), len(terms))
+    scores = _textrank(rows, cols, values, len(cues), len(terms))
+    # 每个句子的稀疏向量，用于去重
+    order = np.argsort(rows, kind='stable')
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=len(cues)))])
+    row_terms, row_values = cols[order], values[order]
+
+    def vector(index: int) -> Dict[int, float]:
+        lo, hi = offsets[index], offsets[index + 1]
+        return dict(zip(row_terms[lo:hi].tolist(), row_values[lo:hi].tolist()))
+
+    chosen: List[int] = []
+    chosen_vectors: List[Dict[int, float]] = []
+    for index in np.argsort(-scores, kind='stable'):
+        if len(chosen) >= max_sentences or scores[index] <= 0:
+            break
+        if token_counts[index] < MIN_SENTENCE_TOKENS:
+            continue
+        candidate = vector(int(index))
+        if any(sum(weight * other.get(term, 0.0) for term, weight in candidate.items()) > REDUNDANCY_THRESHOLD
+               for other in chosen_vectors):
+            continue
+        chosen.append(int(index))
+        chosen_vectors.append(candidate)
+
+    sentences = []
+    for index in sorted(chosen):
+        cue = cues[index]
+        sentences.append({
+            "start_ms": cue.start_ms,
+            "end_ms": cue.end_ms,
+            "start": format_timestamp(cue.start_ms),
+            "speaker": speakers[index],
+            "text": texts[index],
+            "score": round(float(scores[index]) * len(cues), 4),
+        })
+    return sentences
+
+
+def render_outline(sentences: Sequence[Dict[str, Any]], topics: Sequence[Dict[str, Any]] = ()) -> str:
+    """
+    将关键句渲染为提纲文本，提供话题切分结果时按话题分组
+
+    Args:
+        sentences: extract_key_sentences 的结果
+        topics: 话题段落（可选），需包含 start_ms、start、end、keywords
+
+    Returns:
+        Markdown格式的提纲
+    """
+    def line(sentence: Dict[str, Any]) -> str:
+        speaker = f"{sentence['speaker']}：" if sentence['speaker'] else ''
+        return f"- [{sentence['start']}] {speaker}{sentence['text']}"
+
+    if not topics:
+        return '\n'.join(['## 关键内容'] + [line(sentence) for sentence in sentences])
+
+    starts = [topic['start_ms'] for topic in topics]
+    groups: List[List[Dict[str, Any]]] = [[] for _ in topics]
+    for sentence in sentences:
+        groups[max(0, int(np.searchsorted(starts, sentence['start_ms'], side='right')) - 1)].append(sentence)
+    lines: List[str] = []
+    for topic, group in zip(topics, groups):
+        if not group:
+            continue
+        keywords = '、'.join(topic.get('keywords', [])[:3])
+        lines.append(f"## {topic['start']} - {topic['end']}" + (f" {keywords}" if keywords else ''))
+        lines.extend(line(sentence) for sentence in group)
+    return '\n'.join(lines)
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+生成任务登记：按幂等键复用LLM生成
+
+LLM生成在独立线程中执行，输出逐帧写入缓冲区，请求线程只负责读取缓冲区并返回给客户端。
+客户端用相同的 log_id 重试时，直接读取已完成的结果，或接入仍在进行的生成，不再重复调用LLM。
+所有读取方都断开后，进行中的生成立即取消；指定了宽限时间的生成，超过宽限时间仍无读取方接入才取消。
+只有这样的生成可以续传：客户端断线后凭生成ID和已收到的帧数重新接入，只接收缺少的帧。
+"""
+
+import time
+import uuid
+import contextvars
+import logging
+import threading
+from typing import Any, Callable, Dict, Generator, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 生成函数：接收取消检查函数，逐个产出帧
+Producer = Callable[[Callable[[], bool]], Iterable[Any]]
+
+
+class Generation:
+    """一次生成的输出缓冲区"""
+
+    def __init__(self, key: str, grace: float = 0.0):
+        self.key = key
+        # 所有读取方断开后等待重新接入的时间（秒），<=0 表示立即取消
+        self.grace = grace
+        self.id = uuid.uuid4().hex
+        self.frames: List[Any] = []
+        self.done = False
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.cancelled = threading.Event()
+        self.readers = 0
+        self._cond = threading.Condition()
+
+    @property
+    def resumable(self) -> bool:
+        """断线后能否续传：立即取消的生成在进行中断开后即被丢弃，不能续传"""
+        return self.grace > 0
+
+    def append(self, frame: Any) -> None:
+        with self._cond:
+            self.frames.append(frame)
+            self._cond.notify_all()
+
+    def finish(self, error: Optional[str] = None) -> None:
+        with self._cond:
+            self.done = True
+            self.error = error
+            self.finished_at = time.time()
+            self._cond.notify_all()
+
+    def read(self, offset: int = 0, stop: Optional[Callable[[], bool]] = None,
+             poll_interval: float = 0.5) -> Generator[Any, None, None]:
+        """
+        从指定位置读取帧，读到末尾时等待新帧，生成结束后返回
+
+        Args:
+            offset: 起始帧序号
+            stop: 等待期间定期调用，返回True时停止读取（如客户端已断开）
+            poll_interval: 调用 stop 的间隔（秒）
+
+        Yields:
+            帧
+        """
+        while True:
+            with self._cond:
+                while offset >= len(self.frames) and not self.done:
+                    self._cond.wait(poll_interval)
+                    if stop is not None and offset >= len(self.frames) and stop():
+                        return
+                pending = self.frames[offset:]
+                done = self.done
+            for frame in pending:
+                yield frame
+            offset += len(pending)
+            if done and offset >= len(self.frames):
+                return
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待生成结束
+
+        Args:
+            timeout: 最长等待时间（秒），None表示一直等待
+
+        Returns:
+            是否已结束
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: self.done, timeout)
+
+
+class GenerationRegistry:
+    """按幂等键登记生成任务，结束后在保留期内可重放"""
+
+    def __init__(self, window: float, grace: float):
+        """
+        初始化登记表
+
+        Args:
+            window: 生成结束后保留结果的时间（秒）
+            grace: 默认的宽限时间：所有读取方断开后，等待重新接入的时间（秒），超时后取消生成
+        """
+        self.window = window
+        self.grace = grace
+        self._generations: Dict[str, Generation] = {}
+        # 按生成ID索引，供断线后续传；生成失败时仍可续传，但不再按幂等键复用
+        self._by_id: Dict[str, Generation] = {}
+        self._lock = threading.Lock()
+
+    def start(self, key: str, producer: Producer,
+              keep: Optional[Callable[[List[Any]], bool]] = None,
+              grace: Optional[float] = None) -> Tuple[Generation, bool]:
+        """
+        获取幂等键对应的生成，不存在时启动新的生成
+
+        Args:
+            key: 幂等键
+            producer: 生成函数，在后台线程中执行
+            keep: 生成结束后判断结果是否保留供重放，返回False时（如生成失败）下次请求重新生成
+            grace: 宽限时间（秒），None表示使用默认值，<=0 表示读取方全部断开后立即取消；
+                复用已有生成时，宽限时间更长的请求会延长该生成的宽限时间
+
+        Returns:
+            (生成, 是否新启动)
+        """
+        with self._lock:
+            self._expire()
+            generation = self._generations.get(key)
+            if generation is not None:
+                if grace is not None and grace > generation.grace:
+                    generation.grace = grace
+                return generation, False
+            generation = Generation(key, self.grace if grace is None else grace)
+            self._generations[key] = generation
+            self._by_id[generation.id] = generation
+        # 生成线程沿用调用方的上下文（如用量归属）
+        context = contextvars.copy_context()
+        threading.Thread(
+            target=context.run, args=(self._run, generation, producer, keep),
+            name=f'generation-{generation.id[:8]}', daemon=True
+        ).start()
+        return generation, True
+
+    def _run(self, generation: Generation, producer: Producer,
+             keep: Optional[Callable[[List[Any]], bool]]) -> None:
+        error = None
+        try:
+            for frame in producer(generation.cancelled.is_set):
+                generation.append(frame)
+        except Exception as e:
+            logger.error(f"Generation {generation.id} failed: {str(e)}")
+            error = str(e)
+        generation.finish(error)
+        if error or generation.cancelled.is_set() or (keep is not None and not keep(generation.frames)):
+            self.discard(generation)
+
+    def _expire(self) -> None:
+        deadline = time.time() - self.window
+        expired = [generation for generation in self._by_id.values()
+                   if generation.done and generation.finished_at < deadline]
+        for generation in expired:
+            del self._by_id[generation.id]
+            if self._generations.get(generation.key) is generation:
+                del self._generations[generation.key]
+
+    def get(self, generation_id: str) -> Optional[Generation]:
+        """
+        按生成ID查找保留期内的生成
+
+        Args:
+            generation_id: 生成ID
+
+        Returns:
+            生成，不存在、已过期或已取消时返回None
+        """
+        with self._lock:
+            self._expire()
+            return self._by_id.get(generation_id)
+
+    def discard(self, generation: Generation) -> None:
+        """
+        移除生成，之后相同幂等键的请求会重新生成
+
+        Args:
+            generation: 生成
+        """
+        with self._lock:
+            if self._generations.get(generation.key) is generation:
+                del self._generations[generation.key]
+
+    def attach(self, generation: Generation) -> None:
+        """登记一个读取方"""
+        with self._lock:
+            generation.readers += 1
+
+    def detach(self, generation: Generation) -> None:
+        """
+        注销一个读取方，没有读取方且生成未结束时，立即或在宽限时间后取消生成
+
+        Args:
+            generation: 生成
+        """
+        with self._lock:
+            generation.readers -= 1
+            orphaned = generation.readers <= 0 and not generation.done
+        if orphaned and generation.grace <= 0:
+            self._cancel_if_orphaned(generation)
+        elif orphaned:
+            timer = threading.Timer(generation.grace, self._cancel_if_orphaned, args=(generation,))
+            timer.daemon = True
+            timer.start()
+
+    def _cancel_if_orphaned(self, generation: Generation) -> None:
+        with self._lock:
+            if generation.readers > 0 or generation.done:
+                return
+        logger.info(f"Cancelling generation {generation.id}: no readers for {generation.grace}s")
+        generation.cancelled.set()
+        self.discard(generation)
+        with self._lock:
+            self._by_id.pop(generation.id, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._generations)
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+LLM提供商注册表
+
+各提供商的SDK在该提供商被选用或首次调用时才导入。千帆和OpenAI SDK的依赖都较多，
+只加载实际使用的提供商可以缩短worker启动时间并降低每个worker的内存占用。
+"""
+
+import time
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Generator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def close_stream(stream: Any) -> None:
+    """
+    关闭上游流式响应，释放HTTP连接
+
+    Args:
+        stream: SDK返回的流对象或生成器
+    """
+    close = getattr(stream, 'close', None)
+    if close is None:
+        return
+    try:
+        close()
+    except Exception as e:
+        logger.warning(f"Failed to close upstream stream: {str(e)}")
+
+
+def _copy_usage(source: Any, target: Optional[Dict[str, int]]) -> None:
+    # 千帆和OpenAI兼容接口的用量字段名相同；OpenAI SDK返回对象，千帆返回字典
+    if not source or target is None:
+        return
+    for field in ('prompt_tokens', 'completion_tokens'):
+        value = source.get(field) if isinstance(source, dict) else getattr(source, field, None)
+        if value is not None:
+            target[field] = int(value)
+
+
+class LLMProvider(ABC):
+    """LLM提供商接口，子类必须实现 stream 和 complete"""
+
+    name = ''
+
+    def __init__(self, default_model: str):
+        self.default_model = default_model
+
+    @abstractmethod
+    def stream(self, messages: list, model: Optional[str] = None,
+               usage: Optional[Dict[str, int]] = None) -> Generator[str, None, None]:
+        """
+        流式生成
+
+        Args:
+            messages: 消息列表
+            model: 模型名称，为空时使用默认模型
+            usage: 提供商返回token用量时写入 prompt_tokens / completion_tokens
+
+        Yields:
+            生成的文本内容
+        """
+
+    @abstractmethod
+    def complete(self, messages: list, model: Optional[str] = None,
+                 usage: Optional[Dict[str, int]] = None) -> str:
+        """
+        非流式生成
+
+        Args:
+            messages: 消息列表
+            model: 模型名称，为空时使用默认模型
+            usage: 提供商返回token用量时写入 prompt_tokens / completion_tokens
+
+        Returns:
+            生成的完整文本
+        """
+
+
+class QianfanProvider(LLMProvider):
+    """百度千帆，密钥从 QIANFAN_ACCESS_KEY / QIANFAN_SECRET_KEY 环境变量读取"""
+
+    name = 'qianfan'
+
+    def __init__(self, default_model: str):
+        super().__init__(default_model)
+        import qianfan
+        self.client = qianfan.ChatCompletion()
+
+    def stream(self, messages: list, model: Optional[str] = None,
+               usage: Optional[Dict[str, int]] = None) -> Generator[str, None, None]:
+        resp = self.client.do(messages=messages, stream=True, model=model or self.default_model)
+        try:
+            for chunk in resp:
+                # 每个片段都带有截至当前的累计用量
+                _copy_usage(chunk.get('usage'), usage)
+                if chunk.get('result'):
+                    yield chunk['result']
+        finally:
+            # 提前结束（如客户端断开）时立即释放上游连接
+            close_stream(resp)
+
+    def complete(self, messages: list, model: Optional[str] = None,
+                 usage: Optional[Dict[str, int]] = None) -> str:
+        resp = self.client.do(messages=messages, stream=False, model=model or self.default_model)
+        _copy_usage(resp.get('usage'), usage)
+        return resp.get('result', '')
+
+
+class DeepSeekProvider(LLMProvider):
+    """DeepSeek，通过OpenAI兼容接口调用"""
+
+    name = 'deepseek'
+
+    def __init__(self, default_model: str, api_key: str, base_url: str):
+        super().__init__(default_model)
+        from openai import OpenAI
+        self.client = OpenAI(api_key=api_key, base_url=base_url)
+
+    def stream(self, messages: list, model: Optional[str] = None,
+               usage: Optional[Dict[str, int]] = None) -> Generator[str, None, None]:
+        response = self.client.chat.completions.create(
+            model=model or self.default_model,
+            messages=messages,
+            stream=True,
+            # 最后一个片段携带整次调用的用量（当前SDK版本没有 stream_options 参数）
+            extra_body={"stream_options": {"include_usage": True}}
+        )
+        try:
+            for chunk in response:
+                _copy_usage(getattr(chunk, 'usage', None), usage)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            close_stream(response)
+
+    def complete(self, messages: list, model: Optional[str] = None,
+                 usage: Optional[Dict[str, int]] = None) -> str:
+        response = self.client.chat.completions.create(
+            model=model or self.default_model,
+            messages=messages,
+            stream=False
+        )
+        _copy_usage(response.usage, usage)
+        return response.choices[0].message.content if response.choices else ''
+
+
+class ProviderRegistry:
+    """按名称注册提供商工厂，首次获取时才创建实例（并导入SDK）"""
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], LLMProvider]] = {}
+        self._instances: Dict[str, LLMProvider] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory: Callable[[], LLMProvider]) -> None:
+        """
+        注册提供商
+
+        Args:
+            name: 提供商名称
+            factory: 创建提供商实例的函数，SDK应在该函数内导入
+        """
+        self._factories[name] = factory
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._factories
+
+    def get(self, name: str) -> LLMProvider:
+        """
+        获取提供商实例，首次获取时创建
+
+        Args:
+            name: 提供商名称
+
+        Returns:
+            提供商实例
+
+        Raises:
+            KeyError: 提供商未注册
+        """
+        provider = self._instances.get(name)
+        if provider is not None:
+            return provider
+        with self._lock:
+            provider = self._instances.get(name)
+            if provider is None:
+                start_time = time.perf_counter()
+                provider = self._factories[name]()
+                self._instances[name] = provider
+                logger.info(f"Loaded LLM provider {name} in {(time.perf_counter() - start_time) * 1000:.0f}ms")
+        return provider
+
+    def loaded(self) -> List[str]:
+        """返回已加载的提供商名称"""
+        return sorted(self._instances)
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+会议统计
+
+基于带时间轴的字幕条目和说话人前缀，在本地一次遍历计算会议时长、发言人发言时长、
+发言轮次和语速，不调用LLM。字幕条目可以分批累计，流式上传转写时边解析边统计。
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from src.subtitles import Cue, format_timestamp, split_speaker
+
+# 字数：汉字按字计，其他文字按单词计
+_WORD_RE = re.compile(r'[一-鿿]|[A-Za-z0-9]+(?:[\'\-][A-Za-z0-9]+)*')
+
+
+def count_words(text: str) -> int:
+    """
+    统计字数
+
+    Args:
+        text: 文本
+
+    Returns:
+        汉字数与英文单词数之和
+    """
+    return len(_WORD_RE.findall(text))
+
+
+def _per_minute(words: int, ms: int) -> float:
+    return round(words * 60000 / ms, 1) if ms > 0 else 0.0
+
+
+class MeetingStatsBuilder:
+    """
+    逐批累计字幕条目的统计数据，可以在上传转写的同时计算
+
+    没有说话人前缀的字幕归属于上一位发言人；同一发言人连续的字幕计为一个轮次。
+    """
+
+    def __init__(self):
+        self._speakers: Dict[str, Dict[str, int]] = {}
+        self._current: Optional[str] = None
+        self._first_start: Optional[int] = None
+        self._last_end: Optional[int] = None
+        self._cue_count = self._total_words = self._spoken_ms = self._unattributed_ms = 0
+
+    def add(self, cues: Iterable[Cue]) -> None:
+        """
+        累计一批字幕条目（按时间顺序）
+
+        Args:
+            cues: 字幕条目
+        """
+        speakers, current = self._speakers, self._current
+        for cue in cues:
+            speaker, text = split_speaker(cue.text)
+            cue_ms = max(0, cue.end_ms - cue.start_ms)
+            words = count_words(text)
+            self._first_start = cue.start_ms if self._first_start is None else min(self._first_start, cue.start_ms)
+            self._last_end = cue.end_ms if self._last_end is None else max(self._last_end, cue.end_ms)
+            self._cue_count += 1
+            self._total_words += words
+            self._spoken_ms += cue_ms
+
+            if speaker is not None and speaker != current:
+                entry = speakers.setdefault(speaker, {"talk_time_ms": 0, "turns": 0, "word_count": 0})
+                entry["turns"] += 1
+                current = speaker
+            if current is None:
+                self._unattributed_ms += cue_ms
+                continue
+            entry = speakers[current]
+            entry["talk_time_ms"] += cue_ms
+            entry["word_count"] += words
+        self._current = current
+
+    def result(self) -> Dict[str, Any]:
+        """
+        获取已累计字幕条目的统计数据
+
+        Returns:
+            会议时长、总字数、语速以及按发言时长降序排列的发言人统计
+        """
+        spoken_ms = self._spoken_ms
+        duration_ms = (self._last_end - self._first_start) if self._cue_count else 0
+        speaker_list: List[Dict[str, Any]] = []
+        for name, entry in sorted(self._speakers.items(), key=lambda item: -item[1]["talk_time_ms"]):
+            speaker_list.append({
+                "speaker": name,
+                "talk_time_ms": entry["talk_time_ms"],
+                "talk_time": format_timestamp(entry["talk_time_ms"]),
+                "talk_ratio": round(entry["talk_time_ms"] / spoken_ms, 4) if spoken_ms else 0.0,
+                "turns": entry["turns"],
+                "word_count": entry["word_count"],
+                "words_per_minute": _per_minute(entry["word_count"], entry["talk_time_ms"]),
+            })
+
+        return {
+            "duration_ms": duration_ms,
+            "duration": format_timestamp(duration_ms),
+            "cue_count": self._cue_count,
+            "spoken_ms": spoken_ms,
+            "unattributed_ms": self._unattributed_ms,
+            "word_count": self._total_words,
+            "words_per_minute": _per_minute(self._total_words, spoken_ms),
+            "speaker_count": len(speaker_list),
+            "speakers": speaker_list,
+        }
+
+
+def compute_meeting_stats(cues: Sequence[Cue]) -> Dict[str, Any]:
+    """
+    计算会议及各发言人的统计数据
+
+    Args:
+        cues: 字幕条目
+
+    Returns:
+        见 MeetingStatsBuilder.result
+    """
+    builder = MeetingStatsBuilder()
+    builder.add(cues)
+    return builder.result()
+
+
+def render_stats_text(stats: Dict[str, Any]) -> str:
+    """
+    将统计数据渲染为提示词中的文本
+
+    Args:
+        stats: compute_meeting_stats 的结果
+
+    Returns:
+        多行文本
+    """
+    lines = [
+        f"会议时长：{stats['duration']}，总字数：{stats['word_count']}，"
+        f"平均语速：{stats['words_per_minute']} 字/分钟"
+    ]
+    for entry in stats['speakers']:
+        lines.append(
+            f"- {entry['speaker']}：发言 {entry['talk_time']}（{entry['talk_ratio']:.0%}），"
+            f"{entry['turns']} 次发言，{entry['word_count']} 字，{entry['words_per_minute']} 字/分钟"
+        )
+    return '\n'.join(lines)
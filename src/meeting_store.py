@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+会议数据持久化存储
+
+基于SQLite保存会议缓存（纪要、解析后的转写文本等），服务重启后可以预热或按需加载。
+压缩后的转写单独保存，只在转写变化时写入；其余字段的更新只写入变化的字段。
+写入由后台线程异步完成，不阻塞请求处理。
+"""
+
+import os
+import json
+import time
+import queue
+import sqlite3
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 写队列结束标记
+_STOP = object()
+
+
+class MeetingStore:
+    """会议数据的SQLite存储，写入异步进行"""
+
+    def __init__(self, path: str, max_pending: int = 10000):
+        """
+        初始化存储
+
+        Args:
+            path: SQLite数据库文件路径
+            max_pending: 写队列最大长度，队列满时丢弃写入并记录警告
+        """
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        conn = self._connect()
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS meetings ("
+                "meeting_id TEXT PRIMARY KEY, "
+                "data TEXT NOT NULL, "
+                "updated_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_meetings_updated_at ON meetings (updated_at)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS transcripts ("
+                "meeting_id TEXT NOT NULL, "
+                "field TEXT NOT NULL, "
+                "data BLOB NOT NULL, "
+                "PRIMARY KEY (meeting_id, field))"
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+        self._writer = threading.Thread(target=self._write_loop, name='meeting-store-writer', daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        # 多个gunicorn worker共享同一数据库文件，使用WAL模式减少读写互斥
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def save(self, meeting_id: str, data: Dict[str, Any],
+             transcripts: Optional[Dict[str, bytes]] = None) -> None:
+        """
+        异步保存会议数据（整条覆盖）
+
+        Args:
+            meeting_id: 会议ID
+            data: 会议缓存数据，必须可JSON序列化
+            transcripts: 压缩后的转写 {字段名: 数据}，替换该会议已保存的转写；None表示不修改
+        """
+        self._put(('save', meeting_id, dict(data), time.time(), transcripts))
+
+    def update(self, meeting_id: str, fields: Dict[str, Any]) -> None:
+        """
+        异步更新会议数据的部分字段，其余字段和转写保持不变
+
+        Args:
+            meeting_id: 会议ID
+            fields: 需要更新的字段，必须可JSON序列化
+        """
+        self._put(('update', meeting_id, dict(fields), time.time(), None))
+
+    def _put(self, item: Tuple) -> None:
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            logger.warning(f"Meeting store queue is full, dropping write for meeting {item[1]}")
+
+    def load(self, meeting_id: str) -> Optional[Dict[str, Any]]:
+        """
+        读取单个会议数据
+
+        Args:
+            meeting_id: 会议ID
+
+        Returns:
+            会议数据（保存的转写以 字段名: bytes 合并在其中），不存在时返回None
+        """
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT data FROM meetings WHERE meeting_id = ?", (meeting_id,)
+            ).fetchone()
+            return self._with_transcripts(conn, meeting_id, json.loads(row[0])) if row else None
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _with_transcripts(conn: sqlite3.Connection, meeting_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        rows = conn.execute(
+            "SELECT field, data FROM transcripts WHERE meeting_id = ?", (meeting_id,)
+        ).fetchall()
+        data.update((field, bytes(blob)) for field, blob in rows)
+        return data
+
+    def load_recent(self, limit: int) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        读取最近更新的会议数据，用于启动预热
+
+        Args:
+            limit: 最多读取的会议数量
+
+        Returns:
+            (会议ID, 会议数据) 列表，按更新时间倒序
+        """
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT meeting_id, data FROM meetings ORDER BY updated_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+            return [(meeting_id, self._with_transcripts(conn, meeting_id, json.loads(data)))
+                    for meeting_id, data in rows]
+        finally:
+            conn.close()
+
+    def meeting_ids(self) -> List[str]:
+        """
+        读取全部会议ID
+
+        Returns:
+            会议ID列表
+        """
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT meeting_id FROM meetings").fetchall()
+        finally:
+            conn.close()
+        return [row[0] for row in rows]
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """
+        等待已提交的写入完成
+
+        Args:
+            timeout: 最长等待时间（秒）
+        """
+        deadline = time.time() + timeout
+        while self._queue.unfinished_tasks and time.time() < deadline:
+            time.sleep(0.01)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """
+        写完队列中的数据后停止后台写线程
+
+        Args:
+            timeout: 最长等待时间（秒）
+        """
+        self._queue.put(_STOP)
+        self._writer.join(timeout)
+
+    def _write_loop(self) -> None:
+        conn = self._connect()
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                break
+            # 合并队列中已积压的写入，同一会议的多次写入合并为一次
+            batch: Dict[str, List[Any]] = {}
+            self._merge(batch, item)
+            fetched = 1
+            stop = False
+            while True:
+                try:
+                    extra = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if extra is _STOP:
+                    stop = True
+                    self._queue.task_done()
+                    break
+                self._merge(batch, extra)
+                fetched += 1
+            try:
+                self._write_batch(conn, batch)
+            except Exception as e:
+                conn.rollback()
+                logger.error(f"Failed to persist meetings {list(batch)}: {str(e)}")
+            finally:
+                # 初始条目和合并的条目都需要标记完成
+                for _ in range(fetched):
+                    self._queue.task_done()
+            if stop:
+                break
+        conn.close()
+
+    @staticmethod
+    def _merge(batch: Dict[str, List[Any]], item: Tuple) -> None:
+        # batch: 会议ID -> [操作, 数据, 更新时间, 转写]；整条保存覆盖之前的写入，部分更新合并到之前的写入中
+        op, meeting_id, data, updated_at, transcripts = item
+        pending = batch.get(meeting_id)
+        if pending is None or op == 'save':
+            batch[meeting_id] = [op, data, updated_at, transcripts]
+            return
+        pending[1].update(data)
+        pending[2] = updated_at
+
+    @staticmethod
+    def _write_batch(conn: sqlite3.Connection, batch: Dict[str, List[Any]]) -> None:
+        # 部分更新需要读出原数据再写回，多个worker共享数据库，整批写入在同一个写事务中完成
+        conn.execute("BEGIN IMMEDIATE")
+        rows = []
+        for meeting_id, (op, data, updated_at, transcripts) in batch.items():
+            if op == 'update':
+                row = conn.execute(
+                    "SELECT data FROM meetings WHERE meeting_id = ?", (meeting_id,)
+                ).fetchone()
+                data = {**json.loads(row[0]), **data} if row else data
+            elif transcripts is not None:
+                conn.execute("DELETE FROM transcripts WHERE meeting_id = ?", (meeting_id,))
+                conn.executemany(
+                    "INSERT INTO transcripts (meeting_id, field, data) VALUES (?, ?, ?)",
+                    [(meeting_id, field, blob) for field, blob in transcripts.items()]
+                )
+            rows.append((meeting_id, json.dumps(data, ensure_ascii=False), updated_at))
+        conn.executemany(
+            "INSERT OR REPLACE INTO meetings (meeting_id, data, updated_at) VALUES (?, ?, ?)", rows
+        )
+        conn.commit()
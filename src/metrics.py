@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+进程内指标统计
+
+提供计数器、仪表和耗时分布，通过 /metrics 接口以JSON形式输出。
+每个gunicorn worker独立统计。
+"""
+
+import threading
+from collections import deque
+from typing import Any, Dict
+
+# 每个耗时指标保留的最近样本数，用于计算分位数
+RESERVOIR_SIZE = 1024
+
+
+def _metric_key(name: str, labels: Dict[str, Any]) -> str:
+    if not labels:
+        return name
+    label_str = ','.join(f"{key}={labels[key]}" for key in sorted(labels))
+    return f"{name}{{{label_str}}}"
+
+
+class _Timing:
+    __slots__ = ('count', 'total', 'min', 'max', 'samples')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+        self.samples: deque = deque(maxlen=RESERVOIR_SIZE)
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self.samples.append(value)
+
+    def snapshot(self) -> Dict[str, float]:
+        ordered = sorted(self.samples)
+
+        def percentile(p: float) -> float:
+            if not ordered:
+                return 0.0
+            return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+        return {
+            "count": self.count,
+            "avg": round(self.total / self.count, 3) if self.count else 0.0,
+            "min": round(self.min, 3) if self.count else 0.0,
+            "max": round(self.max, 3),
+            "p50": round(percentile(0.5), 3),
+            "p95": round(percentile(0.95), 3),
+        }
+
+
+class Metrics:
+    """线程安全的指标注册表"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, float] = {}
+        self._timings: Dict[str, _Timing] = {}
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        """
+        计数器累加
+
+        Args:
+            name: 指标名
+            value: 增量
+            **labels: 指标标签
+        """
+        key = _metric_key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels) -> None:
+        """
+        设置仪表当前值
+
+        Args:
+            name: 指标名
+            value: 当前值
+            **labels: 指标标签
+        """
+        key = _metric_key(name, labels)
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """
+        记录一次耗时等分布型观测值
+
+        Args:
+            name: 指标名
+            value: 观测值
+            **labels: 指标标签
+        """
+        key = _metric_key(name, labels)
+        with self._lock:
+            timing = self._timings.get(key)
+            if timing is None:
+                timing = self._timings[key] = _Timing()
+            timing.observe(value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        导出当前所有指标
+
+        Returns:
+            包含 counters、gauges、timings 的字典
+        """
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "timings": {key: timing.snapshot() for key, timing in self._timings.items()},
+            }
+
+
+# 全局指标实例
+metrics = Metrics()
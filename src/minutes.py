@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+结构化会议纪要
+
+约定LLM以JSON格式输出会议纪要，并负责解析、校验和渲染为文本。
+"""
+
+import json
+import re
+from typing import Any, Dict, List
+
+# 可单独查询的纪要字段
+MINUTES_FIELDS = ('topic', 'discussion', 'decisions', 'action_items')
+
+MINUTES_SCHEMA_HINT = """{
+  "topic": "会议主题",
+  "discussion": ["主要讨论内容1", "主要讨论内容2"],
+  "decisions": ["关键决策1", "关键决策2"],
+  "action_items": [
+    {"task": "行动项内容", "owner": "负责人，未提及时为null", "due_date": "截止日期，尽量使用YYYY-MM-DD格式，未提及时为null"}
+  ]
+}"""
+
+_FENCE_RE = re.compile(r'^```(?:json)?\s*|\s*```$', re.IGNORECASE)
+
+
+class MinutesValidationError(ValueError):
+    """LLM输出不是合法的结构化纪要"""
+
+
+def build_minutes_prompt(text_content: str) -> str:
+    """
+    构建结构化纪要提示词
+
+    Args:
+        text_content: 会议文本内容
+
+    Returns:
+        提示词
+    """
+    return f"""请根据以下会议转写内容，生成结构化的会议纪要。要求：
+1. 只输出一个JSON对象，不要输出任何其他文字或Markdown代码块标记
+2. JSON格式如下：
+{MINUTES_SCHEMA_HINT}
+3. 没有的内容使用空数组，不要编造负责人和日期
+
+会议转写内容：
+{text_content}
+
+请输出JSON："""
+
+
+def build_repair_prompt(raw_output: str, error: str) -> str:
+    """
+    构建修复提示词，要求LLM将不合法的输出改写为合法JSON
+
+    Args:
+        raw_output: 上一次的输出
+        error: 校验错误信息
+
+    Returns:
+        提示词
+    """
+    return f"""下面的内容应当是符合指定格式的JSON会议纪要，但校验失败：{error}
+
+请修正后只输出JSON对象，格式如下：
+{MINUTES_SCHEMA_HINT}
+
+待修正内容：
+{raw_output}"""
+
+
+def _as_text(value: Any) -> str:
+    return value.strip() if isinstance(value, str) else ''
+
+
+def _as_text_list(value: Any, field: str) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [value.strip()] if value.strip() else []
+    if not isinstance(value, list):
+        raise MinutesValidationError(f"字段 {field} 必须是数组")
+    return [item.strip() for item in value if isinstance(item, str) and item.strip()]
+
+
+def _as_action_items(value: Any) -> List[Dict[str, Any]]:
+    if value is None:
+        return []
+    if not isinstance(value, list):
+        raise MinutesValidationError("字段 action_items 必须是数组")
+    items = []
+    for item in value:
+        if isinstance(item, str):
+            item = {"task": item}
+        if not isinstance(item, dict):
+            raise MinutesValidationError("action_items 的元素必须是对象")
+        task = _as_text(item.get('task'))
+        if not task:
+            raise MinutesValidationError("action_items 的元素缺少 task")
+        items.append({
+            "task": task,
+            "owner": _as_text(item.get('owner')) or None,
+            "due_date": _as_text(item.get('due_date')) or None,
+        })
+    return items
+
+
+def parse_minutes(raw_output: str) -> Dict[str, Any]:
+    """
+    解析并校验LLM输出的结构化纪要
+
+    Args:
+        raw_output: LLM输出文本
+
+    Returns:
+        规范化后的纪要，包含 topic、discussion、decisions、action_items
+    """
+    text = _FENCE_RE.sub('', (raw_output or '').strip())
+    start, end = text.find('{'), text.rfind('}')
+    if start == -1 or end <= start:
+        raise MinutesValidationError("输出中没有JSON对象")
+    try:
+        data = json.loads(text[start:end + 1])
+    except ValueError as e:
+        raise MinutesValidationError(f"JSON解析失败: {str(e)}")
+    if not isinstance(data, dict):
+        raise MinutesValidationError("输出必须是JSON对象")
+
+    topic = _as_text(data.get('topic'))
+    if not topic:
+        raise MinutesValidationError("缺少 topic")
+    return {
+        "topic": topic,
+        "discussion": _as_text_list(data.get('discussion'), 'discussion'),
+        "decisions": _as_text_list(data.get('decisions'), 'decisions'),
+        "action_items": _as_action_items(data.get('action_items')),
+    }
+
+
+def render_minutes_text(minutes: Dict[str, Any]) -> str:
+    """
+    将结构化纪要渲染为文本纪要，供问答等场景使用
+
+    Args:
+        minutes: 结构化纪要
+
+    Returns:
+        文本纪要
+    """
+    lines = [f"会议主题：{minutes['topic']}"]
+    if minutes['discussion']:
+        lines.append("\n主要讨论内容：")
+        lines.extend(f"- {item}" for item in minutes['discussion'])
+    if minutes['decisions']:
+        lines.append("\n关键决策：")
+        lines.extend(f"- {item}" for item in minutes['decisions'])
+    if minutes['action_items']:
+        lines.append("\n行动项：")
+        for item in minutes['action_items']:
+            extra = '，'.join(filter(None, [
+                f"负责人：{item['owner']}" if item['owner'] else '',
+                f"截止：{item['due_date']}" if item['due_date'] else '',
+            ]))
+            lines.append(f"- {item['task']}" + (f"（{extra}）" if extra else ''))
+    return '\n'.join(lines)
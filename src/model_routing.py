@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+模型分级路由
+
+按请求类型和估算的提示词token数选择模型：短会议使用快速的小模型，长会议使用长上下文模型。
+规则按顺序匹配，第一条命中的规则生效，都不命中时使用默认模型。
+"""
+
+import json
+import re
+from typing import Any, Dict, List, Sequence
+
+REQUEST_TYPES = ('summary', 'minutes', 'chat', 'segment')
+
+_CJK_RE = re.compile(r'[一-鿿　-〿＀-￯]')
+
+
+def estimate_tokens(messages: Sequence[Dict[str, Any]]) -> int:
+    """
+    粗略估算消息列表的token数
+
+    汉字及全角标点约1个token，其他字符约4个字符1个token。
+
+    Args:
+        messages: 消息列表
+
+    Returns:
+        估算的token数
+    """
+    total = 0
+    for message in messages:
+        content = message.get('content') or ''
+        cjk = len(_CJK_RE.findall(content))
+        total += cjk + (len(content) - cjk + 3) // 4
+    return total
+
+
+def _token_bound(rule: Dict[str, Any], field: str, index: int) -> Any:
+    """读取规则的token数范围字段，缺省或为null时返回None"""
+    value = rule.get(field)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(f"model routing rule #{index} {field} must be an integer")
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"model routing rule #{index} {field} must be an integer") from None
+
+
+class ModelRouter:
+    """按规则为请求选择模型"""
+
+    def __init__(self, rules: List[Dict[str, Any]], default_model: str):
+        """
+        初始化路由器
+
+        Args:
+            rules: 路由规则列表，每条规则包含 model，可选 types（请求类型列表，缺省匹配所有类型）、
+                min_tokens、max_tokens（估算token数范围，闭区间）
+            default_model: 没有规则命中时使用的模型
+
+        Raises:
+            ValueError: 规则格式不正确
+        """
+        self.default_model = default_model
+        self.rules: List[Dict[str, Any]] = []
+        for index, rule in enumerate(rules):
+            if not isinstance(rule, dict) or not rule.get('model'):
+                raise ValueError(f"model routing rule #{index} must be an object with a model")
+            types = rule.get('types')
+            if types is not None:
+                types = [types] if isinstance(types, str) else types
+                if not isinstance(types, list) or not all(isinstance(t, str) for t in types):
+                    raise ValueError(f"model routing rule #{index} types must be a string or a list of strings")
+                unknown = set(types) - set(REQUEST_TYPES)
+                if unknown:
+                    raise ValueError(f"model routing rule #{index} has unknown types: {sorted(unknown)}")
+            self.rules.append({
+                "model": rule['model'],
+                "types": types,
+                "min_tokens": _token_bound(rule, 'min_tokens', index) or 0,
+                "max_tokens": _token_bound(rule, 'max_tokens', index),
+            })
+
+    @classmethod
+    def from_json(cls, text: str, default_model: str) -> 'ModelRouter':
+        """
+        从JSON配置创建路由器
+
+        Args:
+            text: JSON数组形式的规则，为空时只使用默认模型
+            default_model: 默认模型
+
+        Returns:
+            路由器
+        """
+        rules = json.loads(text) if text and text.strip() else []
+        if not isinstance(rules, list):
+            raise ValueError("model routing rules must be a JSON array")
+        return cls(rules, default_model)
+
+    def select(self, request_type: str, prompt_tokens: int) -> str:
+        """
+        选择模型
+
+        Args:
+            request_type: 请求类型（summary / minutes / chat / segment）
+            prompt_tokens: 估算的提示词token数
+
+        Returns:
+            模型名称
+        """
+        for rule in self.rules:
+            if rule['types'] is not None and request_type not in rule['types']:
+                continue
+            if prompt_tokens < rule['min_tokens']:
+                continue
+            if rule['max_tokens'] is not None and prompt_tokens > rule['max_tokens']:
+                continue
+            return rule['model']
+        return self.default_model
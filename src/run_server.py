@@ -4,11 +4,22 @@
 import os
 import sys
 import json
+import atexit
+import base64
+import time
+import zlib
+import hashlib
+import contextvars
 import logging
-from typing import Generator, Dict, Any
-from flask import Flask, request, Response, stream_with_context
-import qianfan
-from openai import OpenAI
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable, Generator, Dict, Any, Optional, Tuple
+from flask import Flask, request, Response, g, stream_with_context
+
+try:
+    from flask_sock import Sock
+except ImportError:  # WebSocket问答为可选功能，需要安装 flask-sock
+    Sock = None
 
 # 添加父目录到路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -18,7 +29,25 @@ try:
     from config import (
         LLM_PROVIDER, QIANFAN_ACCESS_KEY, QIANFAN_SECRET_KEY,
         DEEPSEEK_API_KEY, DEEPSEEK_BASE_URL, DEEPSEEK_MODEL,
-        HOST, PORT, DEFAULT_MODEL, LOG_LEVEL
+        HOST, PORT, DEFAULT_MODEL, LOG_LEVEL,
+        ANSWER_CACHE_ENABLED, ANSWER_CACHE_MAX_ENTRIES, ANSWER_CACHE_TTL,
+        MEETING_STORE_PATH, MEETING_STORE_WARM_LIMIT,
+        MAX_REQUEST_BODY_BYTES, MAX_FORM_FIELD_BYTES, RESPONSE_COMPRESSION_ENABLED,
+        RESPONSE_COMPRESSION_MIN_BYTES, STREAM_COMPRESSION_ENABLED,
+        CHAT_SUMMARY_MODE, BACKGROUND_SUMMARY_WORKERS,
+        PRECOMPUTE_ENABLED, PRECOMPUTE_QUESTIONS, PRECOMPUTE_MAX_LIVE_REQUESTS,
+        CANCEL_CHECK_INTERVAL, PARTIAL_OUTPUT_POLICY,
+        SEGMENT_LEAF_SECONDS, SUMMARY_CHUNK_CHARS, TOPIC_BLOCK_CUES, TOPIC_MIN_SECONDS,
+        EXTRACTIVE_MAX_SENTENCES, SUMMARY_FALLBACK_ENABLED, SUMMARY_LLM_DEADLINE,
+        MODEL_ROUTING_RULES,
+        ADMISSION_CONTROL_ENABLED, ADMISSION_MAX_CONCURRENT, ADMISSION_SUMMARY_MAX_CONCURRENT,
+        ADMISSION_CHAT_QUEUE, ADMISSION_SUMMARY_QUEUE, ADMISSION_CHAT_MAX_WAIT, ADMISSION_SUMMARY_MAX_WAIT,
+        WS_MAX_SESSIONS,
+        TRANSCRIPT_COMPRESSION_LEVEL, TRANSCRIPT_CACHE_SIZE,
+        IDEMPOTENCY_WINDOW, IDEMPOTENCY_KEY_HEADER, GENERATION_ORPHAN_GRACE,
+        TENANT_HEADER, DEFAULT_TENANT, TENANT_QUOTAS, TENANT_QUOTA_WINDOW, TOKEN_USAGE_PATH,
+        TOKEN_USAGE_SYNC_INTERVAL, USAGE_ADMIN_TENANTS,
+        SEARCH_INDEX_DIR, SEARCH_INDEX_FLUSH_MEETINGS, SEARCH_INDEX_MAX_SEGMENTS
     )
 except ImportError:
     # 如果没有配置文件，使用默认值
@@ -32,6 +61,84 @@ except ImportError:
     PORT = int(os.getenv('PORT', 8000))
     DEFAULT_MODEL = os.getenv('DEFAULT_MODEL', 'ERNIE-4.0-8K')
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    ANSWER_CACHE_ENABLED = os.getenv('ANSWER_CACHE_ENABLED', 'true').lower() == 'true'
+    ANSWER_CACHE_MAX_ENTRIES = int(os.getenv('ANSWER_CACHE_MAX_ENTRIES', 1024))
+    ANSWER_CACHE_TTL = int(os.getenv('ANSWER_CACHE_TTL', 3600))
+    MEETING_STORE_PATH = os.getenv('MEETING_STORE_PATH', 'data/meetings.db')
+    MEETING_STORE_WARM_LIMIT = int(os.getenv('MEETING_STORE_WARM_LIMIT', 200))
+    MAX_REQUEST_BODY_BYTES = int(os.getenv('MAX_REQUEST_BODY_BYTES', 64 * 1024 * 1024))
+    MAX_FORM_FIELD_BYTES = int(os.getenv('MAX_FORM_FIELD_BYTES', 4 * 1024 * 1024))
+    RESPONSE_COMPRESSION_ENABLED = os.getenv('RESPONSE_COMPRESSION_ENABLED', 'true').lower() == 'true'
+    RESPONSE_COMPRESSION_MIN_BYTES = int(os.getenv('RESPONSE_COMPRESSION_MIN_BYTES', 1024))
+    STREAM_COMPRESSION_ENABLED = os.getenv('STREAM_COMPRESSION_ENABLED', 'false').lower() == 'true'
+    CHAT_SUMMARY_MODE = os.getenv('CHAT_SUMMARY_MODE', 'background')
+    BACKGROUND_SUMMARY_WORKERS = int(os.getenv('BACKGROUND_SUMMARY_WORKERS', 2))
+    PRECOMPUTE_ENABLED = os.getenv('PRECOMPUTE_ENABLED', 'false').lower() == 'true'
+    PRECOMPUTE_QUESTIONS = os.getenv(
+        'PRECOMPUTE_QUESTIONS',
+        '本次会议有哪些行动项？|各项任务的负责人是谁？|会议做出了哪些决策？|还有哪些待解决的问题？'
+    )
+    PRECOMPUTE_MAX_LIVE_REQUESTS = int(os.getenv('PRECOMPUTE_MAX_LIVE_REQUESTS', 0))
+    CANCEL_CHECK_INTERVAL = float(os.getenv('CANCEL_CHECK_INTERVAL', 0.5))
+    PARTIAL_OUTPUT_POLICY = os.getenv('PARTIAL_OUTPUT_POLICY', 'drop')
+    SEGMENT_LEAF_SECONDS = int(os.getenv('SEGMENT_LEAF_SECONDS', 300))
+    SUMMARY_CHUNK_CHARS = int(os.getenv('SUMMARY_CHUNK_CHARS', 0))
+    TOPIC_BLOCK_CUES = int(os.getenv('TOPIC_BLOCK_CUES', 8))
+    TOPIC_MIN_SECONDS = int(os.getenv('TOPIC_MIN_SECONDS', 120))
+    EXTRACTIVE_MAX_SENTENCES = int(os.getenv('EXTRACTIVE_MAX_SENTENCES', 15))
+    SUMMARY_FALLBACK_ENABLED = os.getenv('SUMMARY_FALLBACK_ENABLED', 'true').lower() == 'true'
+    SUMMARY_LLM_DEADLINE = float(os.getenv('SUMMARY_LLM_DEADLINE', 60))
+    MODEL_ROUTING_RULES = os.getenv('MODEL_ROUTING_RULES', '')
+    ADMISSION_CONTROL_ENABLED = os.getenv('ADMISSION_CONTROL_ENABLED', 'true').lower() == 'true'
+    ADMISSION_MAX_CONCURRENT = int(os.getenv('ADMISSION_MAX_CONCURRENT', 8))
+    ADMISSION_SUMMARY_MAX_CONCURRENT = int(os.getenv('ADMISSION_SUMMARY_MAX_CONCURRENT', 6))
+    ADMISSION_CHAT_QUEUE = int(os.getenv('ADMISSION_CHAT_QUEUE', 16))
+    ADMISSION_SUMMARY_QUEUE = int(os.getenv('ADMISSION_SUMMARY_QUEUE', 8))
+    ADMISSION_CHAT_MAX_WAIT = float(os.getenv('ADMISSION_CHAT_MAX_WAIT', 10))
+    ADMISSION_SUMMARY_MAX_WAIT = float(os.getenv('ADMISSION_SUMMARY_MAX_WAIT', 5))
+    WS_MAX_SESSIONS = int(os.getenv('WS_MAX_SESSIONS', 16))
+    TRANSCRIPT_COMPRESSION_LEVEL = int(os.getenv('TRANSCRIPT_COMPRESSION_LEVEL', 6))
+    TRANSCRIPT_CACHE_SIZE = int(os.getenv('TRANSCRIPT_CACHE_SIZE', 4))
+    IDEMPOTENCY_WINDOW = float(os.getenv('IDEMPOTENCY_WINDOW', 300))
+    IDEMPOTENCY_KEY_HEADER = os.getenv('IDEMPOTENCY_KEY_HEADER', 'Idempotency-Key')
+    GENERATION_ORPHAN_GRACE = float(os.getenv('GENERATION_ORPHAN_GRACE', 10))
+    TENANT_HEADER = os.getenv('TENANT_HEADER', 'X-Tenant-ID')
+    DEFAULT_TENANT = os.getenv('DEFAULT_TENANT', 'default')
+    TENANT_QUOTAS = os.getenv('TENANT_QUOTAS', '')
+    TENANT_QUOTA_WINDOW = int(os.getenv('TENANT_QUOTA_WINDOW', 86400))
+    TOKEN_USAGE_PATH = os.getenv('TOKEN_USAGE_PATH', 'data/usage.db')
+    TOKEN_USAGE_SYNC_INTERVAL = float(os.getenv('TOKEN_USAGE_SYNC_INTERVAL', 1.0))
+    USAGE_ADMIN_TENANTS = os.getenv('USAGE_ADMIN_TENANTS', '')
+    SEARCH_INDEX_DIR = os.getenv('SEARCH_INDEX_DIR', 'data/search_index')
+    SEARCH_INDEX_FLUSH_MEETINGS = int(os.getenv('SEARCH_INDEX_FLUSH_MEETINGS', 20))
+    SEARCH_INDEX_MAX_SEGMENTS = int(os.getenv('SEARCH_INDEX_MAX_SEGMENTS', 8))
+
+from src.answer_cache import AnswerCache, normalize_question
+from src.meeting_store import MeetingStore
+from src.metrics import metrics
+from src.cancellation import DisconnectMonitor, GenerationCancelled
+from src.subtitles import Cue, is_webvtt, parse_srt_cues, parse_subtitle
+from src.segment_tree import SegmentSummaryTree
+from src.chunk_summary import carry_over, chunk_text, dump_chunks, load_chunks, plan_chunks
+from src.topic_segmentation import segment_topics
+from src.meeting_stats import compute_meeting_stats, render_stats_text
+from src.extractive_summary import extract_key_sentences, render_outline
+from src.model_routing import ModelRouter, estimate_tokens
+from src.llm_providers import ProviderRegistry, QianfanProvider, DeepSeekProvider, close_stream
+from src.search_index import SearchIndex
+from src.admission import AdmissionController, AdmissionRejected, PriorityClass
+from src.transcript_store import TranscriptStore
+from src.transcript_upload import ParsedTranscript, TranscriptUpload, read_multipart
+from src.generation import Generation, GenerationRegistry
+from src.token_usage import TokenUsageStore, TokenQuotaExceeded, parse_quotas, usage_scope
+from src.minutes import (
+    MINUTES_FIELDS, MinutesValidationError,
+    build_minutes_prompt, build_repair_prompt, parse_minutes, render_minutes_text
+)
+from src.compression import (
+    RequestBodyError, iter_request_body, load_json_body,
+    negotiate_encoding, compress_body, compress_stream
+)
 
 # 配置日志
 logging.basicConfig(
@@ -41,27 +148,168 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
+sock = Sock(app) if Sock is not None else None
+if sock is None:
+    logger.error("flask-sock is not installed, WebSocket chat endpoint /ws/meetings/<meeting_id>/chat is disabled")
 
 # 全局缓存：存储会议的分段总结
 meeting_cache: Dict[str, Dict[str, Any]] = {}
+# 保护会议缓存的查找与插入：从持久化存储恢复的会议只能放入一次
+meeting_cache_lock = threading.Lock()
+
+# 会议转写文本和字幕条目压缩保存，按内容去重，需要原文时才解压
+transcript_store = TranscriptStore(level=TRANSCRIPT_COMPRESSION_LEVEL, cache_size=TRANSCRIPT_CACHE_SIZE)
+
+# 问答缓存：会议内容哈希 + 归一化问题 -> 回答
+answer_cache = AnswerCache(max_entries=ANSWER_CACHE_MAX_ENTRIES, ttl=ANSWER_CACHE_TTL)
+
+# 后台纪要生成：问答时无缓存纪要则后台生成，同一会议同时只生成一次
+summary_executor = ThreadPoolExecutor(max_workers=BACKGROUND_SUMMARY_WORKERS, thread_name_prefix='background-summary')
+_pending_summaries: set = set()
+_pending_summaries_lock = threading.Lock()
+
+# 常见问题预计算：单线程执行，有进行中的请求时让出
+precompute_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='precompute')
+_pending_precompute: set = set()
+_pending_precompute_lock = threading.Lock()
+PRECOMPUTE_QUESTION_LIST = [q.strip() for q in PRECOMPUTE_QUESTIONS.split('|') if q.strip()]
+
+# 当前进程中进行中的纪要/问答请求数（流式请求在流结束后才计为完成）
+LIVE_REQUEST_ENDPOINTS = ('summary', 'chat')
+# 参与准入控制的接口 -> 优先级类别；分段总结会调用LLM，与纪要共用名额
+ADMISSION_ENDPOINT_CLASSES = {'summary': 'summary', 'chat': 'chat', 'range_summary': 'summary'}
+_live_requests = 0
+_live_requests_lock = threading.Lock()
+
+# 准入控制：限制每个进程同时处理的纪要/问答请求数，问答优先于纪要排队，过载时快速返回503
+admission_controller = AdmissionController(ADMISSION_MAX_CONCURRENT, [
+    PriorityClass('chat', 0, ADMISSION_CHAT_QUEUE, ADMISSION_CHAT_MAX_WAIT),
+    PriorityClass('summary', 1, ADMISSION_SUMMARY_QUEUE, ADMISSION_SUMMARY_MAX_WAIT,
+                  max_concurrent=ADMISSION_SUMMARY_MAX_CONCURRENT),
+])
+
+# 纪要/问答生成登记：相同 log_id 的重试复用已完成或进行中的生成
+generation_registry = GenerationRegistry(window=IDEMPOTENCY_WINDOW, grace=GENERATION_ORPHAN_GRACE)
+
+# WebSocket问答会话：每个会话在整个会话期间占用一个worker线程，限制同时保持的会话数
+_ws_sessions = 0
+_ws_sessions_lock = threading.Lock()
+
+# 带截止时间的纪要LLM调用在该线程池中执行，超时后请求线程立即返回抽取式摘要
+llm_call_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix='llm-call')
+
+# 会议数据持久化存储：重启后从磁盘恢复会议纪要和转写文本
+meeting_store: Optional[MeetingStore] = MeetingStore(MEETING_STORE_PATH) if MEETING_STORE_PATH else None
+
+
+def _warm_load_meetings() -> None:
+    """启动时在后台加载最近的会议，避免重启后集中重新生成纪要"""
+    try:
+        recent = meeting_store.load_recent(MEETING_STORE_WARM_LIMIT)
+        for meeting_id, data in recent:
+            cache_stored_meeting(meeting_id, data)
+        logger.info(f"Warm-loaded {len(recent)} meetings from {MEETING_STORE_PATH}")
+    except Exception as e:
+        logger.error(f"Failed to warm-load meetings: {str(e)}")
+
+
+if meeting_store is not None:
+    atexit.register(meeting_store.close)
+    if MEETING_STORE_WARM_LIMIT > 0:
+        threading.Thread(target=_warm_load_meetings, name='meeting-warm-load', daemon=True).start()
+
+# 租户token用量统计与配额：多个worker共享同一用量数据库
+try:
+    tenant_quotas = parse_quotas(TENANT_QUOTAS)
+except ValueError as e:
+    logger.error(f"Invalid TENANT_QUOTAS, token quotas are disabled: {str(e)}")
+    tenant_quotas = {}
+token_usage = TokenUsageStore(TOKEN_USAGE_PATH, TENANT_QUOTA_WINDOW, tenant_quotas, TOKEN_USAGE_SYNC_INTERVAL)
+usage_admin_tenants = {tenant.strip() for tenant in USAGE_ADMIN_TENANTS.split(',') if tenant.strip()}
+atexit.register(token_usage.close)
+
+# 跨会议检索索引：处理过的转写在后台建立索引
+search_index: Optional[SearchIndex] = SearchIndex(
+    SEARCH_INDEX_DIR,
+    flush_meetings=SEARCH_INDEX_FLUSH_MEETINGS,
+    max_segments=SEARCH_INDEX_MAX_SEGMENTS
+) if SEARCH_INDEX_DIR else None
+
+
+def _load_stored_cues(meeting_id: str) -> list:
+    """读取持久化存储中会议的字幕条目，用于补建检索索引，不放入转写存储"""
+    data = meeting_store.load(meeting_id) or {}
+    if 'cues_zlib' in data:
+        return [Cue(*cue) for cue in json.loads(zlib.decompress(stored_blob(data['cues_zlib'])))]
+    return [Cue(*cue) for cue in data.get('cues', [])]
+
+
+def _reindex_missing_meetings() -> None:
+    """启动时在后台补建检索索引：上次退出前仍在待写缓冲区、未写入磁盘的会议"""
+    try:
+        count = search_index.reindex_missing(meeting_store.meeting_ids(), _load_stored_cues)
+        if count:
+            logger.info(f"Re-indexed {count} stored meetings missing from the search index")
+    except Exception as e:
+        logger.error(f"Failed to re-index stored meetings: {str(e)}")
 
-# 初始化LLM客户端
-qianfan_client = None
-deepseek_client = None
-
-if LLM_PROVIDER == 'qianfan':
-    qianfan_client = qianfan.ChatCompletion()
-    logger.info(f"Using Qianfan LLM provider with model: {DEFAULT_MODEL}")
-elif LLM_PROVIDER == 'deepseek':
-    deepseek_client = OpenAI(
-        api_key=DEEPSEEK_API_KEY,
-        base_url=DEEPSEEK_BASE_URL
-    )
-    logger.info(f"Using DeepSeek LLM provider with model: {DEEPSEEK_MODEL}")
-else:
-    logger.warning(f"Unknown LLM_PROVIDER: {LLM_PROVIDER}, defaulting to qianfan")
-    qianfan_client = qianfan.ChatCompletion()
-    LLM_PROVIDER = 'qianfan'
+
+if search_index is not None:
+    atexit.register(search_index.close)
+    if meeting_store is not None:
+        threading.Thread(target=_reindex_missing_meetings, name='search-reindex', daemon=True).start()
+
+# LLM提供商：SDK在提供商被选用或首次调用时才导入
+provider_registry = ProviderRegistry()
+provider_registry.register('qianfan', lambda: QianfanProvider(DEFAULT_MODEL))
+provider_registry.register(
+    'deepseek',
+    lambda: DeepSeekProvider(DEEPSEEK_MODEL, api_key=DEEPSEEK_API_KEY, base_url=DEEPSEEK_BASE_URL)
+)
+
+
+def select_provider(name: str) -> str:
+    """
+    选择LLM提供商，未知的提供商回退到千帆
+    
+    Args:
+        name: 配置的提供商名称（LLM_PROVIDER）
+        
+    Returns:
+        实际使用的提供商名称
+    """
+    if name in provider_registry:
+        return name
+    logger.warning(f"Unknown LLM_PROVIDER: {name}, defaulting to qianfan")
+    return 'qianfan'
+
+
+def build_model_router(rules: str, default_model: str) -> ModelRouter:
+    """
+    构建模型路由，规则格式有误时只记录错误，所有请求使用默认模型
+    
+    Args:
+        rules: JSON格式的路由规则（MODEL_ROUTING_RULES）
+        default_model: 当前提供商的默认模型
+        
+    Returns:
+        模型路由
+    """
+    try:
+        return ModelRouter.from_json(rules, default_model)
+    except (TypeError, ValueError) as e:
+        logger.error(f"Invalid MODEL_ROUTING_RULES, using {default_model} for all requests: {str(e)}")
+        return ModelRouter([], default_model)
+
+
+ACTIVE_PROVIDER = select_provider(LLM_PROVIDER)
+provider_registry.get(ACTIVE_PROVIDER)
+logger.info(f"Using {ACTIVE_PROVIDER} LLM provider with model: "
+            f"{DEEPSEEK_MODEL if ACTIVE_PROVIDER == 'deepseek' else DEFAULT_MODEL}")
+
+# 模型分级路由：按请求类型和提示词长度选择模型，配置有误时只使用默认模型
+PROVIDER_DEFAULT_MODEL = provider_registry.get(ACTIVE_PROVIDER).default_model
+model_router = build_model_router(MODEL_ROUTING_RULES, PROVIDER_DEFAULT_MODEL)
 
 
 def parse_srt_text(srt_text: str) -> str:
@@ -69,11 +317,14 @@ def parse_srt_text(srt_text: str) -> str:
     解析SRT格式文本，提取纯文本内容
     
     Args:
-        srt_text: SRT格式的字幕文本
+        srt_text: SRT格式的字幕文本，也可以是WebVTT
         
     Returns:
         提取后的纯文本内容
     """
+    if is_webvtt(srt_text):
+        return '\n'.join(parse_subtitle(srt_text)[1])
+    
     lines = srt_text.strip().split('\n')
     text_content = []
     
@@ -86,198 +337,1511 @@ def parse_srt_text(srt_text: str) -> str:
     return '\n'.join(text_content)
 
 
-def call_llm_stream(messages: list) -> Generator[str, None, None]:
+def content_hash(text_content: str) -> str:
     """
-    统一的LLM流式调用接口
+    计算会议内容哈希，用于识别内容相同的会议文本
     
     Args:
-        messages: 消息列表
+        text_content: 会议文本内容
         
-    Yields:
-        生成的文本内容
+    Returns:
+        十六进制哈希字符串
     """
-    if LLM_PROVIDER == 'qianfan':
-        # 千帆API调用
-        resp = qianfan_client.do(
-            messages=messages,
-            stream=True,
-            model=DEFAULT_MODEL
-        )
-        
-        for chunk in resp:
-            if chunk.get('result'):
-                yield chunk['result']
-                
-    elif LLM_PROVIDER == 'deepseek':
-        # DeepSeek API调用（通过OpenAI接口）
-        response = deepseek_client.chat.completions.create(
-            model=DEEPSEEK_MODEL,
-            messages=messages,
-            stream=True
-        )
-        
-        for chunk in response:
-            if chunk.choices and chunk.choices[0].delta.content:
-                yield chunk.choices[0].delta.content
-
-
-def call_llm_non_stream(messages: list) -> str:
+    return hashlib.sha256(text_content.encode('utf-8')).hexdigest()
+
+
+# 会议缓存中压缩保存的转写字段：存储键字段 -> 持久化时的字段
+TRANSCRIPT_BLOB_FIELDS = {'text_key': 'text_zlib', 'cues_key': 'cues_zlib'}
+
+
+def stored_blob(blob: Any) -> bytes:
+    """持久化的压缩转写：单独保存的为bytes，旧数据中内嵌保存的为base64文本"""
+    return blob if isinstance(blob, bytes) else base64.b64decode(blob)
+
+
+def restore_meeting(data: Dict[str, Any]) -> Dict[str, Any]:
     """
-    统一的LLM非流式调用接口
+    将持久化存储中读取的会议数据转换为缓存格式，转写内容放入压缩存储
+    
+    兼容未压缩保存的旧数据（text_content / cues 字段）。
     
     Args:
-        messages: 消息列表
+        data: 持久化的会议数据
         
     Returns:
-        生成的完整文本
+        会议缓存数据
     """
-    if LLM_PROVIDER == 'qianfan':
-        # 千帆API调用
-        resp = qianfan_client.do(
-            messages=messages,
-            stream=False,
-            model=DEFAULT_MODEL
-        )
-        return resp.get('result', '')
-        
-    elif LLM_PROVIDER == 'deepseek':
-        # DeepSeek API调用（通过OpenAI接口）
-        response = deepseek_client.chat.completions.create(
-            model=DEEPSEEK_MODEL,
-            messages=messages,
-            stream=False
-        )
-        return response.choices[0].message.content if response.choices else ''
-    
-    return ''
+    for key_field, blob_field in TRANSCRIPT_BLOB_FIELDS.items():
+        if blob_field in data:
+            data[key_field] = transcript_store.put_compressed(stored_blob(data.pop(blob_field)))
+        else:
+            # 转写数据缺失时，存储键不指向任何内容
+            data.pop(key_field, None)
+    if 'text_content' in data:
+        text = data.pop('text_content')
+        data['text_key'] = transcript_store.put(text)
+        data['text_length'] = len(text)
+    if 'cues' in data:
+        data['cues_key'] = transcript_store.put(encode_cues(data.pop('cues')))
+    return data
 
 
-def generate_summary_stream(log_id: str, text_content: str, meeting_id: str) -> Generator[str, None, None]:
+def cache_stored_meeting(meeting_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
     """
-    生成会议纪要的流式响应
+    将持久化存储中读取的会议放入缓存
+    
+    会议已在缓存中时（如并发请求已先恢复）沿用缓存，不再恢复转写，避免转写存储中留下无人释放的引用。
     
     Args:
-        log_id: 日志ID
-        text_content: 会议文本内容
         meeting_id: 会议ID
+        data: 持久化的会议数据
         
-    Yields:
-        JSON格式的响应数据
+    Returns:
+        会议缓存数据
     """
-    try:
-        # 构建提示词
-        prompt = f"""请根据以下会议转写内容，生成一份完整的会议纪要。要求：
-1. 提取会议主题
-2. 总结主要讨论内容
-3. 列出关键决策和行动项
-4. 简洁清晰，重点突出
-
-会议转写内容：
-{text_content}
+    with meeting_cache_lock:
+        meeting = meeting_cache.get(meeting_id)
+        if meeting is None:
+            meeting = meeting_cache[meeting_id] = restore_meeting(data)
+    return meeting
 
-请生成会议纪要："""
 
-        messages = [{"role": "user", "content": prompt}]
+def persisted_transcripts(meeting: Dict[str, Any]) -> Dict[str, bytes]:
+    """
+    会议转写的压缩数据，转写变化时与会议数据一起写入持久化存储
+    
+    Args:
+        meeting: 会议缓存数据
         
-        # 调用LLM进行流式生成
-        full_answer = ""
-        for content in call_llm_stream(messages):
-            full_answer += content
-            
-            # 返回中间结果
-            yield json.dumps({
-                "status": 200,
-                "data": {
-                    "answer": content,
-                    "is_end": 0
-                }
-            }, ensure_ascii=False) + "\n"
+    Returns:
+        {持久化字段: 压缩数据}
+    """
+    return {blob_field: transcript_store.compressed(meeting[key_field])
+            for key_field, blob_field in TRANSCRIPT_BLOB_FIELDS.items() if key_field in meeting}
+
+
+def encode_cues(cues: list) -> str:
+    """
+    将字幕条目序列化为JSON文本，用于压缩保存
+    
+    Args:
+        cues: 字幕条目列表
         
-        # 缓存完整的会议纪要
-        if meeting_id not in meeting_cache:
-            meeting_cache[meeting_id] = {}
-        meeting_cache[meeting_id]['summary'] = full_answer
-        meeting_cache[meeting_id]['text_content'] = text_content
+    Returns:
+        JSON文本
+    """
+    return json.dumps([list(cue) for cue in cues], ensure_ascii=False, separators=(',', ':'))
+
+
+def get_text_content(meeting: Optional[Dict[str, Any]]) -> Optional[str]:
+    """
+    获取会议的转写文本，按需解压
+    
+    Args:
+        meeting: 会议缓存数据
         
-        # 返回结束标志
-        yield json.dumps({
-            "status": 200,
-            "data": {
-                "answer": "",
-                "is_end": 1
-            }
-        }, ensure_ascii=False) + "\n"
+    Returns:
+        会议文本，会议未上传转写时返回None
+    """
+    if not meeting or 'text_key' not in meeting:
+        return None
+    return transcript_store.get(meeting['text_key'])
+
+
+def transcript_usage(meeting: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    统计会议转写的存储占用
+    
+    Args:
+        meeting: 会议缓存数据
         
-        logger.info(f"[{log_id}] Summary generation completed for meeting {meeting_id}")
+    Returns:
+        原文字节数、以str保存时的内存、压缩后字节数、节省的字节数等
+    """
+    return transcript_store.usage([meeting[field] for field in TRANSCRIPT_BLOB_FIELDS if field in meeting])
+
+
+def get_meeting(meeting_id: str) -> Optional[Dict[str, Any]]:
+    """
+    获取会议缓存，内存未命中时从持久化存储按需加载
+    
+    Args:
+        meeting_id: 会议ID
         
-    except Exception as e:
-        logger.error(f"[{log_id}] Error generating summary: {str(e)}")
-        yield json.dumps({
-            "status": 500,
-            "data": {
-                "answer": f"生成会议纪要时出错: {str(e)}",
-                "is_end": 1
-            }
-        }, ensure_ascii=False) + "\n"
+    Returns:
+        会议缓存数据，不存在时返回None
+    """
+    meeting = meeting_cache.get(meeting_id)
+    if meeting is None and meeting_store is not None:
+        try:
+            data = meeting_store.load(meeting_id)
+            if data is not None:
+                meeting = cache_stored_meeting(meeting_id, data)
+        except Exception as e:
+            logger.error(f"Failed to load meeting {meeting_id} from store: {str(e)}")
+    return meeting
 
 
-def generate_summary_non_stream(log_id: str, text_content: str, meeting_id: str) -> Dict[str, Any]:
+def update_meeting(meeting_id: str, **fields) -> Dict[str, Any]:
     """
-    生成会议纪要的非流式响应
+    更新会议缓存，并异步写入持久化存储
+    
+    转写变化时整条保存会议数据和压缩转写（派生字段已被清除），其余更新只写入变化的字段。
     
     Args:
-        log_id: 日志ID
-        text_content: 会议文本内容
         meeting_id: 会议ID
+        **fields: 需要更新的字段
         
     Returns:
-        JSON格式的响应数据
+        更新后的会议缓存数据
     """
-    try:
-        prompt = f"""请根据以下会议转写内容，生成一份完整的会议纪要。要求：
-1. 提取会议主题
-2. 总结主要讨论内容
-3. 列出关键决策和行动项
-4. 简洁清晰，重点突出
+    meeting = get_meeting(meeting_id)
+    if meeting is None:
+        with meeting_cache_lock:
+            meeting = meeting_cache.setdefault(meeting_id, {})
+    meeting.update(fields)
+    if meeting_store is not None:
+        if any(field in fields for field in TRANSCRIPT_BLOB_FIELDS):
+            meeting_store.save(meeting_id, meeting, persisted_transcripts(meeting))
+        else:
+            meeting_store.update(meeting_id, fields)
+    return meeting
 
-会议转写内容：
-{text_content}
 
-请生成会议纪要："""
+# 转写文本变化后需要失效的派生字段
+TRANSCRIPT_DERIVED_FIELDS = ('summary', 'summary_partial', 'chunk_summaries', 'minutes', 'segment_tree', 'topics',
+                             'precomputed_answers', 'stats')
+
+
+def ingest_transcript(meeting_id: str, srt_text: str) -> Dict[str, Any]:
+    """
+    解析并保存会议转写，转写内容变化时清除基于旧内容生成的纪要等派生数据
+    
+    Args:
+        meeting_id: 会议ID
+        srt_text: SRT/WebVTT格式的会议转写文本
+        
+    Returns:
+        更新后的会议缓存数据
+    """
+    srt_hash = content_hash(srt_text)
+    meeting = get_meeting(meeting_id)
+    if meeting and meeting.get('srt_hash') == srt_hash and 'text_key' in meeting and 'cues_key' in meeting:
+        return meeting
+    
+    text_content = parse_srt_text(srt_text)
+    text_hash = content_hash(text_content)
+    cues = parse_srt_cues(srt_text)
+    return store_transcript(meeting_id, ParsedTranscript(
+        srt_hash=srt_hash,
+        text_key=transcript_store.put(text_content, text_hash),
+        text_length=len(text_content),
+        cues=cues,
+        cues_key=transcript_store.put(encode_cues(cues))
+    ))
 
-        messages = [{"role": "user", "content": prompt}]
+
+def store_transcript(meeting_id: str, transcript: ParsedTranscript) -> Dict[str, Any]:
+    """
+    将已解析的转写关联到会议，转写内容变化时清除基于旧内容生成的纪要等派生数据
+    
+    Args:
+        meeting_id: 会议ID
+        transcript: 已写入转写存储的解析结果，其存储引用转交给会议
         
-        # 调用LLM进行非流式生成
-        answer = call_llm_non_stream(messages)
+    Returns:
+        更新后的会议缓存数据
+    """
+    meeting = get_meeting(meeting_id)
+    if meeting and meeting.get('srt_hash') == transcript.srt_hash and 'text_key' in meeting and 'cues_key' in meeting:
+        transcript_store.release(transcript.text_key)
+        transcript_store.release(transcript.cues_key)
+        return meeting
+    
+    # 正文的存储键即正文的内容哈希
+    text_hash = transcript.text_key
+    fields: Dict[str, Any] = {}
+    if meeting and meeting.get('chunk_summaries'):
+        # 修正后的转写与旧转写逐条比较，未改动的块总结留给下次生成纪要时沿用
+        old_chunks = load_chunks(meeting['chunk_summaries'], SUMMARY_CHUNK_CHARS)
+        carried = carry_over([cue.text for cue in get_meeting_cues(meeting)], old_chunks,
+                             [cue.text for cue in transcript.cues])
+        fields['chunk_summaries'] = dump_chunks(carried, SUMMARY_CHUNK_CHARS)
+        logger.info(f"Transcript of meeting {meeting_id} changed, "
+                    f"{len(carried)}/{len(old_chunks)} chunk summaries still valid")
+    if meeting and meeting.get('content_hash') != text_hash:
+        for field in TRANSCRIPT_DERIVED_FIELDS:
+            meeting.pop(field, None)
+    if transcript.stats is not None:
+        # 上传时已随解析计算好的统计，生成纪要时不再遍历字幕条目
+        fields['stats'] = transcript.stats
+    if search_index is not None and (not meeting or meeting.get('content_hash') != text_hash):
+        search_index.add_meeting(meeting_id, transcript.cues)
+    if meeting:
+        for field in TRANSCRIPT_BLOB_FIELDS:
+            if field in meeting:
+                transcript_store.release(meeting[field])
+    meeting = update_meeting(
+        meeting_id,
+        srt_hash=transcript.srt_hash,
+        content_hash=text_hash,
+        text_key=transcript.text_key,
+        text_length=transcript.text_length,
+        cues_key=transcript.cues_key,
+        **fields
+    )
+    usage = transcript_usage(meeting)
+    logger.info(f"Stored transcript for meeting {meeting_id}: {usage['raw_bytes']} bytes, "
+                f"{usage['compressed_bytes']} compressed, {usage['saved_bytes']} bytes saved")
+    return meeting
+
+
+def get_meeting_cues(meeting: Optional[Dict[str, Any]]) -> list:
+    """
+    获取会议的字幕条目（带时间轴）
+    
+    Args:
+        meeting: 会议缓存数据
         
-        # 缓存完整的会议纪要
-        if meeting_id not in meeting_cache:
-            meeting_cache[meeting_id] = {}
-        meeting_cache[meeting_id]['summary'] = answer
-        meeting_cache[meeting_id]['text_content'] = text_content
+    Returns:
+        字幕条目列表，会议未保存时间轴时返回空列表
+    """
+    if not meeting or 'cues_key' not in meeting:
+        return []
+    return [Cue(*cue) for cue in json.loads(transcript_store.get(meeting['cues_key']))]
+
+
+def get_meeting_stats(meeting_id: str) -> Optional[Dict[str, Any]]:
+    """
+    获取会议的发言统计，首次计算后缓存
+    
+    Args:
+        meeting_id: 会议ID
+    
+    Returns:
+        统计数据，会议没有带时间轴的转写时返回None
+    """
+    meeting = get_meeting(meeting_id)
+    cues = get_meeting_cues(meeting)
+    if not cues:
+        return None
+    if 'stats' in meeting:
+        return meeting['stats']
+    
+    stats = compute_meeting_stats(cues)
+    update_meeting(meeting_id, stats=stats)
+    return stats
+
+
+def resolve_text_content(meeting_id: str, srt_text: Optional[str]) -> Optional[str]:
+    """
+    获取本次请求使用的会议文本
+    
+    请求携带的SRT与已保存的转写一致时直接复用解析结果，未携带SRT时使用已上传的转写。
+    
+    Args:
+        meeting_id: 会议ID
+        srt_text: 请求中的SRT文本，可为空
         
-        logger.info(f"[{log_id}] Summary generation completed for meeting {meeting_id}")
+    Returns:
+        会议文本内容，无可用转写时返回None
+    """
+    meeting = get_meeting(meeting_id)
+    if not srt_text:
+        return get_text_content(meeting)
+    if meeting and meeting.get('srt_hash') == content_hash(srt_text) and 'text_key' in meeting:
+        return get_text_content(meeting)
+    return parse_srt_text(srt_text)
+
+
+def error_response(status: int, message: str):
+    """
+    构造错误响应
+    
+    Args:
+        status: HTTP状态码
+        message: 错误信息
         
-        return {
-            "status": 200,
-            "data": {
-                "answer": answer,
-                "is_end": 1
-            }
+    Returns:
+        (响应体, 状态码)
+    """
+    return {
+        "status": status,
+        "data": {
+            "answer": message,
+            "is_end": 1
         }
+    }, status
+
+
+def load_request_json() -> Dict[str, Any]:
+    """
+    读取JSON请求体，支持 Content-Encoding 为 gzip/zstd 的压缩请求
+    
+    Returns:
+        解析后的请求参数
+    """
+    return load_json_body(
+        request.stream,
+        request.headers.get('Content-Encoding'),
+        MAX_REQUEST_BODY_BYTES
+    )
+
+
+def receive_transcript_upload() -> Tuple[Dict[str, str], Optional[ParsedTranscript]]:
+    """
+    流式接收上传的字幕文件（SRT/WebVTT），边接收边解析和压缩
+    
+    请求体为 multipart/form-data 时，文件在 file 字段，其余字段原样返回；否则整个请求体就是字幕文件。
+    
+    Returns:
+        (表单字段, 解析结果)，multipart请求没有文件时解析结果为None
+    """
+    start_time = time.perf_counter()
+    upload = TranscriptUpload(transcript_store, MAX_REQUEST_BODY_BYTES)
+    chunks = iter_request_body(request.stream, request.headers.get('Content-Encoding'), MAX_REQUEST_BODY_BYTES)
+    fields: Dict[str, str] = {}
+    if request.mimetype == 'multipart/form-data':
+        fields = read_multipart(chunks, request.mimetype_params.get('boundary'), upload.feed,
+                                'file', MAX_FORM_FIELD_BYTES)
+        if upload.format is None:
+            return fields, None
+    else:
+        for chunk in chunks:
+            upload.feed(chunk)
+    transcript = upload.finish()
+    elapsed_ms = (time.perf_counter() - start_time) * 1000
+    metrics.inc('transcript_uploads', format=upload.format)
+    metrics.observe('transcript_upload_ms', elapsed_ms)
+    logger.info(f"Received {upload.format} transcript upload: {upload.received} bytes, "
+                f"{len(transcript.cues)} cues in {elapsed_ms:.0f}ms")
+    return fields, transcript
+
+
+def load_request_data() -> Dict[str, Any]:
+    """
+    读取 /summary、/chat 的请求参数
+    
+    JSON请求体直接解析。multipart/form-data 请求的字幕文件边上传边解析，
+    上传结束时已保存为 meeting_id 对应会议的转写，之后的处理与只携带 meeting_id 的请求相同；
+    其余表单字段作为请求参数，messages 为JSON字符串，stream 等布尔参数为 true/false。
+    
+    Returns:
+        请求参数
+    """
+    if request.mimetype != 'multipart/form-data':
+        return load_request_json()
+    
+    fields, transcript = receive_transcript_upload()
+    data: Dict[str, Any] = dict(fields)
+    for field in ('stream', 'history_independent'):
+        if field in data:
+            data[field] = data[field].strip().lower() in ('true', '1', 'yes')
+    if 'messages' in data:
+        try:
+            data['messages'] = json.loads(data['messages'])
+        except ValueError:
+            raise RequestBodyError(400, "messages字段必须是JSON数组")
+    if transcript is not None:
+        if data.get('meeting_id'):
+            store_transcript(data['meeting_id'], transcript)
+        else:
+            # 缺少 meeting_id 时由调用方返回400，解析结果不再保留
+            transcript_store.release(transcript.text_key)
+            transcript_store.release(transcript.cues_key)
+    return data
+
+
+def stream_response(generator: Generator[str, None, None]) -> Response:
+    """
+    构造NDJSON流式响应，客户端声明支持时按帧压缩
+    
+    Args:
+        generator: 逐行生成JSON数据的生成器
         
-    except Exception as e:
-        logger.error(f"[{log_id}] Error generating summary: {str(e)}")
-        return {
-            "status": 500,
-            "data": {
-                "answer": f"生成会议纪要时出错: {str(e)}",
-                "is_end": 1
-            }
-        }
+    Returns:
+        Flask流式响应
+    """
+    headers = {}
+    body = stream_with_context(generator)
+    encoding = negotiate_encoding(request.headers.get('Accept-Encoding')) if STREAM_COMPRESSION_ENABLED else None
+    if encoding:
+        body = compress_stream(body, encoding)
+        headers['Content-Encoding'] = encoding
+        headers['Vary'] = 'Accept-Encoding'
+    return Response(body, content_type='application/json; charset=utf-8', headers=headers)
+
+
+@app.before_request
+def bind_usage_scope() -> None:
+    """本次请求产生的LLM用量计入请求头中的租户，URL中带会议ID时同时计入该会议"""
+    tenant = request.headers.get(TENANT_HEADER) or DEFAULT_TENANT
+    usage_scope.set((tenant, (request.view_args or {}).get('meeting_id')))
+
+
+def set_usage_meeting(meeting_id: str) -> None:
+    """
+    将本次请求（及其后台任务）产生的LLM用量计入指定会议
+    
+    Args:
+        meeting_id: 会议ID
+    """
+    usage_scope.set((usage_scope.get()[0], meeting_id))
+
+
+def submit_in_context(executor: ThreadPoolExecutor, fn: Callable, *args) -> Future:
+    """
+    在线程池中执行任务，并沿用当前的用量归属（租户、会议）
+    
+    Args:
+        executor: 线程池
+        fn: 任务函数
+        *args: 任务参数
+        
+    Returns:
+        Future
+    """
+    return executor.submit(contextvars.copy_context().run, fn, *args)
+
+
+def quota_exceeded_response(e: TokenQuotaExceeded):
+    """
+    构造租户配额用完的429响应
+    
+    Args:
+        e: 配额异常
+        
+    Returns:
+        (响应体, 状态码, 响应头)
+    """
+    metrics.inc('quota_rejections', tenant=e.tenant)
+    logger.warning(f"Tenant {e.tenant} exceeded token quota: {e.used}/{e.quota}, retry after {e.retry_after}s")
+    body, status = error_response(429, "当前租户的token配额已用完，请稍后重试")
+    return body, status, {'Retry-After': str(e.retry_after)}
+
+
+@app.before_request
+def track_live_request_start() -> None:
+    """统计进行中的纪要/问答请求，供后台预计算判断是否空闲"""
+    global _live_requests
+    if request.endpoint in LIVE_REQUEST_ENDPOINTS:
+        with _live_requests_lock:
+            _live_requests += 1
+        g.live_request = True
+
+
+@app.teardown_request
+def track_live_request_end(exc: Optional[BaseException]) -> None:
+    global _live_requests
+    if g.pop('live_request', False):
+        with _live_requests_lock:
+            _live_requests -= 1
+
+
+def record_admission_gauges() -> None:
+    """将准入控制的排队数和处理数写入指标"""
+    for class_name, depth in admission_controller.queue_depths().items():
+        metrics.set_gauge('admission_queue_depth', depth, type=class_name)
+    for class_name, active in admission_controller.active_counts().items():
+        metrics.set_gauge('admission_active', active, type=class_name)
+
+
+@app.before_request
+def admit_request():
+    """纪要/问答/分段总结请求排队等待处理名额，队列已满或排队超时时返回503"""
+    if not ADMISSION_CONTROL_ENABLED or request.endpoint not in ADMISSION_ENDPOINT_CLASSES:
+        return None
+    class_name = ADMISSION_ENDPOINT_CLASSES[request.endpoint]
+    # 排队期间指标中即可看到该请求
+    metrics.set_gauge('admission_queue_depth', admission_controller.queue_depths()[class_name] + 1, type=class_name)
+    try:
+        ticket = admission_controller.acquire(class_name)
+    except AdmissionRejected as e:
+        logger.warning(f"Rejected {class_name} request: {e.reason}, retry after {e.retry_after}s")
+        metrics.inc('admission_shed', type=class_name, reason=e.reason)
+        record_admission_gauges()
+        body, status = error_response(503, "服务繁忙，请稍后重试")
+        return body, status, {'Retry-After': str(e.retry_after)}
+    g.admission_ticket = ticket
+    metrics.observe('admission_wait_ms', ticket.wait_seconds * 1000, type=class_name)
+    record_admission_gauges()
+    return None
+
+
+@app.teardown_request
+def release_admission(exc: Optional[BaseException]) -> None:
+    # 流式请求在流结束后才归还名额
+    ticket = g.pop('admission_ticket', None)
+    if ticket is not None:
+        admission_controller.release(ticket)
+        record_admission_gauges()
+
+
+def live_request_count() -> int:
+    """
+    获取当前进程中进行中的纪要/问答请求数
+
+    Returns:
+        请求数
+    """
+    with _live_requests_lock:
+        return _live_requests
+
+
+@app.after_request
+def compress_response(response: Response) -> Response:
+    """按 Accept-Encoding 压缩较大的非流式响应"""
+    if (not RESPONSE_COMPRESSION_ENABLED or response.is_streamed
+            or response.direct_passthrough or 'Content-Encoding' in response.headers
+            or response.status_code < 200 or response.status_code == 204):
+        return response
+    encoding = negotiate_encoding(request.headers.get('Accept-Encoding'))
+    if not encoding:
+        return response
+    data = response.get_data()
+    if len(data) < RESPONSE_COMPRESSION_MIN_BYTES:
+        return response
+    response.set_data(compress_body(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def format_stream_chunk(answer: str, is_end: int, status: int = 200, **extra) -> str:
+    """
+    构造一行流式响应数据
+    
+    Args:
+        answer: 本次返回的文本片段
+        is_end: 是否结束（0/1）
+        status: 状态码
+        **extra: 附加到 data 中的其他字段
+        
+    Returns:
+        以换行结尾的JSON字符串
+    """
+    data = {
+        "answer": answer,
+        "is_end": is_end
+    }
+    data.update(extra)
+    return json.dumps({
+        "status": status,
+        "data": data
+    }, ensure_ascii=False) + "\n"
+
+
+def get_cacheable_question(messages: list, history_independent: bool = False) -> str:
+    """
+    获取可参与问答缓存的问题
+    
+    仅单轮问答，或调用方声明与对话历史无关的最后一个问题可以缓存。
+    
+    Args:
+        messages: 对话历史
+        history_independent: 最后一个问题是否与历史无关
+        
+    Returns:
+        可缓存的问题文本，不可缓存时返回空字符串
+    """
+    if not ANSWER_CACHE_ENABLED or not messages:
+        return ''
+    last = messages[-1]
+    if not isinstance(last, dict) or last.get('role') != 'user':
+        return ''
+    if len(messages) > 1 and not history_independent:
+        return ''
+    return last.get('content') or ''
+
+
+def select_model(request_type: str, messages: list) -> str:
+    """
+    按路由规则为本次LLM调用选择模型，并记录指标
+    
+    Args:
+        request_type: 请求类型（summary / minutes / chat / segment）
+        messages: 发送给LLM的消息列表
+    
+    Returns:
+        模型名称
+    """
+    prompt_tokens = estimate_tokens(messages)
+    model = model_router.select(request_type, prompt_tokens)
+    metrics.inc('llm_requests', type=request_type, model=model)
+    metrics.observe('llm_prompt_tokens', prompt_tokens, model=model)
+    return model
+
+
+def record_llm_usage(messages: list, output: str, usage: Dict[str, int]) -> None:
+    """
+    记录一次LLM调用的token用量，计入当前租户和会议，提供商未返回用量时使用估算值
+    
+    Args:
+        messages: 消息列表
+        output: 生成的文本
+        usage: 提供商返回的用量
+    """
+    tenant, meeting_id = usage_scope.get()
+    estimated = 'prompt_tokens' not in usage or 'completion_tokens' not in usage
+    prompt_tokens = usage['prompt_tokens'] if 'prompt_tokens' in usage else estimate_tokens(messages)
+    completion_tokens = (usage['completion_tokens'] if 'completion_tokens' in usage
+                         else estimate_tokens([{"content": output}]))
+    metrics.inc('llm_tokens', prompt_tokens, tenant=tenant, kind='prompt')
+    metrics.inc('llm_tokens', completion_tokens, tenant=tenant, kind='completion')
+    if estimated:
+        metrics.inc('llm_token_estimates', tenant=tenant)
+    try:
+        token_usage.record(tenant, meeting_id, prompt_tokens, completion_tokens)
+    except Exception as e:
+        logger.error(f"Failed to record token usage for tenant {tenant}: {str(e)}")
+
+
+def call_llm_stream(messages: list, model: Optional[str] = None) -> Generator[str, None, None]:
+    """
+    统一的LLM流式调用接口，首次迭代时才发起请求
+    
+    Args:
+        messages: 消息列表
+        model: 模型名称，为空时使用当前提供商的默认模型
+        
+    Returns:
+        逐个产出生成文本的生成器
+        
+    Raises:
+        TokenQuotaExceeded: 当前租户的token配额已用完
+    """
+    token_usage.check(usage_scope.get()[0])
+    return _stream_with_usage(messages, model)
+
+
+def _stream_with_usage(messages: list, model: Optional[str]) -> Generator[str, None, None]:
+    usage: Dict[str, int] = {}
+    output = []
+    try:
+        for content in provider_registry.get(ACTIVE_PROVIDER).stream(messages, model, usage):
+            output.append(content)
+            yield content
+    finally:
+        # 提前结束（取消、出错）的调用同样计入已消耗的token
+        if usage or output:
+            record_llm_usage(messages, ''.join(output), usage)
+
+
+def call_llm_non_stream(messages: list, model: Optional[str] = None) -> str:
+    """
+    统一的LLM非流式调用接口
+    
+    Args:
+        messages: 消息列表
+        model: 模型名称，为空时使用当前提供商的默认模型
+        
+    Returns:
+        生成的完整文本
+        
+    Raises:
+        TokenQuotaExceeded: 当前租户的token配额已用完
+    """
+    token_usage.check(usage_scope.get()[0])
+    usage: Dict[str, int] = {}
+    answer = provider_registry.get(ACTIVE_PROVIDER).complete(messages, model, usage)
+    record_llm_usage(messages, answer, usage)
+    return answer
+
+
+def handle_cancelled_generation(log_id: str, meeting_id: str, kind: str, partial_output: str) -> None:
+    """
+    处理被取消的流式生成：记录指标，并按配置决定是否缓存已生成的部分纪要
+    
+    Args:
+        log_id: 日志ID
+        meeting_id: 会议ID
+        kind: 生成类型，summary 或 chat
+        partial_output: 取消前已生成的内容
+    """
+    metrics.inc('generations_cancelled', type=kind)
+    logger.info(f"[{log_id}] {kind} generation cancelled for meeting {meeting_id} "
+                f"after {len(partial_output)} chars")
+    
+    if kind != 'summary' or not partial_output or PARTIAL_OUTPUT_POLICY != 'cache':
+        return
+    meeting = get_meeting(meeting_id)
+    # 不覆盖已有的完整纪要
+    if meeting and meeting.get('summary') and not meeting.get('summary_partial'):
+        return
+    update_meeting(meeting_id, summary=partial_output, summary_partial=True)
+    logger.info(f"[{log_id}] Cached partial summary for meeting {meeting_id}")
+
+
+def _summary_stats_section(meeting_id: str) -> str:
+    stats = get_meeting_stats(meeting_id)
+    if not stats:
+        return ''
+    return f"""
+会议统计（本地根据时间轴计算，涉及时长、发言次数等数字时以此为准）：
+{render_stats_text(stats)}
+"""
+
+
+def build_summary_prompt(text_content: str, meeting_id: str) -> str:
+    """
+    构建会议纪要提示词，会议有带时间轴的转写时附带本地计算的发言统计
+    
+    Args:
+        text_content: 会议文本内容
+        meeting_id: 会议ID
+    
+    Returns:
+        提示词
+    """
+    return f"""请根据以下会议转写内容，生成一份完整的会议纪要。要求：
+1. 提取会议主题
+2. 总结主要讨论内容
+3. 列出关键决策和行动项
+4. 简洁清晰，重点突出
+{_summary_stats_section(meeting_id)}
+会议转写内容：
+{text_content}
+
+请生成会议纪要："""
+
+
+def build_chunked_summary_prompt(parts: list, meeting_id: str) -> str:
+    """
+    构建分块纪要的合并提示词
+    
+    Args:
+        parts: 按时间顺序排列的 (时间范围描述, 块总结)
+        meeting_id: 会议ID
+    
+    Returns:
+        提示词
+    """
+    joined = '\n\n'.join(f"第{i + 1}部分（{span}）：\n{summary}" for i, (span, summary) in enumerate(parts))
+    return f"""以下是同一会议按时间顺序分段的总结，请据此生成一份完整的会议纪要。要求：
+1. 提取会议主题
+2. 总结主要讨论内容
+3. 列出关键决策和行动项
+4. 简洁清晰，重点突出
+{_summary_stats_section(meeting_id)}
+分段总结：
+{joined}
+
+请生成会议纪要："""
+
+
+def save_chunk_summaries(meeting_id: str, text_hash: str, chunks: list) -> None:
+    """
+    缓存块总结，会议转写已被替换时不保存
+    
+    Args:
+        meeting_id: 会议ID
+        text_hash: 生成块总结时的会议内容哈希
+        chunks: 已生成总结的块
+    """
+    meeting = get_meeting(meeting_id)
+    if meeting and meeting.get('content_hash') == text_hash:
+        update_meeting(meeting_id, chunk_summaries=dump_chunks(chunks, SUMMARY_CHUNK_CHARS))
+
+
+def summarize_chunks(log_id: str, text_content: str, meeting_id: str,
+                     timeout: Optional[float] = None) -> Optional[Tuple[list, Dict[str, int]]]:
+    """
+    分块总结会议并构建合并提示词，沿用缓存中仍然有效的块总结
+    
+    需要生成的块并行调用LLM；已生成的块总结在失败或超时时也会缓存，供下次请求沿用。
+    
+    Args:
+        log_id: 日志ID
+        text_content: 会议文本内容
+        meeting_id: 会议ID
+        timeout: 等待全部块总结的最长时间（秒），超时抛出 FutureTimeoutError
+    
+    Returns:
+        (合并提示词的消息列表, {"total": 块数, "reused": 沿用的块数})；
+        转写不超过 SUMMARY_CHUNK_CHARS 字或没有带时间轴的字幕时返回None，由调用方整体生成
+    """
+    if SUMMARY_CHUNK_CHARS <= 0 or len(text_content) <= SUMMARY_CHUNK_CHARS:
+        return None
+    meeting = get_meeting(meeting_id)
+    cues = get_meeting_cues(meeting)
+    if not cues:
+        return None
+    
+    chunks = plan_chunks(cues, load_chunks(meeting.get('chunk_summaries'), SUMMARY_CHUNK_CHARS), SUMMARY_CHUNK_CHARS)
+    pending = {
+        index: submit_in_context(llm_call_executor, _summarize_segment, *chunk_text(cues, chunk))
+        for index, chunk in enumerate(chunks) if chunk.summary is None
+    }
+    deadline = None if timeout is None else time.monotonic() + timeout
+    try:
+        for index, future in pending.items():
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            chunks[index] = chunks[index]._replace(summary=future.result(timeout=remaining))
+    finally:
+        for future in pending.values():
+            future.cancel()
+        if pending:
+            save_chunk_summaries(meeting_id, content_hash(text_content),
+                                 [chunk for chunk in chunks if chunk.summary is not None])
+    
+    chunk_stats = {"total": len(chunks), "reused": len(chunks) - len(pending)}
+    metrics.inc('summary_chunks_generated', len(pending))
+    metrics.inc('summary_chunks_reused', chunk_stats['reused'])
+    logger.info(f"[{log_id}] Summarized meeting {meeting_id} in {chunk_stats['total']} chunks, "
+                f"{chunk_stats['reused']} reused")
+    parts = [(chunk_text(cues, chunk)[1], chunk.summary) for chunk in chunks]
+    return [{"role": "user", "content": build_chunked_summary_prompt(parts, meeting_id)}], chunk_stats
+
+
+def build_summary_messages(log_id: str, text_content: str, meeting_id: str,
+                           fallback: bool) -> Tuple[list, Optional[Dict[str, int]]]:
+    """
+    构建会议纪要的LLM消息：长会议分块总结后合并，否则整体生成
+    
+    Args:
+        log_id: 日志ID
+        text_content: 会议文本内容
+        meeting_id: 会议ID
+        fallback: 是否在 SUMMARY_LLM_DEADLINE 内完成块总结（超时由调用方返回抽取式摘要）
+    
+    Returns:
+        (消息列表, 分块统计)，整体生成时分块统计为None
+    """
+    timeout = SUMMARY_LLM_DEADLINE if fallback and SUMMARY_LLM_DEADLINE > 0 else None
+    chunked = summarize_chunks(log_id, text_content, meeting_id, timeout)
+    if chunked is not None:
+        return chunked
+    return [{"role": "user", "content": build_summary_prompt(text_content, meeting_id)}], None
+
+
+def build_extractive_summary(meeting_id: str, text_content: str) -> Dict[str, Any]:
+    """
+    本地生成抽取式摘要（关键句提纲），不调用LLM
+    
+    会议已有话题切分结果时按话题分组，否则按时间顺序列出关键句。
+    
+    Args:
+        meeting_id: 会议ID
+        text_content: 会议文本内容，会议没有带时间轴的转写时按行抽取
+    
+    Returns:
+        包含 answer（提纲文本）和 sentences（关键句）的字典
+    """
+    start_time = time.perf_counter()
+    meeting = get_meeting(meeting_id)
+    cues = get_meeting_cues(meeting)
+    if not cues:
+        cues = [Cue(0, 0, line) for line in text_content.splitlines() if line.strip()]
+    sentences = extract_key_sentences(cues, max_sentences=EXTRACTIVE_MAX_SENTENCES)
+    topics = meeting.get('topics') if meeting else None
+    metrics.observe('extractive_summary_ms', (time.perf_counter() - start_time) * 1000)
+    return {
+        "answer": render_outline(sentences, topics or ()),
+        "sentences": sentences
+    }
+
+
+def fallback_reason(error: Exception) -> str:
+    """
+    LLM调用失败的兜底原因
+    
+    Args:
+        error: 异常
+    
+    Returns:
+        timeout（超过截止时间）、quota（租户配额用完）或 error
+    """
+    if isinstance(error, FutureTimeoutError):
+        return 'timeout'
+    return 'quota' if isinstance(error, TokenQuotaExceeded) else 'error'
+
+
+def _cache_late_summary(log_id: str, meeting_id: str, text_hash: str, future: Future) -> None:
+    # 超时后LLM仍可能完成，此时缓存结果供后续请求使用
+    if future.cancelled() or future.exception() is not None:
+        return
+    meeting = get_meeting(meeting_id)
+    if meeting and meeting.get('content_hash') == text_hash and not meeting.get('summary'):
+        update_meeting(meeting_id, summary=future.result(), summary_partial=False)
+        logger.info(f"[{log_id}] Cached late LLM summary for meeting {meeting_id}")
+
+
+def call_llm_with_deadline(log_id: str, meeting_id: str, text_content: str, messages: list, model: str) -> str:
+    """
+    在截止时间内调用LLM生成纪要，超时抛出 FutureTimeoutError
+    
+    超时后LLM调用继续在后台完成，结果仍会缓存为会议纪要。
+    
+    Args:
+        log_id: 日志ID
+        meeting_id: 会议ID
+        text_content: 会议文本内容
+        messages: 消息列表
+        model: 模型名称
+    
+    Returns:
+        生成的文本
+    """
+    if SUMMARY_LLM_DEADLINE <= 0:
+        return call_llm_non_stream(messages, model)
+    future = submit_in_context(llm_call_executor, call_llm_non_stream, messages, model)
+    try:
+        return future.result(timeout=SUMMARY_LLM_DEADLINE)
+    except FutureTimeoutError:
+        text_hash = content_hash(text_content)
+        future.add_done_callback(lambda done: _cache_late_summary(log_id, meeting_id, text_hash, done))
+        raise
+
+
+def stream_with_first_chunk_deadline(stream: Generator[str, None, None]) -> Generator[str, None, None]:
+    """
+    要求流式LLM在截止时间内返回首个片段，超时抛出 FutureTimeoutError
+    
+    Args:
+        stream: call_llm_stream 返回的生成器（首次迭代时才发起请求）
+    
+    Yields:
+        生成的文本内容
+    """
+    if SUMMARY_LLM_DEADLINE <= 0:
+        yield from stream
+        return
+    future = submit_in_context(llm_call_executor, next, stream, None)
+    try:
+        first = future.result(timeout=SUMMARY_LLM_DEADLINE)
+    except FutureTimeoutError:
+        # 生成器仍在其他线程中执行，等其返回后再关闭；关闭时记录的用量仍计入当前租户和会议
+        context = contextvars.copy_context()
+        future.add_done_callback(lambda done: context.run(close_stream, stream))
+        raise
+    try:
+        if first is None:
+            return
+        yield first
+        yield from stream
+    finally:
+        close_stream(stream)
+
+
+def generate_summary_stream(log_id: str, text_content: str, meeting_id: str,
+                            cancel_check: Optional[Callable[[], bool]] = None) -> Generator[str, None, None]:
+    """
+    生成会议纪要的流式响应
+    
+    LLM在输出任何内容之前失败或超过截止时间时，返回抽取式摘要。
+    
+    Args:
+        log_id: 日志ID
+        text_content: 会议文本内容
+        meeting_id: 会议ID
+        cancel_check: 返回True时中止生成（如客户端已断开）
+        
+    Yields:
+        JSON格式的响应数据
+    """
+    full_answer = ""
+    completed = False
+    llm_stream = None
+    try:
+        # 构建提示词，长会议先分块总结
+        messages, chunk_stats = build_summary_messages(log_id, text_content, meeting_id, SUMMARY_FALLBACK_ENABLED)
+        extra = {'chunks': chunk_stats} if chunk_stats else {}
+        
+        # 调用LLM进行流式生成
+        model = select_model('summary', messages)
+        llm_stream = call_llm_stream(messages, model)
+        if SUMMARY_FALLBACK_ENABLED:
+            llm_stream = stream_with_first_chunk_deadline(llm_stream)
+        for content in llm_stream:
+            full_answer += content
+            if cancel_check is not None and cancel_check():
+                raise GenerationCancelled()
+            
+            # 返回中间结果
+            yield format_stream_chunk(content, 0)
+        
+        # 缓存完整的会议纪要
+        update_meeting(meeting_id, summary=full_answer, summary_partial=False)
+        completed = True
+        schedule_precompute(log_id, text_content, meeting_id)
+        
+        # 返回结束标志
+        yield format_stream_chunk("", 1, model=model, **extra)
+        
+        logger.info(f"[{log_id}] Summary generation completed for meeting {meeting_id} with model {model}")
+        
+    except (GeneratorExit, GenerationCancelled):
+        if not completed:
+            handle_cancelled_generation(log_id, meeting_id, 'summary', full_answer)
+        
+    except Exception as e:
+        if SUMMARY_FALLBACK_ENABLED and not full_answer:
+            reason = fallback_reason(e)
+            logger.warning(f"[{log_id}] LLM summary failed ({reason}: {str(e)}), falling back to extractive summary")
+            metrics.inc('summary_fallbacks', reason=reason)
+            extractive = build_extractive_summary(meeting_id, text_content)
+            yield format_stream_chunk(extractive['answer'], 0, mode='extractive', fallback=reason)
+            yield format_stream_chunk("", 1, mode='extractive', fallback=reason)
+            return
+        logger.error(f"[{log_id}] Error generating summary: {str(e)}")
+        yield format_stream_chunk(f"生成会议纪要时出错: {str(e)}", 1, status=500)
+        
+    finally:
+        if llm_stream is not None:
+            llm_stream.close()
+
+
+def generate_summary_non_stream(log_id: str, text_content: str, meeting_id: str,
+                                fallback: Optional[bool] = None) -> Dict[str, Any]:
+    """
+    生成会议纪要的非流式响应
+    
+    Args:
+        log_id: 日志ID
+        text_content: 会议文本内容
+        meeting_id: 会议ID
+        fallback: LLM失败或超过截止时间时是否返回抽取式摘要，默认按 SUMMARY_FALLBACK_ENABLED
+    
+    Returns:
+        JSON格式的响应数据
+    """
+    if fallback is None:
+        fallback = SUMMARY_FALLBACK_ENABLED
+    try:
+        messages, chunk_stats = build_summary_messages(log_id, text_content, meeting_id, fallback)
+        
+        # 调用LLM进行非流式生成
+        model = select_model('summary', messages)
+        if fallback:
+            answer = call_llm_with_deadline(log_id, meeting_id, text_content, messages, model)
+        else:
+            answer = call_llm_non_stream(messages, model)
+        
+        # 缓存完整的会议纪要
+        update_meeting(meeting_id, summary=answer, summary_partial=False)
+        schedule_precompute(log_id, text_content, meeting_id)
+        
+        logger.info(f"[{log_id}] Summary generation completed for meeting {meeting_id} with model {model}")
+        
+        data = {
+            "answer": answer,
+            "is_end": 1,
+            "model": model
+        }
+        if chunk_stats:
+            data["chunks"] = chunk_stats
+        return {
+            "status": 200,
+            "data": data
+        }
+        
+    except Exception as e:
+        if fallback:
+            reason = fallback_reason(e)
+            logger.warning(f"[{log_id}] LLM summary failed ({reason}: {str(e)}), falling back to extractive summary")
+            metrics.inc('summary_fallbacks', reason=reason)
+            return {
+                "status": 200,
+                "data": {
+                    "answer": build_extractive_summary(meeting_id, text_content)['answer'],
+                    "is_end": 1,
+                    "mode": "extractive",
+                    "fallback": reason
+                }
+            }
+        logger.error(f"[{log_id}] Error generating summary: {str(e)}")
+        return {
+            "status": 500,
+            "data": {
+                "answer": f"生成会议纪要时出错: {str(e)}",
+                "is_end": 1
+            }
+        }
+
+
+def finalize_minutes(log_id: str, meeting_id: str, raw_output: str, model: Optional[str] = None) -> Dict[str, Any]:
+    """
+    校验LLM输出的结构化纪要并缓存，校验失败时请求LLM修复一次
+    
+    Args:
+        log_id: 日志ID
+        meeting_id: 会议ID
+        raw_output: LLM输出文本
+        model: 修复时使用的模型
+        
+    Returns:
+        规范化后的结构化纪要
+    """
+    try:
+        minutes = parse_minutes(raw_output)
+    except MinutesValidationError as e:
+        logger.warning(f"[{log_id}] Invalid minutes JSON for meeting {meeting_id}: {str(e)}, retrying once")
+        metrics.inc('minutes_repairs')
+        repaired = call_llm_non_stream([{"role": "user", "content": build_repair_prompt(raw_output, str(e))}], model)
+        minutes = parse_minutes(repaired)
+    
+    # 同时缓存文本形式的纪要，供问答使用
+    update_meeting(meeting_id, minutes=minutes, summary=render_minutes_text(minutes), summary_partial=False)
+    return minutes
+
+
+def generate_minutes_stream(log_id: str, text_content: str, meeting_id: str,
+                            cancel_check: Optional[Callable[[], bool]] = None) -> Generator[str, None, None]:
+    """
+    生成结构化会议纪要的流式响应
+    
+    流式返回LLM输出的JSON片段，结束帧的 data.minutes 中携带校验后的结构化纪要。
+    
+    Args:
+        log_id: 日志ID
+        text_content: 会议文本内容
+        meeting_id: 会议ID
+        cancel_check: 返回True时中止生成（如客户端已断开）
+        
+    Yields:
+        JSON格式的响应数据
+    """
+    full_answer = ""
+    completed = False
+    llm_stream = None
+    try:
+        messages = [{"role": "user", "content": build_minutes_prompt(text_content)}]
+        
+        # 调用LLM进行流式生成
+        model = select_model('minutes', messages)
+        llm_stream = call_llm_stream(messages, model)
+        for content in llm_stream:
+            full_answer += content
+            if cancel_check is not None and cancel_check():
+                raise GenerationCancelled()
+            yield format_stream_chunk(content, 0)
+        
+        minutes = finalize_minutes(log_id, meeting_id, full_answer, model)
+        completed = True
+        
+        # 返回结束标志和结构化纪要
+        yield format_stream_chunk("", 1, minutes=minutes, model=model)
+        
+        logger.info(f"[{log_id}] Minutes generation completed for meeting {meeting_id}")
+        
+    except (GeneratorExit, GenerationCancelled):
+        if not completed:
+            handle_cancelled_generation(log_id, meeting_id, 'minutes', full_answer)
+        
+    except MinutesValidationError as e:
+        logger.error(f"[{log_id}] Invalid minutes JSON for meeting {meeting_id}: {str(e)}")
+        yield format_stream_chunk(f"结构化会议纪要格式校验失败: {str(e)}", 1, status=502)
+        
+    except Exception as e:
+        logger.error(f"[{log_id}] Error generating minutes: {str(e)}")
+        yield format_stream_chunk(f"生成会议纪要时出错: {str(e)}", 1, status=500)
+        
+    finally:
+        if llm_stream is not None:
+            llm_stream.close()
+
+
+def generate_minutes_non_stream(log_id: str, text_content: str, meeting_id: str) -> Dict[str, Any]:
+    """
+    生成结构化会议纪要的非流式响应
+    
+    Args:
+        log_id: 日志ID
+        text_content: 会议文本内容
+        meeting_id: 会议ID
+        
+    Returns:
+        JSON格式的响应数据，data.minutes 为结构化纪要
+    """
+    try:
+        messages = [{"role": "user", "content": build_minutes_prompt(text_content)}]
+        
+        # 调用LLM进行非流式生成
+        model = select_model('minutes', messages)
+        minutes = finalize_minutes(log_id, meeting_id, call_llm_non_stream(messages, model), model)
+        
+        logger.info(f"[{log_id}] Minutes generation completed for meeting {meeting_id}")
+        
+        return {
+            "status": 200,
+            "data": {
+                "answer": json.dumps(minutes, ensure_ascii=False),
+                "minutes": minutes,
+                "is_end": 1,
+                "model": model
+            }
+        }
+        
+    except MinutesValidationError as e:
+        logger.error(f"[{log_id}] Invalid minutes JSON for meeting {meeting_id}: {str(e)}")
+        return {
+            "status": 502,
+            "data": {
+                "answer": f"结构化会议纪要格式校验失败: {str(e)}",
+                "is_end": 1
+            }
+        }
+        
+    except Exception as e:
+        logger.error(f"[{log_id}] Error generating minutes: {str(e)}")
+        return {
+            "status": 500,
+            "data": {
+                "answer": f"生成会议纪要时出错: {str(e)}",
+                "is_end": 1
+            }
+        }
+
+
+def _summarize_segment(text: str, span: str) -> str:
+    prompt = f"""请用简洁的几句话总结以下会议片段（{span}）的要点，包括讨论内容、决策和行动项：
+
+{text}
+
+片段总结："""
+    messages = [{"role": "user", "content": prompt}]
+    return call_llm_non_stream(messages, select_model('segment', messages))
+
+
+def _merge_segment_summaries(parts: list, span: str) -> str:
+    joined = '\n\n'.join(f"第{i + 1}部分：\n{part}" for i, part in enumerate(parts))
+    prompt = f"""以下是同一会议中连续时间段（{span}）按时间顺序排列的分段总结，请合并为一段连贯、简洁的总结，保留关键决策和行动项：
+
+{joined}
+
+合并后的总结："""
+    messages = [{"role": "user", "content": prompt}]
+    return call_llm_non_stream(messages, select_model('segment', messages))
+
+
+def get_segment_tree(meeting_id: str) -> Optional[SegmentSummaryTree]:
+    """
+    获取会议的分段总结树，已缓存的节点总结会被复用
+    
+    Args:
+        meeting_id: 会议ID
+        
+    Returns:
+        分段总结树，会议没有带时间轴的转写时返回None
+    """
+    meeting = get_meeting(meeting_id)
+    cues = get_meeting_cues(meeting)
+    if not cues:
+        return None
+    cached = meeting.get('segment_tree') or {}
+    nodes = cached.get('nodes') if cached.get('leaf_seconds') == SEGMENT_LEAF_SECONDS else None
+    return SegmentSummaryTree(
+        cues, SEGMENT_LEAF_SECONDS, _summarize_segment, _merge_segment_summaries, nodes
+    )
+
+
+def save_segment_tree(meeting_id: str, tree: SegmentSummaryTree) -> None:
+    """
+    缓存分段总结树的节点总结
+    
+    Args:
+        meeting_id: 会议ID
+        tree: 分段总结树
+    """
+    update_meeting(meeting_id, segment_tree={
+        "leaf_seconds": SEGMENT_LEAF_SECONDS,
+        "nodes": dict(tree.nodes)
+    })
+
+
+def _build_segment_tree_in_background(meeting_id: str) -> None:
+    try:
+        tree = get_segment_tree(meeting_id)
+        if tree is None:
+            return
+        start_time = time.perf_counter()
+        tree.build()
+        save_segment_tree(meeting_id, tree)
+        metrics.inc('segment_tree_llm_calls', tree.llm_calls)
+        logger.info(f"Segment tree built for meeting {meeting_id}: {tree.leaf_count} leaves, "
+                    f"{tree.llm_calls} LLM calls, {time.perf_counter() - start_time:.1f}s")
+    except Exception as e:
+        logger.error(f"Error building segment tree for meeting {meeting_id}: {str(e)}")
+
+
+def _generate_summary_in_background(log_id: str, text_content: str, meeting_id: str) -> None:
+    try:
+        result = generate_summary_non_stream(log_id, text_content, meeting_id, fallback=False)
+        metrics.inc('background_summaries', status=result['status'])
+    finally:
+        with _pending_summaries_lock:
+            _pending_summaries.discard(meeting_id)
+
+
+def schedule_background_summary(log_id: str, text_content: str, meeting_id: str) -> bool:
+    """
+    在后台生成并缓存会议纪要，同一会议已有生成任务时不重复提交
+    
+    Args:
+        log_id: 日志ID
+        text_content: 会议文本内容
+        meeting_id: 会议ID
+        
+    Returns:
+        是否提交了新的生成任务
+    """
+    with _pending_summaries_lock:
+        if meeting_id in _pending_summaries:
+            return False
+        _pending_summaries.add(meeting_id)
+    submit_in_context(summary_executor, _generate_summary_in_background, log_id, text_content, meeting_id)
+    return True
+
+
+def get_chat_summary(log_id: str, text_content: str, meeting_id: str) -> Tuple[str, str]:
+    """
+    获取问答使用的会议纪要
+    
+    Args:
+        log_id: 日志ID
+        text_content: 会议文本内容
+        meeting_id: 会议ID
+        
+    Returns:
+        (会议纪要, 来源)，来源为 cached / blocking / background；
+        background 表示纪要正在后台生成，本轮仅基于原文回答
+    """
+    meeting = get_meeting(meeting_id)
+    if meeting and 'summary' in meeting:
+        logger.info(f"[{log_id}] Found cached summary for meeting {meeting_id}")
+        return meeting['summary'], 'cached'
+    
+    if CHAT_SUMMARY_MODE == 'background':
+        # 先基于原文回答，纪要在后台生成后供后续轮次使用
+        logger.info(f"[{log_id}] No cached summary for meeting {meeting_id}, generating summary in background...")
+        schedule_background_summary(log_id, text_content, meeting_id)
+        return "", 'background'
+    
+    # 实时生成会议纪要
+    logger.info(f"[{log_id}] No cached summary for meeting {meeting_id}, generating summary...")
+    return generate_summary_non_stream(log_id, text_content, meeting_id)['data']['answer'], 'blocking'
+
+
+def build_chat_messages(summary: str, text_content: str, messages: list) -> list:
+    """
+    构建问答请求的完整消息列表
+    
+    Args:
+        summary: 会议纪要，可为空
+        text_content: 会议文本内容
+        messages: 对话历史
+    
+    Returns:
+        发送给LLM的消息列表
+    """
+    system_prompt = f"""你是一个会议助手，请基于以下会议信息回答用户的问题：
+
+会议纪要：
+{summary if summary else '暂无会议纪要'}
+
+会议原文：
+{text_content}
+
+请根据以上信息回答用户问题，如果信息中没有相关内容，请如实告知。"""
+
+    full_messages = [{"role": "user", "content": system_prompt}]
+    full_messages.extend(messages)
+    return full_messages
+
+
+def get_cached_answer(text_hash: str, meeting_id: str, question: str) -> Tuple[Optional[str], str]:
+    """
+    查询已缓存的回答：先查问答缓存，再查随会议保存的预计算回答
+    
+    Args:
+        text_hash: 会议内容哈希
+        meeting_id: 会议ID
+        question: 用户问题
+    
+    Returns:
+        (回答, 来源)，来源为 answer_cache / precomputed；未命中时回答为None
+    """
+    answer = answer_cache.get(text_hash, question)
+    if answer is not None:
+        return answer, 'answer_cache'
+    meeting = get_meeting(meeting_id)
+    if meeting and meeting.get('content_hash') == text_hash:
+        answer = (meeting.get('precomputed_answers') or {}).get(normalize_question(question))
+        if answer:
+            answer_cache.put(text_hash, question, answer)
+            return answer, 'precomputed'
+    return None, ''
+
+
+def _wait_for_idle(meeting_id: str, text_hash: str) -> bool:
+    # 有进行中的请求时等待；会议内容在等待期间变化则放弃
+    while live_request_count() > PRECOMPUTE_MAX_LIVE_REQUESTS:
+        time.sleep(0.2)
+    meeting = get_meeting(meeting_id)
+    return bool(meeting) and meeting.get('content_hash') == text_hash
+
+
+def _precompute_answers(log_id: str, text_content: str, meeting_id: str) -> None:
+    try:
+        text_hash = content_hash(text_content)
+        computed = 0
+        for question in PRECOMPUTE_QUESTION_LIST:
+            if not _wait_for_idle(meeting_id, text_hash):
+                logger.info(f"[{log_id}] Meeting {meeting_id} changed, precompute abandoned")
+                return
+            if get_cached_answer(text_hash, meeting_id, question)[0] is not None:
+                continue
+            
+            start_time = time.perf_counter()
+            summary = get_meeting(meeting_id).get('summary', '')
+            messages = build_chat_messages(summary, text_content, [{"role": "user", "content": question}])
+            answer = call_llm_non_stream(messages, select_model('chat', messages))
+            metrics.observe('precompute_ms', (time.perf_counter() - start_time) * 1000)
+            
+            # 生成期间会议内容可能已变化，此时丢弃结果
+            meeting = get_meeting(meeting_id)
+            if not meeting or meeting.get('content_hash') != text_hash or not answer:
+                return
+            answer_cache.put(text_hash, question, answer)
+            precomputed = dict(meeting.get('precomputed_answers') or {})
+            precomputed[normalize_question(question)] = answer
+            update_meeting(meeting_id, precomputed_answers=precomputed)
+            metrics.inc('precomputed_answers')
+            computed += 1
+        logger.info(f"[{log_id}] Precomputed {computed} answers for meeting {meeting_id}")
+    except Exception as e:
+        logger.error(f"[{log_id}] Error precomputing answers: {str(e)}")
+    finally:
+        with _pending_precompute_lock:
+            _pending_precompute.discard(meeting_id)
 
 
-def generate_chat_stream(log_id: str, text_content: str, meeting_id: str, messages: list) -> Generator[str, None, None]:
+def schedule_precompute(log_id: str, text_content: str, meeting_id: str) -> bool:
+    """
+    纪要生成后在后台预先回答常见问题，同一会议已有任务时不重复提交
+    
+    Args:
+        log_id: 日志ID
+        text_content: 会议文本内容
+        meeting_id: 会议ID
+    
+    Returns:
+        是否提交了新的预计算任务
+    """
+    if not PRECOMPUTE_ENABLED or not PRECOMPUTE_QUESTION_LIST:
+        return False
+    with _pending_precompute_lock:
+        if meeting_id in _pending_precompute:
+            return False
+        _pending_precompute.add(meeting_id)
+    submit_in_context(precompute_executor, _precompute_answers, log_id, text_content, meeting_id)
+    return True
+
+
+def generate_chat_stream(log_id: str, text_content: str, meeting_id: str, messages: list,
+                         history_independent: bool = False,
+                         cancel_check: Optional[Callable[[], bool]] = None,
+                         text_hash: Optional[str] = None) -> Generator[str, None, None]:
     """
     生成QA问答的流式响应
     
@@ -286,70 +1850,73 @@ def generate_chat_stream(log_id: str, text_content: str, meeting_id: str, messag
         text_content: 会议文本内容
         meeting_id: 会议ID
         messages: 对话历史
+        history_independent: 最后一个问题是否与对话历史无关（可参与问答缓存）
+        cancel_check: 返回True时中止生成（如客户端已断开）
+        text_hash: 已计算的会议内容哈希，为空时按需计算
         
     Yields:
         JSON格式的响应数据
     """
+    start_time = time.perf_counter()
+    full_answer = ""
+    completed = False
+    llm_stream = None
     try:
-        # 获取缓存的会议纪要
-        summary = ""
-        if meeting_id in meeting_cache and 'summary' in meeting_cache[meeting_id]:
-            logger.info(f"[{log_id}] Found cached summary for meeting {meeting_id}")
-            summary = meeting_cache[meeting_id]['summary']
-        else:
-            # 实时生成会议纪要
-            logger.info(f"[{log_id}] No cached summary for meeting {meeting_id}, generating summary...")
-            summary = generate_summary_non_stream(log_id, text_content, meeting_id)['data']['answer']
-
-        # 构建系统提示词
-        system_prompt = f"""你是一个会议助手，请基于以下会议信息回答用户的问题：
-
-会议纪要：
-{summary if summary else '暂无会议纪要'}
-
-会议原文：
-{text_content}
+        # 命中问答缓存时直接回放
+        question = get_cacheable_question(messages, history_independent)
+        text_hash = (text_hash or content_hash(text_content)) if question else ''
+        if question:
+            cached_answer, cache_source = get_cached_answer(text_hash, meeting_id, question)
+            if cached_answer is not None:
+                logger.info(f"[{log_id}] Answer cache hit ({cache_source}) for meeting {meeting_id}")
+                metrics.observe('chat_ttft_ms', (time.perf_counter() - start_time) * 1000, summary=cache_source)
+                yield format_stream_chunk(cached_answer, 0)
+                yield format_stream_chunk("", 1)
+                return
 
-请根据以上信息回答用户问题，如果信息中没有相关内容，请如实告知。"""
+        # 获取缓存的会议纪要
+        summary, summary_source = get_chat_summary(log_id, text_content, meeting_id)
 
         # 构建完整的消息列表
-        full_messages = [{"role": "user", "content": system_prompt}]
-        full_messages.extend(messages)
+        full_messages = build_chat_messages(summary, text_content, messages)
         
         # 调用LLM进行流式生成
-        for content in call_llm_stream(full_messages):
+        model = select_model('chat', full_messages)
+        llm_stream = call_llm_stream(full_messages, model)
+        for content in llm_stream:
+            if not full_answer:
+                # 记录首字时延，按纪要来源区分
+                metrics.observe('chat_ttft_ms', (time.perf_counter() - start_time) * 1000, summary=summary_source)
+            full_answer += content
+            if cancel_check is not None and cancel_check():
+                raise GenerationCancelled()
             # 返回中间结果
-            yield json.dumps({
-                "status": 200,
-                "data": {
-                    "answer": content,
-                    "is_end": 0
-                }
-            }, ensure_ascii=False) + "\n"
+            yield format_stream_chunk(content, 0)
+        
+        completed = True
+        if question:
+            answer_cache.put(text_hash, question, full_answer)
         
         # 返回结束标志
-        yield json.dumps({
-            "status": 200,
-            "data": {
-                "answer": "",
-                "is_end": 1
-            }
-        }, ensure_ascii=False) + "\n"
+        yield format_stream_chunk("", 1, model=model)
+        
+        logger.info(f"[{log_id}] Chat response completed for meeting {meeting_id} with model {model}")
         
-        logger.info(f"[{log_id}] Chat response completed for meeting {meeting_id}")
+    except (GeneratorExit, GenerationCancelled):
+        if not completed:
+            handle_cancelled_generation(log_id, meeting_id, 'chat', full_answer)
         
     except Exception as e:
         logger.error(f"[{log_id}] Error generating chat response: {str(e)}")
-        yield json.dumps({
-            "status": 500,
-            "data": {
-                "answer": f"生成回答时出错: {str(e)}",
-                "is_end": 1
-            }
-        }, ensure_ascii=False) + "\n"
+        yield format_stream_chunk(f"生成回答时出错: {str(e)}", 1, status=500)
+        
+    finally:
+        if llm_stream is not None:
+            llm_stream.close()
 
 
-def generate_chat_non_stream(log_id: str, text_content: str, meeting_id: str, messages: list) -> Dict[str, Any]:
+def generate_chat_non_stream(log_id: str, text_content: str, meeting_id: str, messages: list,
+                             history_independent: bool = False) -> Dict[str, Any]:
     """
     生成QA问答的非流式响应
     
@@ -358,46 +1925,51 @@ def generate_chat_non_stream(log_id: str, text_content: str, meeting_id: str, me
         text_content: 会议文本内容
         meeting_id: 会议ID
         messages: 对话历史
+        history_independent: 最后一个问题是否与对话历史无关（可参与问答缓存）
         
     Returns:
         JSON格式的响应数据
     """
+    start_time = time.perf_counter()
     try:
+        # 命中问答缓存时直接返回
+        question = get_cacheable_question(messages, history_independent)
+        text_hash = content_hash(text_content) if question else ''
+        if question:
+            cached_answer, cache_source = get_cached_answer(text_hash, meeting_id, question)
+            if cached_answer is not None:
+                logger.info(f"[{log_id}] Answer cache hit ({cache_source}) for meeting {meeting_id}")
+                metrics.observe('chat_latency_ms', (time.perf_counter() - start_time) * 1000, summary=cache_source)
+                return {
+                    "status": 200,
+                    "data": {
+                        "answer": cached_answer,
+                        "is_end": 1
+                    }
+                }
+
         # 获取缓存的会议纪要
-        summary = ""
-        if meeting_id in meeting_cache and 'summary' in meeting_cache[meeting_id]:
-            logger.info(f"[{log_id}] Found cached summary for meeting {meeting_id}")
-            summary = meeting_cache[meeting_id]['summary']
-        else:
-            # 实时生成会议纪要
-            logger.info(f"[{log_id}] No cached summary for meeting {meeting_id}, generating summary...")
-            summary = generate_summary_non_stream(log_id, text_content, meeting_id)['data']['answer']
+        summary, summary_source = get_chat_summary(log_id, text_content, meeting_id)
         
-        # 构建系统提示词
-        system_prompt = f"""你是一个会议助手，请基于以下会议信息回答用户的问题：
-
-会议纪要：
-{summary if summary else '暂无会议纪要'}
-
-会议原文：
-{text_content}
-
-请根据以上信息回答用户问题，如果信息中没有相关内容，请如实告知。"""
-
         # 构建完整的消息列表
-        full_messages = [{"role": "user", "content": system_prompt}]
-        full_messages.extend(messages)
+        full_messages = build_chat_messages(summary, text_content, messages)
         
         # 调用LLM进行非流式生成
-        answer = call_llm_non_stream(full_messages)
+        model = select_model('chat', full_messages)
+        answer = call_llm_non_stream(full_messages, model)
+        metrics.observe('chat_latency_ms', (time.perf_counter() - start_time) * 1000, summary=summary_source)
         
-        logger.info(f"[{log_id}] Chat response completed for meeting {meeting_id}")
+        if question:
+            answer_cache.put(text_hash, question, answer)
+        
+        logger.info(f"[{log_id}] Chat response completed for meeting {meeting_id} with model {model}")
         
         return {
             "status": 200,
             "data": {
                 "answer": answer,
-                "is_end": 1
+                "is_end": 1,
+                "model": model
             }
         }
         
@@ -412,45 +1984,240 @@ def generate_chat_non_stream(log_id: str, text_content: str, meeting_id: str, me
         }
 
 
+def idempotency_key(endpoint: str, log_id: str, **params) -> str:
+    """
+    计算请求的幂等键，log_id 和请求参数都相同的请求视为同一请求的重试
+    
+    请求携带幂等键请求头（IDEMPOTENCY_KEY_HEADER）时，以请求头的值代替 log_id。
+    
+    Args:
+        endpoint: 接口名称
+        log_id: 日志ID
+        **params: 影响生成结果的请求参数
+        
+    Returns:
+        十六进制哈希字符串
+    """
+    client_key = request.headers.get(IDEMPOTENCY_KEY_HEADER) or log_id
+    payload = json.dumps([endpoint, client_key, params], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def start_generation(log_id: str, key: str, producer: Callable, keep: Callable[[list], bool],
+                     grace: Optional[float] = None) -> Generation:
+    """
+    启动生成，幂等键已有保留期内的生成时直接复用
+    
+    Args:
+        log_id: 日志ID
+        key: 幂等键
+        producer: 生成函数，接收取消检查函数，逐个产出帧
+        keep: 判断生成结果是否保留供重试复用
+        grace: 客户端全部断开后等待重试接入的时间（秒），0表示立即取消
+        
+    Returns:
+        生成
+    """
+    generation, created = generation_registry.start(key, producer, keep, grace)
+    if not created:
+        state = 'completed' if generation.done else 'running'
+        metrics.inc('idempotent_retries', state=state)
+        logger.info(f"[{log_id}] Retry reuses {state} generation {generation.id}")
+    return generation
+
+
+def with_stream_id(frame: str, stream_id: str) -> str:
+    """
+    在流式响应帧的 data 中加入 stream_id
+    
+    Args:
+        frame: 一行JSON数据
+        stream_id: 流ID
+        
+    Returns:
+        以换行结尾的JSON字符串
+    """
+    chunk = json.loads(frame)
+    chunk['data']['stream_id'] = stream_id
+    return json.dumps(chunk, ensure_ascii=False) + "\n"
+
+
+def stream_generation(generation: Generation, cancel_check: Callable[[], bool],
+                      offset: int = 0) -> Generator[str, None, None]:
+    """
+    将生成缓冲区中的帧作为流式响应返回，客户端断开时注销读取方
+    
+    生成可以续传时，第一帧的 data.stream_id 为流ID，客户端断线后可以凭流ID和已收到的帧数续传。
+    
+    Args:
+        generation: 生成
+        cancel_check: 返回True表示客户端已断开
+        offset: 起始帧序号
+        
+    Yields:
+        JSON格式的响应数据
+    """
+    generation_registry.attach(generation)
+    try:
+        frames = generation.read(offset, stop=cancel_check, poll_interval=CANCEL_CHECK_INTERVAL or 0.5)
+        for index, frame in enumerate(frames, offset):
+            yield with_stream_id(frame, generation.id) if index == 0 and generation.resumable else frame
+        if generation.error:
+            yield format_stream_chunk(f"服务器错误: {generation.error}", 1, status=500)
+    finally:
+        generation_registry.detach(generation)
+
+
+def is_completed_stream(frames: list) -> bool:
+    """流式生成是否以成功的结束帧结束，降级返回的抽取式摘要不算，重试时重新调用LLM"""
+    if not frames:
+        return False
+    last = json.loads(frames[-1])
+    return last['status'] == 200 and last['data']['is_end'] == 1 and 'fallback' not in last['data']
+
+
+def is_completed_result(frames: list) -> bool:
+    """非流式生成是否成功，降级返回的抽取式摘要不算，重试时重新调用LLM"""
+    return bool(frames) and frames[0]['status'] == 200 and 'fallback' not in frames[0]['data']
+
+
+def respond_stream(log_id: str, key: str, producer: Callable[[Callable[[], bool]], Generator[str, None, None]]) -> Response:
+    """
+    返回流式生成的响应，启用幂等时生成在后台执行，重试请求复用同一生成
+    
+    客户端断开后立即取消生成，响应中不返回流ID；请求携带幂等键请求头时，表示客户端会重试或续传，
+    响应返回流ID，生成继续进行 GENERATION_ORPHAN_GRACE 秒等待接入。
+    
+    Args:
+        log_id: 日志ID
+        key: 幂等键
+        producer: 流式生成函数，接收取消检查函数
+        
+    Returns:
+        Flask流式响应
+    """
+    cancel_check = DisconnectMonitor(request.environ, CANCEL_CHECK_INTERVAL)
+    if IDEMPOTENCY_WINDOW <= 0:
+        return stream_response(producer(cancel_check))
+    grace = GENERATION_ORPHAN_GRACE if request.headers.get(IDEMPOTENCY_KEY_HEADER) else 0
+    generation = start_generation(log_id, key, producer, is_completed_stream, grace)
+    return stream_response(stream_generation(generation, cancel_check))
+
+
+def respond_non_stream(log_id: str, key: str, producer: Callable[[], Dict[str, Any]]):
+    """
+    返回非流式生成的响应，启用幂等时重试请求复用同一生成
+    
+    Args:
+        log_id: 日志ID
+        key: 幂等键
+        producer: 非流式生成函数，返回响应数据
+        
+    Returns:
+        (响应体, 状态码)
+    """
+    if IDEMPOTENCY_WINDOW <= 0:
+        result = producer()
+        return result, result['status']
+    generation = start_generation(log_id, key, lambda cancel_check: [producer()], is_completed_result)
+    generation.wait()
+    if not generation.frames:
+        return error_response(500, f"服务器错误: {generation.error}")
+    result = generation.frames[0]
+    return result, result['status']
+
+
 @app.route('/summary', methods=['POST'])
 def summary():
     """
     会议纪要生成接口
     """
     try:
-        data = request.get_json()
+        data = load_request_data()
         
         # 参数验证
         log_id = data.get('log_id')
         srt_text = data.get('srt_text') or data.get('src_text')  # 兼容src_text字段
         meeting_id = data.get('meeting_id')
         stream = data.get('stream', False)
+        output_format = data.get('format', 'text')
+        mode = data.get('mode', 'llm')
+        
+        if output_format not in ('text', 'json'):
+            return error_response(400, "format参数只支持 text 或 json")
+        if mode not in ('llm', 'extractive'):
+            return error_response(400, "mode参数只支持 llm 或 extractive")
+        if mode == 'extractive' and output_format != 'text':
+            return error_response(400, "extractive 模式仅支持 text 格式")
         
-        if not all([log_id, srt_text, meeting_id]):
+        if not all([log_id, meeting_id]):
             return {
                 "status": 400,
                 "data": {
-                    "answer": "缺少必填参数: log_id, srt_text, meeting_id",
+                    "answer": "缺少必填参数: log_id, meeting_id",
                     "is_end": 1
                 }
             }, 400
         
         logger.info(f"[{log_id}] Received summary request for meeting {meeting_id}, stream={stream}")
+        set_usage_meeting(meeting_id)
+        
+        # 解析SRT文本，未携带时使用已上传的转写
+        if srt_text:
+            text_content = get_text_content(ingest_transcript(meeting_id, srt_text))
+        else:
+            text_content = resolve_text_content(meeting_id, None)
+        if text_content is None:
+            return error_response(400, "缺少srt_text，且该会议尚未上传转写")
+        
+        if mode == 'extractive':
+            # 本地抽取式摘要，不调用LLM
+            extractive = build_extractive_summary(meeting_id, text_content)
+            if stream:
+                return stream_response(iter([
+                    format_stream_chunk(extractive['answer'], 0, mode='extractive'),
+                    format_stream_chunk("", 1, mode='extractive')
+                ]))
+            return {
+                "status": 200,
+                "data": {
+                    "answer": extractive['answer'],
+                    "sentences": extractive['sentences'],
+                    "is_end": 1,
+                    "mode": "extractive"
+                }
+            }
+        
+        try:
+            token_usage.check(usage_scope.get()[0])
+        except TokenQuotaExceeded as e:
+            return quota_exceeded_response(e)
+        
+        # 相同 log_id 的重试复用已完成或进行中的生成
+        key = idempotency_key('summary', log_id, meeting_id=meeting_id, text_hash=content_hash(text_content),
+                              stream=bool(stream), format=output_format)
         
-        # 解析SRT文本
-        text_content = parse_srt_text(srt_text)
+        if output_format == 'json':
+            # 结构化JSON纪要
+            if stream:
+                return respond_stream(log_id, key, lambda cancel_check: generate_minutes_stream(
+                    log_id, text_content, meeting_id, cancel_check
+                ))
+            return respond_non_stream(log_id, key, lambda: generate_minutes_non_stream(log_id, text_content, meeting_id))
         
         if stream:
             # 流式返回
-            return Response(
-                stream_with_context(generate_summary_stream(log_id, text_content, meeting_id)),
-                content_type='application/json; charset=utf-8'
-            )
+            return respond_stream(log_id, key, lambda cancel_check: generate_summary_stream(
+                log_id, text_content, meeting_id, cancel_check
+            ))
         else:
             # 非流式返回
-            result = generate_summary_non_stream(log_id, text_content, meeting_id)
-            return result, result['status']
+            return respond_non_stream(log_id, key, lambda: generate_summary_non_stream(log_id, text_content, meeting_id))
             
+    except RequestBodyError as e:
+        logger.warning(f"Invalid request body in summary endpoint: {e.message}")
+        return error_response(e.status, e.message)
+        
     except Exception as e:
         logger.error(f"Error in summary endpoint: {str(e)}")
         return {
@@ -468,7 +2235,7 @@ def chat():
     会议QA问答接口
     """
     try:
-        data = request.get_json()
+        data = load_request_data()
         
         # 参数验证
         log_id = data.get('log_id')
@@ -476,12 +2243,13 @@ def chat():
         meeting_id = data.get('meeting_id')
         messages = data.get('messages', [])
         stream = data.get('stream', False)
+        history_independent = data.get('history_independent', False)
         
-        if not all([log_id, srt_text, meeting_id]):
+        if not all([log_id, meeting_id]):
             return {
                 "status": 400,
                 "data": {
-                    "answer": "缺少必填参数: log_id, srt_text, meeting_id",
+                    "answer": "缺少必填参数: log_id, meeting_id",
                     "is_end": 1
                 }
             }, 400
@@ -496,21 +2264,40 @@ def chat():
             }, 400
         
         logger.info(f"[{log_id}] Received chat request for meeting {meeting_id}, stream={stream}")
+        set_usage_meeting(meeting_id)
+        try:
+            token_usage.check(usage_scope.get()[0])
+        except TokenQuotaExceeded as e:
+            return quota_exceeded_response(e)
+        
+        # 解析SRT文本：与已保存的转写一致时复用解析结果，未携带时使用已上传的转写
+        meeting = get_meeting(meeting_id)
+        if srt_text and not (meeting and 'text_key' in meeting):
+            text_content = get_text_content(ingest_transcript(meeting_id, srt_text))
+        else:
+            text_content = resolve_text_content(meeting_id, srt_text)
+        if text_content is None:
+            return error_response(400, "缺少srt_text，且该会议尚未上传转写")
         
-        # 解析SRT文本
-        text_content = parse_srt_text(srt_text)
+        # 相同 log_id 的重试复用已完成或进行中的生成
+        key = idempotency_key('chat', log_id, meeting_id=meeting_id, text_hash=content_hash(text_content),
+                              stream=bool(stream), messages=messages, history_independent=bool(history_independent))
         
         if stream:
             # 流式返回
-            return Response(
-                stream_with_context(generate_chat_stream(log_id, text_content, meeting_id, messages)),
-                content_type='application/json; charset=utf-8'
-            )
+            return respond_stream(log_id, key, lambda cancel_check: generate_chat_stream(
+                log_id, text_content, meeting_id, messages, history_independent, cancel_check
+            ))
         else:
             # 非流式返回
-            result = generate_chat_non_stream(log_id, text_content, meeting_id, messages)
-            return result, result['status']
+            return respond_non_stream(log_id, key, lambda: generate_chat_non_stream(
+                log_id, text_content, meeting_id, messages, history_independent
+            ))
             
+    except RequestBodyError as e:
+        logger.warning(f"Invalid request body in chat endpoint: {e.message}")
+        return error_response(e.status, e.message)
+        
     except Exception as e:
         logger.error(f"Error in chat endpoint: {str(e)}")
         return {
@@ -522,6 +2309,426 @@ def chat():
         }, 500
 
 
+def run_chat_session(ws, meeting_id: str, log_id: str) -> None:
+    """
+    在一个WebSocket连接上进行多轮会议问答
+    
+    连接建立时加载一次会议文本，对话历史保存在连接中。客户端每轮发送
+    {"question": "...", "history_independent": false}，发送 {"reset": true} 清空对话历史；
+    服务端以与 /chat 流式响应相同格式的JSON消息逐段返回回答。
+    
+    Args:
+        ws: WebSocket连接，提供 send / receive / connected
+        meeting_id: 会议ID
+        log_id: 日志ID，每轮回答的日志ID为 {log_id}-{轮次}
+    """
+    meeting = get_meeting(meeting_id)
+    text_content = get_text_content(meeting)
+    if text_content is None:
+        ws.send(format_stream_chunk(f"会议 {meeting_id} 尚未上传转写", 1, status=404))
+        return
+    text_hash = meeting.get('content_hash') or content_hash(text_content)
+    history: list = []
+    turn = 0
+    logger.info(f"[{log_id}] Chat session opened for meeting {meeting_id}")
+    ws.send(format_stream_chunk("", 1, session='ready', meeting_id=meeting_id))
+    
+    while True:
+        raw = ws.receive()
+        if raw is None:
+            break
+        start_time = time.perf_counter()
+        try:
+            message = json.loads(raw)
+        except ValueError:
+            ws.send(format_stream_chunk("消息必须是JSON", 1, status=400))
+            continue
+        if message.get('reset'):
+            history = []
+            ws.send(format_stream_chunk("", 1, session='reset'))
+            continue
+        question = message.get('question')
+        if not question:
+            ws.send(format_stream_chunk("question参数不能为空", 1, status=400))
+            continue
+        
+        turn += 1
+        turn_log_id = f"{log_id}-{turn}"
+        try:
+            token_usage.check(usage_scope.get()[0])
+        except TokenQuotaExceeded as e:
+            body, status, _ = quota_exceeded_response(e)
+            ws.send(format_stream_chunk(body['data']['answer'], 1, status=status, retry_after=e.retry_after))
+            continue
+        ticket = None
+        if ADMISSION_CONTROL_ENABLED:
+            try:
+                ticket = admission_controller.acquire('chat')
+            except AdmissionRejected as e:
+                metrics.inc('admission_shed', type='chat', reason=e.reason)
+                ws.send(format_stream_chunk("服务繁忙，请稍后重试", 1, status=503, retry_after=e.retry_after))
+                continue
+        
+        history.append({"role": "user", "content": question})
+        metrics.observe('ws_chat_turn_overhead_ms', (time.perf_counter() - start_time) * 1000)
+        answer_parts = []
+        completed = False
+        try:
+            for frame in generate_chat_stream(
+                turn_log_id, text_content, meeting_id, list(history),
+                bool(message.get('history_independent')), lambda: not ws.connected, text_hash
+            ):
+                chunk = json.loads(frame)
+                answer_parts.append(chunk['data']['answer'])
+                completed = chunk['status'] == 200 and chunk['data']['is_end'] == 1
+                ws.send(frame)
+        finally:
+            if ticket is not None:
+                admission_controller.release(ticket)
+        
+        if completed:
+            history.append({"role": "assistant", "content": ''.join(answer_parts)})
+        else:
+            # 本轮失败或被取消，不保留在对话历史中
+            history.pop()
+    
+    logger.info(f"[{log_id}] Chat session closed for meeting {meeting_id} after {turn} turns")
+
+
+def acquire_ws_session() -> bool:
+    """
+    占用一个WebSocket会话名额
+    
+    Returns:
+        是否占用成功，已达到 WS_MAX_SESSIONS 时返回False
+    """
+    global _ws_sessions
+    with _ws_sessions_lock:
+        if 0 < WS_MAX_SESSIONS <= _ws_sessions:
+            return False
+        _ws_sessions += 1
+        metrics.set_gauge('ws_sessions', _ws_sessions)
+        return True
+
+
+def release_ws_session() -> None:
+    """释放一个WebSocket会话名额"""
+    global _ws_sessions
+    with _ws_sessions_lock:
+        _ws_sessions -= 1
+        metrics.set_gauge('ws_sessions', _ws_sessions)
+
+
+if sock is not None:
+    @sock.route('/ws/meetings/<meeting_id>/chat')
+    def chat_ws(ws, meeting_id: str):
+        """
+        WebSocket多轮会议问答接口
+        """
+        log_id = request.args.get('log_id') or f"ws-{os.urandom(4).hex()}"
+        if not acquire_ws_session():
+            metrics.inc('admission_shed', type='ws_chat', reason='sessions')
+            logger.warning(f"[{log_id}] Rejected chat session for meeting {meeting_id}: "
+                           f"{WS_MAX_SESSIONS} sessions already open")
+            ws.send(format_stream_chunk("服务繁忙，请稍后重试", 1, status=503))
+            return
+        try:
+            set_usage_meeting(meeting_id)
+            run_chat_session(ws, meeting_id, log_id)
+        finally:
+            release_ws_session()
+
+
+@app.route('/streams/<stream_id>', methods=['GET'])
+def resume_stream(stream_id: str):
+    """
+    流式响应断线续传接口
+    
+    offset 为客户端已收到的帧数，返回其后的帧，包括断线后新生成的帧。
+    """
+    try:
+        offset = int(request.args.get('offset', 0))
+    except ValueError:
+        return error_response(400, "offset参数必须是整数")
+    if offset < 0:
+        return error_response(400, "offset参数不能为负数")
+    
+    generation = generation_registry.get(stream_id)
+    if generation is None:
+        return error_response(404, f"流 {stream_id} 不存在或已过期")
+    
+    metrics.inc('stream_resumes')
+    logger.info(f"Resuming stream {stream_id} from frame {offset}, {len(generation.frames)} frames buffered")
+    cancel_check = DisconnectMonitor(request.environ, CANCEL_CHECK_INTERVAL)
+    return stream_response(stream_generation(generation, cancel_check, offset))
+
+
+@app.route('/meetings/<meeting_id>/transcript', methods=['PUT'])
+def put_transcript(meeting_id: str):
+    """
+    上传会议转写接口
+    
+    转写上传一次后，/summary 和 /chat 只需携带 meeting_id。
+    请求体可以是包含 srt_text 字段的JSON；也可以是SRT/WebVTT原文（可分块传输），
+    或 file 字段为字幕文件的 multipart/form-data，两者都边接收边解析，不在内存中保留完整请求体。
+    """
+    try:
+        if request.mimetype == 'application/json':
+            data = load_request_json()
+            srt_text = data.get('srt_text') or data.get('src_text')
+            if not srt_text or not srt_text.strip():
+                return error_response(400, "缺少必填参数: srt_text")
+            meeting = ingest_transcript(meeting_id, srt_text)
+        else:
+            _, transcript = receive_transcript_upload()
+            if transcript is None:
+                return error_response(400, "缺少转写文件: file")
+            meeting = store_transcript(meeting_id, transcript)
+        
+        logger.info(f"Transcript stored for meeting {meeting_id}, content_hash={meeting['content_hash'][:12]}")
+        
+        return {
+            "status": 200,
+            "data": {
+                "meeting_id": meeting_id,
+                "content_hash": meeting['content_hash'],
+                "text_length": meeting['text_length'],
+                "storage": transcript_usage(meeting)
+            }
+        }
+        
+    except RequestBodyError as e:
+        logger.warning(f"Invalid request body in transcript endpoint: {e.message}")
+        return error_response(e.status, e.message)
+        
+    except UnicodeDecodeError:
+        return error_response(400, "转写文本必须是UTF-8编码")
+        
+    except Exception as e:
+        logger.error(f"Error in transcript endpoint: {str(e)}")
+        return error_response(500, f"服务器错误: {str(e)}")
+
+
+@app.route('/meetings/<meeting_id>/transcript', methods=['GET'])
+def get_transcript(meeting_id: str):
+    """
+    查询会议转写信息接口
+    """
+    meeting = get_meeting(meeting_id)
+    if not meeting or 'text_key' not in meeting:
+        return error_response(404, f"会议 {meeting_id} 尚未上传转写")
+    
+    return {
+        "status": 200,
+        "data": {
+            "meeting_id": meeting_id,
+            "content_hash": meeting.get('content_hash') or meeting['text_key'],
+            "text_length": meeting['text_length'],
+            "has_summary": 'summary' in meeting,
+            "storage": transcript_usage(meeting)
+        }
+    }
+
+
+@app.route('/meetings/<meeting_id>/minutes', methods=['GET'])
+@app.route('/meetings/<meeting_id>/minutes/<field>', methods=['GET'])
+def get_minutes(meeting_id: str, field: Optional[str] = None):
+    """
+    查询结构化会议纪要接口，直接读取缓存，不调用LLM
+    
+    field 可选 topic / discussion / decisions / action_items；
+    查询 action_items 时支持 owner 参数按负责人过滤。
+    """
+    if field is not None and field not in MINUTES_FIELDS:
+        return error_response(404, f"未知的纪要字段: {field}，可选: {', '.join(MINUTES_FIELDS)}")
+    
+    meeting = get_meeting(meeting_id)
+    minutes = meeting.get('minutes') if meeting else None
+    if not minutes:
+        return error_response(404, f"会议 {meeting_id} 尚未生成结构化纪要，请先以 format=json 调用 /summary")
+    
+    if field is None:
+        return {"status": 200, "data": minutes}
+    
+    value = minutes[field]
+    owner = request.args.get('owner')
+    if field == 'action_items' and owner:
+        value = [item for item in value if item.get('owner') == owner]
+    return {"status": 200, "data": {field: value}}
+
+
+@app.route('/meetings/<meeting_id>/segment_tree', methods=['POST'])
+def build_segment_tree(meeting_id: str):
+    """
+    预生成会议分段总结树接口，在后台执行
+    """
+    tree = get_segment_tree(meeting_id)
+    if tree is None:
+        return error_response(404, f"会议 {meeting_id} 没有带时间轴的转写，请先上传转写")
+    
+    submit_in_context(summary_executor, _build_segment_tree_in_background, meeting_id)
+    return {
+        "status": 202,
+        "data": {
+            "meeting_id": meeting_id,
+            "leaf_seconds": SEGMENT_LEAF_SECONDS,
+            "leaf_count": tree.leaf_count,
+            "cached_nodes": len(tree.nodes)
+        }
+    }, 202
+
+
+@app.route('/meetings/<meeting_id>/range_summary', methods=['GET'])
+def range_summary(meeting_id: str):
+    """
+    任意时间范围的会议总结接口
+    
+    start、end 为秒数，会向外对齐到分段边界。由 O(log n) 个缓存节点加一次合并调用生成。
+    """
+    try:
+        start = float(request.args.get('start', 0))
+        end = float(request.args.get('end', 0))
+    except ValueError:
+        return error_response(400, "start和end必须是秒数")
+    if end <= start:
+        return error_response(400, "end必须大于start")
+    
+    tree = get_segment_tree(meeting_id)
+    if tree is None:
+        return error_response(404, f"会议 {meeting_id} 没有带时间轴的转写，请先上传转写")
+    
+    try:
+        token_usage.check(usage_scope.get()[0])
+        start_time = time.perf_counter()
+        result = tree.query(start, end)
+        if tree.llm_calls:
+            save_segment_tree(meeting_id, tree)
+        metrics.observe('range_summary_ms', (time.perf_counter() - start_time) * 1000)
+        metrics.inc('segment_tree_llm_calls', tree.llm_calls)
+        result['llm_calls'] = tree.llm_calls
+        result['is_end'] = 1
+        return {"status": 200, "data": result}
+    except TokenQuotaExceeded as e:
+        return quota_exceeded_response(e)
+    except Exception as e:
+        logger.error(f"Error generating range summary for meeting {meeting_id}: {str(e)}")
+        return error_response(500, f"生成分段总结时出错: {str(e)}")
+
+
+def get_meeting_topics(meeting_id: str) -> Optional[list]:
+    """
+    获取会议的话题切分结果，首次计算后缓存
+    
+    Args:
+        meeting_id: 会议ID
+        
+    Returns:
+        话题段落列表，会议没有带时间轴的转写时返回None
+    """
+    meeting = get_meeting(meeting_id)
+    cues = get_meeting_cues(meeting)
+    if not cues:
+        return None
+    if 'topics' in meeting:
+        return meeting['topics']
+    
+    start_time = time.perf_counter()
+    topics = segment_topics(cues, block_cues=TOPIC_BLOCK_CUES, min_topic_seconds=TOPIC_MIN_SECONDS)
+    metrics.observe('topic_segmentation_ms', (time.perf_counter() - start_time) * 1000)
+    update_meeting(meeting_id, topics=topics)
+    return topics
+
+
+@app.route('/meetings/<meeting_id>/topics', methods=['GET'])
+def get_topics(meeting_id: str):
+    """
+    会议话题切分接口，本地计算，不调用LLM
+    """
+    topics = get_meeting_topics(meeting_id)
+    if topics is None:
+        return error_response(404, f"会议 {meeting_id} 没有带时间轴的转写，请先上传转写")
+    return {
+        "status": 200,
+        "data": {
+            "meeting_id": meeting_id,
+            "topics": topics
+        }
+    }
+
+
+@app.route('/meetings/<meeting_id>/stats', methods=['GET'])
+def get_stats(meeting_id: str):
+    """
+    会议发言统计接口，本地计算，不调用LLM
+    """
+    stats = get_meeting_stats(meeting_id)
+    if stats is None:
+        return error_response(404, f"会议 {meeting_id} 没有带时间轴的转写，请先上传转写")
+    return {
+        "status": 200,
+        "data": {
+            "meeting_id": meeting_id,
+            **stats
+        }
+    }
+
+
+@app.route('/search', methods=['GET'])
+def search():
+    """
+    跨会议检索接口，返回按相关度排序的会议及匹配的字幕片段
+    """
+    if search_index is None:
+        return error_response(404, "检索索引未启用")
+    query = request.args.get('q', '').strip()
+    if not query:
+        return error_response(400, "缺少必需参数: q")
+    try:
+        limit = max(1, min(int(request.args.get('limit', 10)), 100))
+    except ValueError:
+        return error_response(400, "limit 必须是整数")
+    
+    start_time = time.perf_counter()
+    results = search_index.search(query, limit=limit)
+    elapsed_ms = (time.perf_counter() - start_time) * 1000
+    metrics.observe('search_ms', elapsed_ms)
+    return {
+        "status": 200,
+        "data": {
+            "query": query,
+            "results": results,
+            "elapsed_ms": round(elapsed_ms, 2)
+        }
+    }
+
+
+@app.route('/usage', methods=['GET'])
+def get_usage():
+    """
+    查询租户在当前配额窗口内的token用量接口
+    
+    默认查询请求头中的租户；tenant 参数只有 USAGE_ADMIN_TENANTS 中的管理租户可以指定为其他租户。
+    """
+    caller = usage_scope.get()[0]
+    tenant = request.args.get('tenant') or caller
+    if tenant != caller and caller not in usage_admin_tenants:
+        logger.warning(f"Tenant {caller} is not allowed to read usage of tenant {tenant}")
+        return error_response(403, "无权查询其他租户的用量")
+    return {"status": 200, "data": token_usage.report(tenant)}
+
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """
+    指标查询接口（当前worker进程）
+    """
+    return {
+        "status": "ok",
+        "pid": os.getpid(),
+        "metrics": metrics.snapshot()
+    }
+
+
 @app.route('/health', methods=['GET'])
 def health():
     """
@@ -529,19 +2736,21 @@ def health():
     """
     return {
         "status": "ok",
-        "cached_meetings": len(meeting_cache)
+        "cached_meetings": len(meeting_cache),
+        "cached_answers": len(answer_cache),
+        "transcript_storage": transcript_store.totals()
     }
 
 
 if __name__ == '__main__':
     logger.info(f"Starting server on {HOST}:{PORT}")
-    logger.info(f"LLM Provider: {LLM_PROVIDER}")
+    logger.info(f"LLM Provider: {ACTIVE_PROVIDER}")
     
-    if LLM_PROVIDER == 'qianfan':
+    if ACTIVE_PROVIDER == 'qianfan':
         logger.info(f"Using Qianfan model: {DEFAULT_MODEL}")
         if not QIANFAN_ACCESS_KEY or not QIANFAN_SECRET_KEY:
             logger.warning("Warning: QIANFAN API keys not configured. Please set them in .env file or environment variables.")
-    elif LLM_PROVIDER == 'deepseek':
+    elif ACTIVE_PROVIDER == 'deepseek':
         logger.info(f"Using DeepSeek model: {DEEPSEEK_MODEL}")
         logger.info(f"DeepSeek API base URL: {DEEPSEEK_BASE_URL}")
         if not DEEPSEEK_API_KEY:
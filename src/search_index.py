@@ -0,0 +1,471 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+跨会议全文检索索引
+
+以字幕条目为检索单元的倒排索引，按BM25排序，返回匹配的会议及带时间轴的片段。
+
+存储格式：索引由若干只读段（segment）目录组成，每个段包含排序后的词项哈希、
+倒排列表偏移、倒排列表和字幕文本，均为NumPy数组文件，查询时以内存映射方式打开。
+新处理的会议先进入内存中的待写缓冲区（同样可检索），积累到一定数量后写为新段；
+段数量过多时合并为一个段。同一会议被重新索引时，以最新的段为准。
+进程退出前未写入磁盘的会议，由下次启动时的 reindex_missing 从会议存储补建。
+"""
+
+import os
+import json
+import time
+import queue
+import shutil
+import hashlib
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.subtitles import Cue, format_timestamp
+from src.tokenizer import tokenize
+
+try:
+    import fcntl
+except ImportError:  # Windows下不做跨进程合并互斥
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# BM25参数
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# 每个会议返回的片段数，会议得分为前几个片段得分之和
+SNIPPETS_PER_MEETING = 3
+
+_ARRAYS = ('terms', 'offsets', 'post_cue', 'post_tf', 'cue_meeting', 'cue_start', 'cue_end', 'cue_len', 'text_offsets')
+
+
+def term_hash(term: str) -> int:
+    """
+    计算词项的稳定64位哈希，跨进程一致
+
+    Args:
+        term: 词项
+
+    Returns:
+        无符号64位整数
+    """
+    return int.from_bytes(hashlib.blake2b(term.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class _Segment:
+    """一个只读索引段"""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], text: Any, meetings: List[str], seq: int, path: str = ''):
+        self.arrays = arrays
+        self.text = text
+        self.meetings = meetings
+        self.seq = seq
+        self.path = path
+
+    @property
+    def cue_count(self) -> int:
+        return len(self.arrays['cue_meeting'])
+
+    @classmethod
+    def build(cls, docs: Sequence[Tuple[str, Sequence[Cue]]], seq: int) -> '_Segment':
+        """由 (会议ID, 字幕条目) 列表在内存中构建索引段"""
+        meetings: List[str] = []
+        term_list: List[int] = []
+        cue_list: List[int] = []
+        cue_meeting: List[int] = []
+        cue_start: List[int] = []
+        cue_end: List[int] = []
+        cue_len: List[int] = []
+        texts: List[bytes] = []
+        hash_cache: Dict[str, int] = {}
+
+        for meeting_index, (meeting_id, cues) in enumerate(docs):
+            meetings.append(meeting_id)
+            for cue in cues:
+                cue_index = len(cue_meeting)
+                tokens = tokenize(cue.text)
+                for token in tokens:
+                    hashed = hash_cache.get(token)
+                    if hashed is None:
+                        hashed = hash_cache[token] = term_hash(token)
+                    term_list.append(hashed)
+                    cue_list.append(cue_index)
+                cue_meeting.append(meeting_index)
+                cue_start.append(cue.start_ms)
+                cue_end.append(cue.end_ms)
+                cue_len.append(len(tokens))
+                texts.append(cue.text.encode('utf-8'))
+
+        term_arr = np.asarray(term_list, dtype=np.uint64)
+        cue_arr = np.asarray(cue_list, dtype=np.int32)
+        # 按 (词项, 字幕) 排序后合并重复项得到词频
+        order = np.lexsort((cue_arr, term_arr))
+        term_arr, cue_arr = term_arr[order], cue_arr[order]
+        if len(term_arr):
+            is_new = np.ones(len(term_arr), dtype=bool)
+            is_new[1:] = (term_arr[1:] != term_arr[:-1]) | (cue_arr[1:] != cue_arr[:-1])
+            starts = np.nonzero(is_new)[0]
+            post_tf = np.diff(np.append(starts, len(term_arr))).astype(np.uint16)
+            post_term, post_cue = term_arr[starts], cue_arr[starts]
+            term_starts = np.nonzero(np.append(True, post_term[1:] != post_term[:-1]))[0]
+            terms = post_term[term_starts]
+            offsets = np.append(term_starts, len(post_term)).astype(np.int64)
+        else:
+            terms = np.zeros(0, dtype=np.uint64)
+            offsets = np.zeros(1, dtype=np.int64)
+            post_cue = np.zeros(0, dtype=np.int32)
+            post_tf = np.zeros(0, dtype=np.uint16)
+
+        text_offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+        if texts:
+            text_offsets[1:] = np.cumsum([len(t) for t in texts])
+        arrays = {
+            'terms': terms,
+            'offsets': offsets,
+            'post_cue': post_cue,
+            'post_tf': post_tf,
+            'cue_meeting': np.asarray(cue_meeting, dtype=np.int32),
+            'cue_start': np.asarray(cue_start, dtype=np.int64),
+            'cue_end': np.asarray(cue_end, dtype=np.int64),
+            'cue_len': np.asarray(cue_len, dtype=np.int32),
+            'text_offsets': text_offsets,
+        }
+        return cls(arrays, b''.join(texts), meetings, seq)
+
+    def save(self, directory: str, name: str) -> str:
+        """原子地写入磁盘，返回段目录路径"""
+        tmp_path = os.path.join(directory, f".tmp-{name}")
+        final_path = os.path.join(directory, name)
+        os.makedirs(tmp_path, exist_ok=True)
+        for key in _ARRAYS:
+            np.save(os.path.join(tmp_path, f"{key}.npy"), self.arrays[key])
+        with open(os.path.join(tmp_path, 'text.bin'), 'wb') as f:
+            f.write(bytes(self.text))
+        with open(os.path.join(tmp_path, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({"meetings": self.meetings, "seq": self.seq}, f, ensure_ascii=False)
+        os.rename(tmp_path, final_path)
+        return final_path
+
+    @classmethod
+    def load(cls, path: str) -> '_Segment':
+        """以内存映射方式打开磁盘上的段"""
+        with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        arrays = {key: np.load(os.path.join(path, f"{key}.npy"), mmap_mode='r') for key in _ARRAYS}
+        text_path = os.path.join(path, 'text.bin')
+        text = np.memmap(text_path, dtype=np.uint8, mode='r') if os.path.getsize(text_path) else b''
+        return cls(arrays, text, meta['meetings'], meta['seq'], path)
+
+    def postings(self, hashed: int) -> Tuple[np.ndarray, np.ndarray]:
+        terms = self.arrays['terms']
+        index = int(np.searchsorted(terms, np.uint64(hashed)))
+        if index >= len(terms) or int(terms[index]) != hashed:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.uint16)
+        lo, hi = int(self.arrays['offsets'][index]), int(self.arrays['offsets'][index + 1])
+        return np.asarray(self.arrays['post_cue'][lo:hi]), np.asarray(self.arrays['post_tf'][lo:hi])
+
+    def cue_text(self, cue_index: int) -> str:
+        lo, hi = int(self.arrays['text_offsets'][cue_index]), int(self.arrays['text_offsets'][cue_index + 1])
+        return bytes(self.text[lo:hi]).decode('utf-8')
+
+    def docs(self) -> List[Tuple[str, List[Cue]]]:
+        """还原段中的 (会议ID, 字幕条目)，用于段合并"""
+        result: List[Tuple[str, List[Cue]]] = [(meeting_id, []) for meeting_id in self.meetings]
+        cue_meeting = self.arrays['cue_meeting']
+        for cue_index in range(self.cue_count):
+            result[int(cue_meeting[cue_index])][1].append(Cue(
+                int(self.arrays['cue_start'][cue_index]),
+                int(self.arrays['cue_end'][cue_index]),
+                self.cue_text(cue_index),
+            ))
+        return result
+
+
+class SearchIndex:
+    """跨会议倒排索引，写入在后台线程中进行"""
+
+    def __init__(self, directory: str, flush_meetings: int = 20, max_segments: int = 8):
+        """
+        初始化索引
+
+        Args:
+            directory: 索引目录
+            flush_meetings: 待写缓冲区达到该会议数时写为新段
+            max_segments: 段数量超过该值时合并
+        """
+        self.directory = directory
+        self.flush_meetings = flush_meetings
+        self.max_segments = max_segments
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._segments: List[_Segment] = []
+        self._listing: Tuple[str, ...] = ()
+        self._pending: Dict[str, List[Cue]] = {}
+        # 待写缓冲区的可检索段，由后台线程在缓冲区变化后构建，查询时直接使用
+        self._pending_segment: Optional[_Segment] = None
+        self._pending_version = 0
+        self._queue: "queue.Queue" = queue.Queue()
+        self._refresh()
+
+        self._worker = threading.Thread(target=self._index_loop, name='search-indexer', daemon=True)
+        self._worker.start()
+
+    # ===== 写入 =====
+
+    def add_meeting(self, meeting_id: str, cues: Sequence[Cue]) -> None:
+        """
+        异步索引（或重新索引）一个会议
+
+        Args:
+            meeting_id: 会议ID
+            cues: 会议字幕条目
+        """
+        self._queue.put((meeting_id, list(cues)))
+
+    def flush(self) -> None:
+        """等待后台索引完成，并将待写缓冲区写入磁盘"""
+        self._queue.join()
+        with self._lock:
+            self._write_pending()
+
+    def close(self) -> None:
+        """写入剩余数据并停止后台线程"""
+        self._queue.put(None)
+        self._worker.join(10)
+        with self._lock:
+            self._write_pending()
+
+    def reindex_missing(self, meeting_ids: Iterable[str],
+                        load_cues: Callable[[str], Sequence[Cue]]) -> int:
+        """
+        补建索引中缺失的会议（如上次退出前仍在待写缓冲区中的会议），并写入磁盘
+
+        多个worker同时启动时只有一个执行补建，其余直接返回。
+
+        Args:
+            meeting_ids: 应当被索引的会议ID
+            load_cues: 读取会议字幕条目，会议没有转写时返回空列表
+
+        Returns:
+            补建的会议数量
+        """
+        lock_file = None
+        if fcntl is not None:
+            lock_file = open(os.path.join(self.directory, '.reindex.lock'), 'w')
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                return 0
+        try:
+            _, owners = self._searchable_segments()
+            with self._lock:
+                indexed = set(owners).union(self._pending)
+            docs = []
+            for meeting_id in meeting_ids:
+                if meeting_id in indexed:
+                    continue
+                cues = list(load_cues(meeting_id))
+                if cues:
+                    docs.append((meeting_id, cues))
+            if docs:
+                with self._lock:
+                    for meeting_id, cues in docs:
+                        # 启动后已重新提交的会议以新内容为准
+                        self._pending.setdefault(meeting_id, cues)
+                    self._write_pending()
+            return len(docs)
+        finally:
+            if lock_file is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+                lock_file.close()
+
+    def _index_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                meeting_id, cues = item
+                with self._lock:
+                    self._pending[meeting_id] = cues
+                    self._pending_version += 1
+                    if len(self._pending) >= self.flush_meetings:
+                        self._write_pending()
+                        continue
+                    docs, version = list(self._pending.items()), self._pending_version
+                # 在锁外构建待写段，构建期间查询使用上一个待写段
+                segment = _Segment.build(docs, time.time_ns())
+                with self._lock:
+                    if version == self._pending_version:
+                        self._pending_segment = segment
+            except Exception as e:
+                logger.error(f"Failed to index meeting: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    def _write_pending(self) -> None:
+        # 调用方持有 self._lock
+        if not self._pending:
+            return
+        seq = time.time_ns()
+        segment = _Segment.build(list(self._pending.items()), seq)
+        segment.save(self.directory, f"seg-{seq:020d}-{os.getpid()}")
+        self._pending.clear()
+        self._pending_version += 1
+        self._pending_segment = None
+        self._refresh()
+        if len(self._segments) > self.max_segments:
+            self._compact()
+
+    def _compact(self) -> None:
+        # 调用方持有 self._lock；跨进程通过文件锁保证同一时间只有一个worker合并
+        lock_file = None
+        if fcntl is not None:
+            lock_file = open(os.path.join(self.directory, '.compact.lock'), 'w')
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                return
+        try:
+            self._refresh()
+            owners = self._owners(self._segments)
+            docs = []
+            for segment in self._segments:
+                docs.extend((meeting_id, cues) for meeting_id, cues in segment.docs()
+                            if owners.get(meeting_id) is segment)
+            merged = _Segment.build(docs, max(segment.seq for segment in self._segments))
+            merged.save(self.directory, f"seg-{merged.seq:020d}-merged-{time.time_ns()}")
+            for segment in self._segments:
+                shutil.rmtree(segment.path, ignore_errors=True)
+            self._refresh()
+            logger.info(f"Search index compacted into 1 segment with {len(docs)} meetings")
+        finally:
+            if lock_file is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+                lock_file.close()
+
+    # ===== 查询 =====
+
+    def _refresh(self) -> None:
+        # 其他worker可能写入了新段，目录内容变化时重新打开
+        names = tuple(sorted(
+            name for name in os.listdir(self.directory)
+            if name.startswith('seg-') and os.path.isdir(os.path.join(self.directory, name))
+        ))
+        if names == self._listing:
+            return
+        opened = {segment.path: segment for segment in self._segments}
+        segments = []
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                segments.append(opened.get(path) or _Segment.load(path))
+            except (OSError, ValueError) as e:
+                # 段可能正在被其他worker合并删除
+                logger.warning(f"Skip search index segment {name}: {str(e)}")
+        self._segments = segments
+        self._listing = names
+
+    @staticmethod
+    def _owners(segments: Sequence[_Segment]) -> Dict[str, _Segment]:
+        owners: Dict[str, _Segment] = {}
+        for segment in sorted(segments, key=lambda seg: seg.seq):
+            for meeting_id in segment.meetings:
+                owners[meeting_id] = segment
+        return owners
+
+    def _searchable_segments(self) -> Tuple[List[_Segment], Dict[str, _Segment]]:
+        with self._lock:
+            self._refresh()
+            segments = list(self._segments)
+            if self._pending_segment is not None:
+                segments.append(self._pending_segment)
+        owners = self._owners(segments)
+        return segments, owners
+
+    def meeting_count(self) -> int:
+        """返回已索引的会议数量"""
+        _, owners = self._searchable_segments()
+        return len(owners)
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        检索会议
+
+        Args:
+            query: 查询文本
+            limit: 返回的会议数量
+
+        Returns:
+            按得分排序的会议列表，每个会议包含得分最高的字幕片段
+        """
+        hashes = list(dict.fromkeys(term_hash(token) for token in tokenize(query)))
+        if not hashes:
+            return []
+        segments, owners = self._searchable_segments()
+        if not segments:
+            return []
+
+        # 全局统计量：字幕总数、平均长度、各词项的文档频率
+        total_cues = sum(segment.cue_count for segment in segments)
+        total_len = sum(int(np.asarray(segment.arrays['cue_len']).sum()) for segment in segments)
+        avg_len = total_len / total_cues if total_cues else 1.0
+        postings = [[segment.postings(hashed) for hashed in hashes] for segment in segments]
+        doc_freq = [sum(len(postings[s][t][0]) for s in range(len(segments))) for t in range(len(hashes))]
+        idf = [np.log(1 + (total_cues - df + 0.5) / (df + 0.5)) for df in doc_freq]
+
+        hits: Dict[str, List[Tuple[float, _Segment, int]]] = {}
+        for segment, segment_postings in zip(segments, postings):
+            cue_ids = [cues for cues, _ in segment_postings if len(cues)]
+            if not cue_ids:
+                continue
+            cue_len = segment.arrays['cue_len']
+            all_cues = np.concatenate(cue_ids)
+            all_scores = np.concatenate([
+                idf[t] * tf * (BM25_K1 + 1) / (
+                    tf + BM25_K1 * (1 - BM25_B + BM25_B * np.asarray(cue_len[cues]) / avg_len))
+                for t, (cues, tf) in enumerate(segment_postings) if len(cues)
+            ])
+            unique_cues, inverse = np.unique(all_cues, return_inverse=True)
+            cue_scores = np.bincount(inverse, weights=all_scores)
+            cue_meeting = np.asarray(segment.arrays['cue_meeting'][unique_cues])
+            for cue_index, meeting_index, score in zip(unique_cues, cue_meeting, cue_scores):
+                meeting_id = segment.meetings[int(meeting_index)]
+                if owners.get(meeting_id) is segment:
+                    hits.setdefault(meeting_id, []).append((float(score), segment, int(cue_index)))
+
+        ranked = []
+        for meeting_id, meeting_hits in hits.items():
+            meeting_hits.sort(key=lambda hit: -hit[0])
+            top = meeting_hits[:SNIPPETS_PER_MEETING]
+            ranked.append((sum(hit[0] for hit in top), meeting_id, top, len(meeting_hits)))
+        ranked.sort(key=lambda item: -item[0])
+
+        results = []
+        for score, meeting_id, top, matched in ranked[:limit]:
+            snippets = []
+            for cue_score, segment, cue_index in top:
+                start_ms = int(segment.arrays['cue_start'][cue_index])
+                snippets.append({
+                    "start_ms": start_ms,
+                    "end_ms": int(segment.arrays['cue_end'][cue_index]),
+                    "start": format_timestamp(start_ms),
+                    "text": segment.cue_text(cue_index),
+                    "score": round(cue_score, 4),
+                })
+            results.append({
+                "meeting_id": meeting_id,
+                "score": round(score, 4),
+                "matched_cues": matched,
+                "snippets": snippets,
+            })
+        return results
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+分段总结树
+
+将会议按固定时长切分为叶子片段，自底向上构建总结线段树：叶子节点是片段总结，
+内部节点是两个子节点总结的合并。任意时间范围的总结由 O(log n) 个已缓存节点
+再经一次合并调用得到。
+"""
+
+import math
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.subtitles import Cue, format_timestamp
+
+
+class SegmentSummaryTree:
+    """会议分段总结线段树，节点总结按需生成并缓存"""
+
+    def __init__(self, cues: Sequence[Cue], leaf_seconds: int,
+                 summarize_leaf: Callable[[str, str], str],
+                 merge_summaries: Callable[[List[str], str], str],
+                 nodes: Optional[Dict[str, str]] = None):
+        """
+        初始化总结树
+
+        Args:
+            cues: 会议字幕条目
+            leaf_seconds: 叶子片段时长（秒）
+            summarize_leaf: 片段总结函数，参数为 (片段文本, 时间范围描述)
+            merge_summaries: 合并总结函数，参数为 (按时间排序的总结列表, 时间范围描述)
+            nodes: 已缓存的节点总结，键为 "起始叶子-结束叶子"
+        """
+        self.leaf_ms = leaf_seconds * 1000
+        self.summarize_leaf = summarize_leaf
+        self.merge_summaries = merge_summaries
+        self.nodes: Dict[str, str] = dict(nodes or {})
+        self.llm_calls = 0
+        self._lock = threading.Lock()
+
+        duration_ms = max((cue.end_ms for cue in cues), default=0)
+        self.leaf_count = max(1, math.ceil(duration_ms / self.leaf_ms))
+        self._leaf_texts: List[List[str]] = [[] for _ in range(self.leaf_count)]
+        for cue in cues:
+            index = min(cue.start_ms // self.leaf_ms, self.leaf_count - 1)
+            self._leaf_texts[index].append(cue.text)
+
+    def _span(self, lo: int, hi: int) -> str:
+        end_ms = hi * self.leaf_ms
+        return f"{format_timestamp(lo * self.leaf_ms)} - {format_timestamp(end_ms)}"
+
+    def _node_summary(self, lo: int, hi: int) -> str:
+        key = f"{lo}-{hi}"
+        cached = self.nodes.get(key)
+        if cached is not None:
+            return cached
+
+        if hi - lo == 1:
+            text = '\n'.join(self._leaf_texts[lo])
+            summary = self.summarize_leaf(text, self._span(lo, hi)) if text else ''
+            self.llm_calls += 1 if text else 0
+        else:
+            mid = (lo + hi) // 2
+            parts = [part for part in (self._node_summary(lo, mid), self._node_summary(mid, hi)) if part]
+            if len(parts) > 1:
+                summary = self.merge_summaries(parts, self._span(lo, hi))
+                self.llm_calls += 1
+            else:
+                summary = parts[0] if parts else ''
+
+        with self._lock:
+            self.nodes[key] = summary
+        return summary
+
+    def build(self) -> int:
+        """
+        生成整棵树的所有节点总结
+
+        Returns:
+            节点总数
+        """
+        self._node_summary(0, self.leaf_count)
+        return len(self.nodes)
+
+    def _cover(self, lo: int, hi: int, left: int, right: int, out: List[Tuple[int, int]]) -> None:
+        # 标准线段树区间分解：收集完全落在 [left, right) 内的最大节点
+        if right <= lo or hi <= left:
+            return
+        if left <= lo and hi <= right:
+            out.append((lo, hi))
+            return
+        mid = (lo + hi) // 2
+        self._cover(lo, mid, left, right, out)
+        self._cover(mid, hi, left, right, out)
+
+    def leaf_range(self, start_seconds: float, end_seconds: float) -> Tuple[int, int]:
+        """
+        将时间范围对齐为叶子区间 [left, right)
+
+        Args:
+            start_seconds: 起始时间（秒）
+            end_seconds: 结束时间（秒）
+
+        Returns:
+            叶子区间
+        """
+        left = max(0, min(self.leaf_count - 1, int(start_seconds * 1000 // self.leaf_ms)))
+        right = max(left + 1, min(self.leaf_count, math.ceil(end_seconds * 1000 / self.leaf_ms)))
+        return left, right
+
+    def query(self, start_seconds: float, end_seconds: float) -> Dict[str, object]:
+        """
+        生成任意时间范围的总结
+
+        时间范围会向外对齐到叶子片段边界。
+
+        Args:
+            start_seconds: 起始时间（秒）
+            end_seconds: 结束时间（秒）
+
+        Returns:
+            包含 answer、start、end、nodes_used 的字典
+        """
+        left, right = self.leaf_range(start_seconds, end_seconds)
+        covering: List[Tuple[int, int]] = []
+        self._cover(0, self.leaf_count, left, right, covering)
+
+        parts = [part for part in (self._node_summary(lo, hi) for lo, hi in covering) if part]
+        if len(parts) > 1:
+            answer = self.merge_summaries(parts, self._span(left, right))
+            self.llm_calls += 1
+        else:
+            answer = parts[0] if parts else ''
+
+        return {
+            "answer": answer,
+            "start": left * self.leaf_ms // 1000,
+            "end": right * self.leaf_ms // 1000,
+            "nodes_used": len(covering),
+        }
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+字幕解析
+
+将SRT/WebVTT文本解析为带时间轴的字幕条目，供分段总结等需要时间信息的功能使用。
+SubtitleParser 可以按任意大小的分块逐步喂入文本，用于边上传边解析。
+"""
+
+import re
+import html
+from typing import List, NamedTuple, Optional, Tuple
+
+# WebVTT的时间轴可以省略小时；时间轴后可以带 "align:start" 等设置
+_TIMESTAMP_RE = re.compile(
+    r'(?:(\d+):)?(\d{1,2}):(\d{1,2})[,.](\d{1,3})\s*-->\s*(?:(\d+):)?(\d{1,2}):(\d{1,2})[,.](\d{1,3})'
+)
+# WebVTT中不属于字幕的块
+_VTT_SKIPPED_BLOCK_RE = re.compile(r'^(?:NOTE|STYLE|REGION)(?:\s|$)')
+# WebVTT说话人标签 "<v Bob>"、"<v.loud Bob>"
+_VTT_VOICE_RE = re.compile(r'^<v(?:\.[^\s>]*)?\s+([^>]+)>')
+# WebVTT的其他标签（<i>、<c.yellow>、行内时间戳 <00:00:01.000> 等）
+_VTT_TAG_RE = re.compile(r'<[^>]*>')
+
+# 说话人前缀："[Speaker 1] ..."、"【张三】..."、"(李四)：..."；圆括号需带冒号，避免误判 "(笑)"
+_BRACKET_SPEAKER_RE = re.compile(
+    r'^(?:[\[【]\s*([^\]】\n]{1,24}?)\s*[\]】]|[(（]\s*([^)）\n]{1,24}?)\s*[)）](?=\s*[：:]))\s*[：:]?\s*'
+)
+# 说话人前缀："张三：..."、"Speaker 2: ..."、"John Smith: ..."；不以数字开头，避免误判 "10:30"、"3:1"
+_COLON_SPEAKER_RE = re.compile(
+    r'^([一-鿿·]{1,8}|[A-Za-z][A-Za-z0-9_.\-]*(?: [A-Za-z0-9_.\-]+){0,2})\s*[：:]\s*'
+)
+
+
+class Cue(NamedTuple):
+    """一条字幕"""
+    start_ms: int
+    end_ms: int
+    text: str
+
+
+def _to_ms(hours: Optional[str], minutes: str, seconds: str, millis: str) -> int:
+    return ((int(hours or 0) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 + int(millis.ljust(3, '0'))
+
+
+def is_webvtt(text: str) -> bool:
+    """判断字幕文本是否为WebVTT格式（以 WEBVTT 开头）"""
+    return text.lstrip('\ufeff \t\r\n').startswith('WEBVTT')
+
+
+def _clean_vtt_line(line: str) -> str:
+    # 去掉标签，"<v Bob>" 转为 "Bob: " 前缀，便于说话人统计识别
+    voice = _VTT_VOICE_RE.match(line)
+    text = html.unescape(_VTT_TAG_RE.sub('', line)).strip()
+    if voice and text:
+        return f"{voice.group(1).strip()}: {text}"
+    return text
+
+
+class SubtitleParser:
+    """
+    逐行解析SRT/WebVTT字幕，可以分多次喂入文本
+
+    格式由第一行判断：以 WEBVTT 开头为WebVTT，否则按SRT解析。
+    除字幕条目外还输出正文行：SRT为除序号行、时间轴行以外的所有非空行（与 parse_srt_text 一致），
+    WebVTT为去掉标签后的字幕文本行。
+    """
+
+    def __init__(self):
+        self.format: Optional[str] = None
+        self._partial = ''
+        self._start_ms: Optional[int] = None
+        self._end_ms: Optional[int] = None
+        self._lines: List[str] = []
+        # WebVTT文件头、NOTE/STYLE/REGION块，到空行结束
+        self._skipping = False
+
+    def feed(self, text: str) -> Tuple[List[Cue], List[str]]:
+        """
+        喂入一段文本，可以在任意位置截断
+
+        Args:
+            text: 字幕文本片段
+
+        Returns:
+            (本次完成的字幕条目, 本次完成的正文行)
+        """
+        lines = (self._partial + text).split('\n')
+        self._partial = lines.pop()
+        return self._parse(lines)
+
+    def close(self) -> Tuple[List[Cue], List[str]]:
+        """
+        结束解析，处理最后一行和最后一个字幕块
+
+        Returns:
+            (剩余的字幕条目, 剩余的正文行)
+        """
+        cues, text_lines = self._parse([self._partial] if self._partial else [])
+        self._partial = ''
+        if self._start_ms is not None and self._lines:
+            cues.append(Cue(self._start_ms, self._end_ms, '\n'.join(self._lines)))
+        self._start_ms, self._lines = None, []
+        return cues, text_lines
+
+    def _parse(self, raw_lines: List[str]) -> Tuple[List[Cue], List[str]]:
+        # 整个长会议一次喂入时这里是热点，解析状态在循环中使用局部变量
+        cues: List[Cue] = []
+        text_lines: List[str] = []
+        start_ms, end_ms, lines, skipping = self._start_ms, self._end_ms, self._lines, self._skipping
+        is_srt = self.format == 'srt'
+        for raw_line in raw_lines:
+            line = raw_line.strip()
+            if self.format is None:
+                line = line.lstrip('\ufeff')
+                if not line:
+                    continue
+                self.format = 'vtt' if line.startswith('WEBVTT') else 'srt'
+                is_srt = self.format == 'srt'
+                if not is_srt:
+                    skipping = True
+                    continue
+            if skipping:
+                # WebVTT文件头、NOTE/STYLE/REGION块，到空行结束
+                skipping = bool(line)
+                continue
+            if '-->' in line:
+                match = _TIMESTAMP_RE.search(line)
+                if match:
+                    # 字幕块之间缺少空行时，上一块的最后一行是本块的序号
+                    if lines and lines[-1].isdigit():
+                        lines.pop()
+                    if start_ms is not None and lines:
+                        cues.append(Cue(start_ms, end_ms, '\n'.join(lines)))
+                    groups = match.groups()
+                    start_ms, end_ms = _to_ms(*groups[:4]), _to_ms(*groups[4:])
+                    lines = []
+                continue
+            if not line:
+                # 空行结束当前字幕块，之后到下一个时间轴之前的序号行不属于字幕文本
+                if start_ms is not None and lines:
+                    cues.append(Cue(start_ms, end_ms, '\n'.join(lines)))
+                start_ms, lines = None, []
+                continue
+            if is_srt:
+                if not line.isdigit():
+                    text_lines.append(line)
+                if start_ms is not None:
+                    lines.append(line)
+                continue
+            if start_ms is None:
+                # WebVTT时间轴之前的行是字幕标识，或需要跳过的块
+                skipping = bool(_VTT_SKIPPED_BLOCK_RE.match(line))
+                continue
+            line = _clean_vtt_line(line)
+            if line:
+                lines.append(line)
+                text_lines.append(line)
+        self._start_ms, self._end_ms, self._lines, self._skipping = start_ms, end_ms, lines, skipping
+        return cues, text_lines
+
+
+def parse_subtitle(text: str) -> Tuple[List[Cue], List[str]]:
+    """
+    一次性解析完整的SRT/WebVTT文本
+
+    Args:
+        text: 字幕文本
+
+    Returns:
+        (字幕条目, 正文行)
+    """
+    parser = SubtitleParser()
+    cues, text_lines = parser.feed(text)
+    rest_cues, rest_lines = parser.close()
+    return cues + rest_cues, text_lines + rest_lines
+
+
+def parse_srt_cues(srt_text: str) -> List[Cue]:
+    """
+    解析SRT/WebVTT文本为字幕条目列表
+
+    Args:
+        srt_text: SRT或WebVTT格式的字幕文本
+
+    Returns:
+        按出现顺序排列的字幕条目，没有文本的条目会被忽略
+    """
+    return parse_subtitle(srt_text)[0]
+
+
+def format_timestamp(ms: int) -> str:
+    """
+    将毫秒格式化为 HH:MM:SS
+
+    Args:
+        ms: 毫秒数
+
+    Returns:
+        时间字符串
+    """
+    seconds = ms // 1000
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def split_speaker(text: str) -> Tuple[Optional[str], str]:
+    """
+    拆分字幕文本开头的说话人前缀
+
+    Args:
+        text: 字幕文本
+
+    Returns:
+        (说话人, 去掉前缀后的文本)，没有说话人前缀时说话人为None
+    """
+    match = _BRACKET_SPEAKER_RE.match(text) or _COLON_SPEAKER_RE.match(text)
+    if not match or match.end() >= len(text):
+        return None, text
+    speaker = next(group for group in match.groups() if group)
+    return speaker.strip(), text[match.end():]
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+按租户统计LLM token用量并执行配额
+
+每次LLM调用的提示词和生成token数计入调用方租户和会议，优先使用提供商返回的用量，
+没有时使用估算值。用量按固定时间窗口累计，保存在SQLite中，多个gunicorn worker共享同一配额。
+
+记录用量不在请求路径上提交事务：用量进入队列，由后台线程合并后批量写入。配额检查使用内存中的
+窗口累计值（上次从数据库同步的总量加上本进程此后的记录），每隔 sync_interval 秒才重新汇总一次数据库，
+以计入其他worker的用量。
+"""
+
+import os
+import json
+import time
+import queue
+import sqlite3
+import logging
+import threading
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 写队列结束标记
+_STOP = object()
+
+# 当前LLM调用归属的 (租户, 会议ID)，在请求入口设置，后台任务提交时随上下文复制
+usage_scope: ContextVar[Tuple[str, Optional[str]]] = ContextVar('usage_scope', default=('default', None))
+
+
+class TokenQuotaExceeded(Exception):
+    """租户在当前窗口内的token用量已达到配额"""
+
+    def __init__(self, tenant: str, used: int, quota: int, retry_after: int):
+        super().__init__(f"tenant {tenant} used {used} of {quota} tokens")
+        self.tenant = tenant
+        self.used = used
+        self.quota = quota
+        self.retry_after = retry_after
+
+
+def parse_quotas(text: str) -> Dict[str, int]:
+    """
+    解析租户配额配置
+
+    Args:
+        text: JSON对象，租户 -> 每个窗口的token上限，"*" 为其他租户的默认上限；为空表示不限制
+
+    Returns:
+        租户配额
+
+    Raises:
+        ValueError: 配置格式不正确
+    """
+    quotas = json.loads(text) if text and text.strip() else {}
+    if not isinstance(quotas, dict):
+        raise ValueError("tenant quotas must be a JSON object")
+    try:
+        return {str(tenant): int(limit) for tenant, limit in quotas.items()}
+    except (TypeError, ValueError):
+        raise ValueError("tenant quota limits must be integers")
+
+
+class _WindowTotal:
+    """租户在一个窗口内的用量累计值"""
+
+    __slots__ = ('window_start', 'synced', 'local', 'synced_at')
+
+    def __init__(self, window_start: int, synced: int, local: int, synced_at: float):
+        self.window_start = window_start
+        # 上次同步时数据库中的总量
+        self.synced = synced
+        # 本进程在上次同步之后记录、尚未计入 synced 的用量
+        self.local = local
+        self.synced_at = synced_at
+
+
+class TokenUsageStore:
+    """按 (租户, 会议, 时间窗口) 累计token用量，写入异步进行"""
+
+    def __init__(self, path: str, window: int, quotas: Dict[str, int], sync_interval: float = 1.0):
+        """
+        初始化用量存储
+
+        Args:
+            path: SQLite数据库文件路径，为空时只保存在内存中（不在进程间共享）
+            window: 配额窗口长度（秒）
+            quotas: 租户配额，见 parse_quotas
+            sync_interval: 配额检查重新汇总数据库用量的最小间隔（秒），其他worker的用量最多延迟这么久计入
+        """
+        self.window = window
+        self.quotas = quotas
+        self.sync_interval = sync_interval
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path or ':memory:', timeout=30, check_same_thread=False)
+        # _db_lock 保护数据库连接，_lock 保护内存中的累计值，记录用量时只需要后者
+        self._db_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._totals: Dict[str, _WindowTotal] = {}
+        # (租户, 窗口) -> 已记录但尚未写入数据库的用量
+        self._unflushed: Dict[Tuple[str, int], int] = {}
+        self._queue: "queue.Queue" = queue.Queue()
+        with self._db_lock:
+            if path:
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS token_usage ("
+                "tenant TEXT NOT NULL, "
+                "window_start INTEGER NOT NULL, "
+                "meeting_id TEXT NOT NULL, "
+                "prompt_tokens INTEGER NOT NULL, "
+                "completion_tokens INTEGER NOT NULL, "
+                "calls INTEGER NOT NULL, "
+                "PRIMARY KEY (tenant, window_start, meeting_id))"
+            )
+            self._conn.commit()
+        self._writer = threading.Thread(target=self._write_loop, name='token-usage-writer', daemon=True)
+        self._writer.start()
+
+    def _window_start(self, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        return int(now // self.window * self.window)
+
+    def quota_for(self, tenant: str) -> Optional[int]:
+        """
+        获取租户配额
+
+        Args:
+            tenant: 租户
+
+        Returns:
+            每个窗口的token上限，None表示不限制
+        """
+        return self.quotas.get(tenant, self.quotas.get('*'))
+
+    def record(self, tenant: str, meeting_id: Optional[str], prompt_tokens: int, completion_tokens: int) -> None:
+        """
+        记录一次LLM调用的用量，立即计入配额，异步写入数据库
+
+        Args:
+            tenant: 租户
+            meeting_id: 会议ID，与会议无关的调用为空
+            prompt_tokens: 提示词token数
+            completion_tokens: 生成token数
+        """
+        window_start = self._window_start()
+        tokens = prompt_tokens + completion_tokens
+        with self._lock:
+            key = (tenant, window_start)
+            self._unflushed[key] = self._unflushed.get(key, 0) + tokens
+            total = self._totals.get(tenant)
+            if total is not None and total.window_start == window_start:
+                total.local += tokens
+            self._queue.put((tenant, window_start, meeting_id or '', prompt_tokens, completion_tokens))
+
+    def used(self, tenant: str) -> int:
+        """
+        获取租户在当前窗口内已用的token数
+
+        距上次同步超过 sync_interval 秒时重新汇总数据库，否则直接使用内存中的累计值。
+
+        Args:
+            tenant: 租户
+
+        Returns:
+            提示词与生成token数之和
+        """
+        now = time.time()
+        window_start = self._window_start(now)
+        with self._lock:
+            total = self._totals.get(tenant)
+            if (total is not None and total.window_start == window_start
+                    and now - total.synced_at < self.sync_interval):
+                return total.synced + total.local
+        with self._db_lock, self._lock:
+            row = self._conn.execute(
+                "SELECT COALESCE(SUM(prompt_tokens + completion_tokens), 0) FROM token_usage "
+                "WHERE tenant = ? AND window_start = ?",
+                (tenant, window_start)
+            ).fetchone()
+            # 持有数据库锁时写线程不会提交，尚未写入的用量正好是数据库之外的部分
+            total = _WindowTotal(window_start, row[0], self._unflushed.get((tenant, window_start), 0), now)
+            self._totals[tenant] = total
+            return total.synced + total.local
+
+    def check(self, tenant: str) -> None:
+        """
+        检查租户是否还有配额
+
+        Args:
+            tenant: 租户
+
+        Raises:
+            TokenQuotaExceeded: 当前窗口的用量已达到配额
+        """
+        quota = self.quota_for(tenant)
+        if quota is None:
+            return
+        used = self.used(tenant)
+        if used >= quota:
+            now = time.time()
+            retry_after = max(1, int(self._window_start(now) + self.window - now))
+            raise TokenQuotaExceeded(tenant, used, quota, retry_after)
+
+    def report(self, tenant: str) -> Dict[str, Any]:
+        """
+        获取租户在当前窗口内的用量明细
+
+        Args:
+            tenant: 租户
+
+        Returns:
+            窗口、总用量、配额、剩余额度，以及按会议的用量（按总token数倒序）
+        """
+        self.flush()
+        window_start = self._window_start()
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT meeting_id, prompt_tokens, completion_tokens, calls FROM token_usage "
+                "WHERE tenant = ? AND window_start = ? "
+                "ORDER BY prompt_tokens + completion_tokens DESC",
+                (tenant, window_start)
+            ).fetchall()
+        meetings = [{
+            "meeting_id": meeting_id or None,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "calls": calls,
+        } for meeting_id, prompt_tokens, completion_tokens, calls in rows]
+        prompt_total = sum(m['prompt_tokens'] for m in meetings)
+        completion_total = sum(m['completion_tokens'] for m in meetings)
+        quota = self.quota_for(tenant)
+        return {
+            "tenant": tenant,
+            "window_start": window_start,
+            "window_seconds": self.window,
+            "prompt_tokens": prompt_total,
+            "completion_tokens": completion_total,
+            "total_tokens": prompt_total + completion_total,
+            "quota": quota,
+            "remaining": None if quota is None else max(0, quota - prompt_total - completion_total),
+            "meetings": meetings,
+        }
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """
+        等待已记录的用量写入数据库
+
+        Args:
+            timeout: 最长等待时间（秒）
+        """
+        deadline = time.time() + timeout
+        while self._queue.unfinished_tasks and time.time() < deadline:
+            time.sleep(0.005)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """
+        写完队列中的用量后停止后台写线程并关闭数据库
+
+        Args:
+            timeout: 最长等待时间（秒）
+        """
+        self._queue.put(_STOP)
+        self._writer.join(timeout)
+        with self._db_lock:
+            self._conn.close()
+
+    def _write_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            items = [item]
+            # 合并队列中已积压的记录，一批只提交一次
+            while item is not _STOP:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                items.append(item)
+            records = [item for item in items if item is not _STOP]
+            try:
+                if records:
+                    self._write_batch(records)
+            except Exception as e:
+                logger.error(f"Failed to persist token usage ({len(records)} records): {str(e)}")
+            finally:
+                for _ in items:
+                    self._queue.task_done()
+            if len(records) < len(items):
+                break
+
+    def _write_batch(self, records: List[Tuple[str, int, str, int, int]]) -> None:
+        # 同一 (租户, 窗口, 会议) 的多次调用合并为一行
+        merged: Dict[Tuple[str, int, str], List[int]] = {}
+        for tenant, window_start, meeting_id, prompt_tokens, completion_tokens in records:
+            row = merged.setdefault((tenant, window_start, meeting_id), [0, 0, 0])
+            row[0] += prompt_tokens
+            row[1] += completion_tokens
+            row[2] += 1
+        with self._db_lock:
+            try:
+                self._conn.executemany(
+                    "INSERT INTO token_usage VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (tenant, window_start, meeting_id) DO UPDATE SET "
+                    "prompt_tokens = prompt_tokens + excluded.prompt_tokens, "
+                    "completion_tokens = completion_tokens + excluded.completion_tokens, "
+                    "calls = calls + excluded.calls",
+                    [(*key, *row) for key, row in merged.items()]
+                )
+                self._conn.commit()
+            finally:
+                # 写入失败的用量不再重试，也不再计入本进程的未写入部分
+                with self._lock:
+                    for (tenant, window_start, _), (prompt_tokens, completion_tokens, _) in merged.items():
+                        key = (tenant, window_start)
+                        left = self._unflushed.get(key, 0) - prompt_tokens - completion_tokens
+                        if left > 0:
+                            self._unflushed[key] = left
+                        else:
+                            self._unflushed.pop(key, None)
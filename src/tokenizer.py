@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+轻量分词与词项向量
+
+不依赖分词词典：中文按相邻汉字二元组切分，英文和数字按单词切分。
+用于话题切分、抽取式摘要、检索等本地计算。
+"""
+
+import re
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+_TOKEN_RE = re.compile(r'[一-鿿]+|[a-zA-Z][a-zA-Z0-9_\-]*|\d+(?:\.\d+)?')
+
+# 二元组中包含这些字时通常没有话题区分度
+_CJK_STOP_CHARS = set('的了是在我你他她它们这那个就也都和与及而啊吧呢吗嗯哦呀么还有要会能说对不一')
+_EN_STOP_WORDS = {
+    'a', 'an', 'the', 'and', 'or', 'but', 'if', 'of', 'to', 'in', 'on', 'for', 'with', 'at', 'by',
+    'is', 'are', 'was', 'were', 'be', 'been', 'it', 'this', 'that', 'we', 'you', 'i', 'he', 'she',
+    'they', 'do', 'does', 'so', 'as', 'not', 'no', 'yes', 'ok', 'okay', 'let', 's', 'll', 'have', 'has',
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    将文本切分为词项
+
+    Args:
+        text: 原始文本
+
+    Returns:
+        词项列表（中文二元组、小写英文单词、数字）
+    """
+    tokens: List[str] = []
+    for match in _TOKEN_RE.finditer(text):
+        piece = match.group()
+        if '一' <= piece[0] <= '鿿':
+            if len(piece) == 1:
+                if piece not in _CJK_STOP_CHARS:
+                    tokens.append(piece)
+                continue
+            for i in range(len(piece) - 1):
+                bigram = piece[i:i + 2]
+                if bigram[0] not in _CJK_STOP_CHARS and bigram[1] not in _CJK_STOP_CHARS:
+                    tokens.append(bigram)
+        else:
+            word = piece.lower()
+            if word not in _EN_STOP_WORDS:
+                tokens.append(word)
+    return tokens
+
+
+def encode_documents(texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """
+    将多段文本编码为扁平的词项ID数组
+
+    Args:
+        texts: 文本列表
+
+    Returns:
+        (词项ID数组, 每个词项所属文本下标数组, 词表)
+    """
+    vocab: Dict[str, int] = {}
+    token_ids: List[int] = []
+    doc_ids: List[int] = []
+    for doc_index, text in enumerate(texts):
+        for token in tokenize(text):
+            token_id = vocab.get(token)
+            if token_id is None:
+                token_id = vocab[token] = len(vocab)
+            token_ids.append(token_id)
+            doc_ids.append(doc_index)
+    terms = [''] * len(vocab)
+    for token, token_id in vocab.items():
+        terms[token_id] = token
+    return np.asarray(token_ids, dtype=np.int64), np.asarray(doc_ids, dtype=np.int64), terms
+
+
+def hashed_term_matrix(token_ids: np.ndarray, doc_ids: np.ndarray, n_docs: int, dim: int = 2048) -> np.ndarray:
+    """
+    构建哈希降维后的词频矩阵
+
+    Args:
+        token_ids: 词项ID数组
+        doc_ids: 每个词项所属文本下标
+        n_docs: 文本数量
+        dim: 向量维度
+
+    Returns:
+        形状为 (n_docs, dim) 的 float32 词频矩阵
+    """
+    flat = doc_ids * dim + (token_ids % dim)
+    counts = np.bincount(flat, minlength=n_docs * dim)
+    return counts.reshape(n_docs, dim).astype(np.float32)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+会议话题切分
+
+TextTiling风格的词汇衔接算法：比较每个字幕间隙左右两侧窗口的词项向量余弦相似度，
+相似度低谷（深度分数高）处即为话题边界。全部计算在CPU上用NumPy向量化完成。
+字幕开头的说话人前缀（如“张三：”）不参与计算，避免说话人姓名左右相似度和关键词。
+"""
+
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from src.subtitles import Cue, format_timestamp, split_speaker
+from src.tokenizer import encode_documents, hashed_term_matrix
+
+
+def _sliding_max(values: np.ndarray, window: int, side: str) -> np.ndarray:
+    # 计算每个位置左侧（不含自身）或右侧 window 个元素内的最大值
+    padded = np.concatenate([np.full(window, -np.inf), values, np.full(window, -np.inf)])
+    views = np.lib.stride_tricks.sliding_window_view(padded, window)
+    n = len(values)
+    if side == 'left':
+        return views[:n].max(axis=1)
+    return views[window + 1:window + 1 + n].max(axis=1)
+
+
+def segment_topics(cues: Sequence[Cue], block_cues: int = 8, min_topic_seconds: int = 120,
+                   max_topics: int = 0, keywords_per_topic: int = 5, dim: int = 2048) -> List[Dict[str, Any]]:
+    """
+    将会议切分为话题段落
+
+    Args:
+        cues: 字幕条目
+        block_cues: 比较窗口包含的字幕条数
+        min_topic_seconds: 话题段落的最短时长（秒）
+        max_topics: 最多话题数，0表示不限制
+        keywords_per_topic: 每个话题返回的关键词数量
+        dim: 词项向量维度
+
+    Returns:
+        话题段落列表，包含起止时间、起止字幕下标和关键词
+    """
+    n = len(cues)
+    if n == 0:
+        return []
+
+    token_ids, doc_ids, terms = encode_documents([split_speaker(cue.text)[1] for cue in cues])
+    boundaries: List[int] = []
+
+    if n > 2 * block_cues and len(token_ids):
+        matrix = hashed_term_matrix(token_ids, doc_ids, n, dim)
+        cumulative = np.vstack([np.zeros((1, dim), dtype=np.float32), np.cumsum(matrix, axis=0)])
+
+        # 间隙 g 位于字幕 g-1 与 g 之间
+        gaps = np.arange(1, n)
+        left = cumulative[gaps] - cumulative[np.maximum(gaps - block_cues, 0)]
+        right = cumulative[np.minimum(gaps + block_cues, n)] - cumulative[gaps]
+        norms = np.linalg.norm(left, axis=1) * np.linalg.norm(right, axis=1)
+        similarity = np.where(norms > 0, np.einsum('ij,ij->i', left, right) / np.maximum(norms, 1e-9), 0.0)
+
+        # 平滑后计算深度分数：相似度与两侧邻域峰值之差
+        smoothed = np.convolve(similarity, np.ones(3) / 3, mode='same')
+        window = block_cues
+        left_peak = np.maximum(_sliding_max(smoothed, window, 'left'), smoothed)
+        right_peak = np.maximum(_sliding_max(smoothed, window, 'right'), smoothed)
+        depth = (left_peak - smoothed) + (right_peak - smoothed)
+
+        # 只保留局部极大且超过阈值的间隙
+        is_peak = np.ones(len(depth), dtype=bool)
+        is_peak[1:] &= depth[1:] >= depth[:-1]
+        is_peak[:-1] &= depth[:-1] >= depth[1:]
+        threshold = depth.mean() + depth.std() / 2
+        candidates = np.nonzero(is_peak & (depth > threshold) & (depth > 0))[0]
+
+        # 按深度从大到小选取边界，保证话题段落不短于最短时长
+        min_ms = min_topic_seconds * 1000
+        starts = np.array([cue.start_ms for cue in cues])
+        chosen: List[int] = []
+        for gap_index in candidates[np.argsort(-depth[candidates], kind='stable')]:
+            cue_index = int(gaps[gap_index])
+            edges = sorted(chosen + [cue_index])
+            position = edges.index(cue_index)
+            prev_start = starts[edges[position - 1]] if position > 0 else starts[0]
+            next_start = starts[edges[position + 1]] if position + 1 < len(edges) else cues[-1].end_ms
+            if starts[cue_index] - prev_start < min_ms or next_start - starts[cue_index] < min_ms:
+                continue
+            chosen.append(cue_index)
+            if max_topics and len(chosen) + 1 >= max_topics:
+                break
+        boundaries = sorted(chosen)
+
+    # 每个话题的关键词：段内词频 × 逆文档频率
+    edges = [0] + boundaries + [n]
+    keywords: List[List[str]] = [[] for _ in range(len(edges) - 1)]
+    if len(token_ids):
+        vocab_size = len(terms)
+        unique_pairs = np.unique(doc_ids * vocab_size + token_ids)
+        document_freq = np.bincount(unique_pairs % vocab_size, minlength=vocab_size)
+        idf = np.log((n + 1) / (document_freq + 1)) + 1
+        segment_of_token = np.searchsorted(np.asarray(edges[1:]), doc_ids, side='right')
+        for segment in range(len(edges) - 1):
+            segment_tokens = token_ids[segment_of_token == segment]
+            if not len(segment_tokens):
+                continue
+            scores = np.bincount(segment_tokens, minlength=vocab_size) * idf
+            top = np.argsort(-scores, kind='stable')[:keywords_per_topic]
+            keywords[segment] = [terms[i] for i in top if scores[i] > 0]
+
+    topics = []
+    for segment in range(len(edges) - 1):
+        first, last = edges[segment], edges[segment + 1] - 1
+        topics.append({
+            "start_ms": cues[first].start_ms,
+            "end_ms": cues[last].end_ms,
+            "start": format_timestamp(cues[first].start_ms),
+            "end": format_timestamp(cues[last].end_ms),
+            "start_cue": first,
+            "end_cue": last,
+            "keywords": keywords[segment],
+        })
+    return topics
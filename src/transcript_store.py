@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+压缩的转写文本存储
+
+会议转写以zlib压缩的UTF-8字节保存，并按内容哈希去重：内容相同的会议共用一份数据。
+中文文本在CPython中以每字符2-4字节的str保存，压缩后通常只占其几分之一。
+只有构造提示词等需要原文时才解压，最近解压的文本保留在一个小的LRU缓存中。
+上传中的转写可以通过 TranscriptWriter 边接收边压缩，不需要先拼出完整文本。
+"""
+
+import sys
+import zlib
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+
+def text_key(text: str) -> str:
+    """
+    计算文本的内容哈希，作为存储键
+
+    Args:
+        text: 文本
+
+    Returns:
+        十六进制哈希字符串
+    """
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class _Blob:
+    __slots__ = ('data', 'raw_bytes', 'str_bytes', 'refs')
+
+    def __init__(self, data: bytes, raw_bytes: int, str_bytes: int):
+        self.data = data
+        # UTF-8字节数
+        self.raw_bytes = raw_bytes
+        # 以str保存时占用的内存
+        self.str_bytes = str_bytes
+        self.refs = 0
+
+
+class TranscriptWriter:
+    """增量写入一段文本：边写入边计算内容哈希和压缩，不保留完整文本"""
+
+    def __init__(self, store: 'TranscriptStore'):
+        self._store = store
+        self._hash = hashlib.sha256()
+        self._compressor = zlib.compressobj(store.level)
+        self._chunks: List[bytes] = []
+        self._max_char = ''
+        self.length = 0
+        self.raw_bytes = 0
+
+    def write(self, text: str) -> None:
+        """
+        追加文本
+
+        Args:
+            text: 文本片段
+        """
+        if not text:
+            return
+        encoded = text.encode('utf-8')
+        self._hash.update(encoded)
+        self._chunks.append(self._compressor.compress(encoded))
+        self.length += len(text)
+        self.raw_bytes += len(encoded)
+        self._max_char = max(self._max_char, max(text))
+
+    def _str_bytes(self) -> int:
+        # 与 sys.getsizeof(完整文本) 相同：CPython按最大码位选择每字符1/2/4字节
+        if not self.length:
+            return sys.getsizeof('')
+        code = ord(self._max_char)
+        width = 1 if code < 0x100 else 2 if code < 0x10000 else 4
+        return sys.getsizeof(self._max_char) + (self.length - 1) * width
+
+    def close(self) -> str:
+        """
+        结束写入并保存，内容已存在时只增加引用计数
+
+        Returns:
+            存储键，与 put 完整文本得到的键相同
+        """
+        data = b''.join(self._chunks) + self._compressor.flush()
+        self._chunks = []
+        return self._store._add(self._hash.hexdigest(), _Blob(data, self.raw_bytes, self._str_bytes()))
+
+
+class TranscriptStore:
+    """按内容哈希去重的压缩文本存储（线程安全）"""
+
+    def __init__(self, level: int = 6, cache_size: int = 4):
+        """
+        初始化存储
+
+        Args:
+            level: zlib压缩级别
+            cache_size: 保留的已解压文本数量
+        """
+        self.level = level
+        self.cache_size = cache_size
+        self._blobs: Dict[str, _Blob] = {}
+        self._recent: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, text: str, key: Optional[str] = None) -> str:
+        """
+        保存文本，内容已存在时只增加引用计数
+
+        Args:
+            text: 文本
+            key: 已计算好的内容哈希，为空时计算
+
+        Returns:
+            存储键
+        """
+        key = key or text_key(text)
+        with self._lock:
+            blob = self._blobs.get(key)
+            if blob is not None:
+                blob.refs += 1
+                return key
+        encoded = text.encode('utf-8')
+        compressed = zlib.compress(encoded, self.level)
+        self._add(key, _Blob(compressed, len(encoded), sys.getsizeof(text)))
+        # 刚保存的文本通常马上会被使用，直接放入已解压缓存
+        self._remember(key, text)
+        return key
+
+    def put_compressed(self, data: bytes) -> str:
+        """
+        保存已压缩的数据（如从持久化存储读取的数据），不重新压缩
+
+        Args:
+            data: put 产生的压缩数据
+
+        Returns:
+            存储键
+
+        Raises:
+            zlib.error: 数据无法解压
+        """
+        encoded = zlib.decompress(data)
+        text = encoded.decode('utf-8')
+        return self._add(text_key(text), _Blob(data, len(encoded), sys.getsizeof(text)))
+
+    def writer(self) -> TranscriptWriter:
+        """
+        创建增量写入器，写入完成后调用 close 保存
+
+        Returns:
+            写入器
+        """
+        return TranscriptWriter(self)
+
+    def _add(self, key: str, blob: _Blob) -> str:
+        with self._lock:
+            blob = self._blobs.setdefault(key, blob)
+            blob.refs += 1
+        return key
+
+    def get(self, key: str) -> str:
+        """
+        读取文本，必要时解压
+
+        Args:
+            key: 存储键
+
+        Returns:
+            文本
+
+        Raises:
+            KeyError: 键不存在
+        """
+        with self._lock:
+            text = self._recent.get(key)
+            if text is not None:
+                self._recent.move_to_end(key)
+                return text
+            data = self._blobs[key].data
+        text = zlib.decompress(data).decode('utf-8')
+        self._remember(key, text)
+        return text
+
+    def _remember(self, key: str, text: str) -> None:
+        if self.cache_size <= 0:
+            return
+        with self._lock:
+            if key not in self._blobs:
+                return
+            self._recent[key] = text
+            self._recent.move_to_end(key)
+            while len(self._recent) > self.cache_size:
+                self._recent.popitem(last=False)
+
+    def compressed(self, key: str) -> bytes:
+        """
+        读取压缩数据，用于持久化
+
+        Args:
+            key: 存储键
+
+        Returns:
+            zlib压缩的UTF-8字节
+        """
+        with self._lock:
+            return self._blobs[key].data
+
+    def release(self, key: str) -> None:
+        """
+        释放一次引用，没有引用时删除数据
+
+        Args:
+            key: 存储键
+        """
+        with self._lock:
+            blob = self._blobs.get(key)
+            if blob is None:
+                return
+            blob.refs -= 1
+            if blob.refs <= 0:
+                del self._blobs[key]
+                self._recent.pop(key, None)
+
+    def usage(self, keys: List[str]) -> Dict[str, Any]:
+        """
+        统计一组数据的存储占用
+
+        Args:
+            keys: 存储键列表（如一个会议的文本和字幕）
+
+        Returns:
+            UTF-8字节数、以str保存时的内存、压缩后字节数、节省的字节数，以及与其他会议共用的数据数
+        """
+        raw_bytes = str_bytes = compressed_bytes = shared = 0
+        with self._lock:
+            for key in keys:
+                blob = self._blobs.get(key)
+                if blob is None:
+                    continue
+                raw_bytes += blob.raw_bytes
+                str_bytes += blob.str_bytes
+                compressed_bytes += len(blob.data)
+                shared += blob.refs > 1
+        return {
+            "raw_bytes": raw_bytes,
+            "str_bytes": str_bytes,
+            "compressed_bytes": compressed_bytes,
+            "saved_bytes": str_bytes - compressed_bytes,
+            "shared": shared,
+        }
+
+    def totals(self) -> Dict[str, Any]:
+        """
+        统计整个存储的占用，去重节省的内存计入 saved_bytes
+
+        Returns:
+            数据条数、引用数、压缩后字节数、节省的字节数
+        """
+        with self._lock:
+            blobs = list(self._blobs.values())
+        compressed_bytes = sum(len(blob.data) for blob in blobs)
+        return {
+            "blobs": len(blobs),
+            "refs": sum(blob.refs for blob in blobs),
+            "compressed_bytes": compressed_bytes,
+            "saved_bytes": sum(blob.str_bytes * blob.refs for blob in blobs) - compressed_bytes,
+        }
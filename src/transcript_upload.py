@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+流式上传会议转写
+
+SRT/WebVTT文件按网络分块到达时逐块解码、解析和压缩：不保留原始请求体，也不拼出完整文本，
+内存占用只有压缩后的数据、字幕条目和一个分块。纪要提示词中的发言统计也随字幕条目到达逐批累计，
+上传结束时转写已经解析完成、统计已经算好，可以立即构造提示词。
+提示词正文本身不在上传过程中拼接，否则需要在内存中保留完整的未压缩文本。
+支持原始请求体（可分块传输、可gzip/zstd压缩）和 multipart/form-data 两种上传方式。
+"""
+
+import json
+import codecs
+import hashlib
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from werkzeug.sansio.multipart import Data, Epilogue, Field, File, MultipartDecoder, NeedData
+
+from src.compression import RequestBodyError
+from src.meeting_stats import MeetingStatsBuilder
+from src.subtitles import Cue, SubtitleParser
+from src.transcript_store import TranscriptStore
+
+
+class ParsedTranscript(NamedTuple):
+    """已解析并保存到转写存储的会议转写（持有 text_key 和 cues_key 各一次引用）"""
+    # 原始字幕文本的哈希
+    srt_hash: str
+    # 正文的存储键，同时是正文的内容哈希
+    text_key: str
+    text_length: int
+    cues: List[Cue]
+    cues_key: str
+    # 发言统计（compute_meeting_stats 的结果），为None时在首次使用时计算
+    stats: Optional[Dict[str, Any]] = None
+
+
+class TranscriptUpload:
+    """接收一个字幕文件的数据块，边接收边解析和压缩"""
+
+    def __init__(self, store: TranscriptStore, max_bytes: int):
+        """
+        Args:
+            store: 转写存储
+            max_bytes: 字幕文件的最大字节数
+        """
+        self.store = store
+        self.max_bytes = max_bytes
+        self.received = 0
+        self._raw_hash = hashlib.sha256()
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._parser = SubtitleParser()
+        self._text = store.writer()
+        self._cues_json = store.writer()
+        self._cues: List[Cue] = []
+        self._stats = MeetingStatsBuilder()
+        self._has_text = False
+
+    @property
+    def format(self) -> Optional[str]:
+        """字幕格式，srt 或 vtt；尚未收到内容时为None"""
+        return self._parser.format
+
+    def feed(self, chunk: bytes) -> None:
+        """
+        接收一块数据
+
+        Args:
+            chunk: 字幕文件的数据块
+
+        Raises:
+            RequestBodyError: 文件超过大小限制，或不是UTF-8编码
+        """
+        self.received += len(chunk)
+        if self.received > self.max_bytes:
+            raise RequestBodyError(413, f"转写文件超过大小限制: {self.max_bytes} 字节")
+        self._raw_hash.update(chunk)
+        try:
+            text = self._decoder.decode(chunk)
+        except UnicodeDecodeError:
+            raise RequestBodyError(400, "转写文本必须是UTF-8编码")
+        self._consume(*self._parser.feed(text))
+
+    def _consume(self, cues: List[Cue], text_lines: List[str]) -> None:
+        if text_lines:
+            # 正文与 parse_srt_text 的结果相同：各行以换行连接
+            self._text.write(('\n' if self._has_text else '') + '\n'.join(text_lines))
+            self._has_text = True
+        if cues:
+            # 与 encode_cues 的输出相同的紧凑JSON，逐条写入
+            self._cues_json.write(('[' if not self._cues else ',') + ','.join(
+                json.dumps(list(cue), ensure_ascii=False, separators=(',', ':')) for cue in cues
+            ))
+            self._cues.extend(cues)
+            self._stats.add(cues)
+
+    def finish(self) -> ParsedTranscript:
+        """
+        结束接收，保存正文和字幕条目
+
+        Returns:
+            解析结果
+
+        Raises:
+            RequestBodyError: 文件不完整或没有字幕内容
+        """
+        try:
+            text = self._decoder.decode(b'', final=True)
+        except UnicodeDecodeError:
+            raise RequestBodyError(400, "转写文本必须是UTF-8编码")
+        self._consume(*self._parser.feed(text))
+        self._consume(*self._parser.close())
+        if not self._has_text:
+            raise RequestBodyError(400, "转写文件没有字幕内容")
+        self._cues_json.write(']' if self._cues else '[]')
+        return ParsedTranscript(
+            srt_hash=self._raw_hash.hexdigest(),
+            text_key=self._text.close(),
+            text_length=self._text.length,
+            cues=self._cues,
+            cues_key=self._cues_json.close(),
+            stats=self._stats.result() if self._cues else None
+        )
+
+
+def read_multipart(chunks: Iterable[bytes], boundary: Optional[str], on_file: Callable[[bytes], None],
+                   file_field: str, max_field_bytes: int) -> Dict[str, str]:
+    """
+    流式解析 multipart/form-data 请求体，文件字段的数据到达后立即交给 on_file
+
+    Args:
+        chunks: 请求体数据块
+        boundary: Content-Type 中的 boundary
+        on_file: 接收文件数据块的函数
+        file_field: 文件字段名，只接受一个文件
+        max_field_bytes: 普通字段的最大字节数
+
+    Returns:
+        普通字段（字段名 -> 值）
+
+    Raises:
+        RequestBodyError: 请求体格式不正确或字段过大
+    """
+    if not boundary:
+        raise RequestBodyError(400, "multipart请求缺少boundary")
+    # 每个数据块收到后立即取出其中的事件，解码器的缓冲区不超过一个数据块
+    decoder = MultipartDecoder(boundary.encode('latin-1'))
+    fields: Dict[str, str] = {}
+    field_name: Optional[str] = None
+    field_value = bytearray()
+    in_file = seen_file = False
+
+    try:
+        for chunk in _with_end(chunks):
+            decoder.receive_data(chunk)
+            event = decoder.next_event()
+            while not isinstance(event, (NeedData, Epilogue)):
+                if isinstance(event, File):
+                    if event.name != file_field or seen_file:
+                        raise RequestBodyError(400, f"只支持在 {file_field} 字段上传一个转写文件")
+                    in_file = seen_file = True
+                elif isinstance(event, Field):
+                    in_file, field_name = False, event.name
+                    field_value = bytearray()
+                elif isinstance(event, Data):
+                    if in_file:
+                        on_file(event.data)
+                    else:
+                        field_value += event.data
+                        if len(field_value) > max_field_bytes:
+                            raise RequestBodyError(413, f"表单字段 {field_name} 超过大小限制: {max_field_bytes} 字节")
+                        if not event.more_data:
+                            fields[field_name] = field_value.decode('utf-8')
+                event = decoder.next_event()
+            if isinstance(event, Epilogue):
+                return fields
+    except UnicodeDecodeError:
+        raise RequestBodyError(400, "表单字段必须是UTF-8编码")
+    except ValueError as e:
+        raise RequestBodyError(400, f"multipart请求体格式不正确: {str(e)}")
+    raise RequestBodyError(400, "multipart请求体不完整")
+
+
+def _with_end(chunks: Iterable[bytes]) -> Iterable[Optional[bytes]]:
+    # MultipartDecoder 以 None 表示数据结束
+    yield from chunks
+    yield None
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+pytest 配置
+
+test_server.py、test_client.py 在进程内加载服务，用假的LLM提供商代替真实API，运行：python -m pytest test/
+test_api.py、test_deepseek.py、test_qianfan.py 需要运行中的服务或真实API密钥，作为脚本直接运行，不由pytest收集。
+"""
+
+import os
+import sys
+import time
+import uuid
+import threading
+from typing import Dict, List, Optional
+
+import pytest
+
+collect_ignore = ['test_api.py', 'test_deepseek.py', 'test_qianfan.py']
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 在导入服务之前设置：不连接真实提供商，不读写磁盘，不启动后台索引线程
+os.environ.update({
+    'LLM_PROVIDER': 'deepseek',
+    'DEEPSEEK_API_KEY': 'test',
+    'MEETING_STORE_PATH': '',
+    'TOKEN_USAGE_PATH': '',
+    'SEARCH_INDEX_DIR': '',
+    'PRECOMPUTE_ENABLED': 'false',
+})
+
+from src.llm_providers import LLMProvider  # noqa: E402
+
+
+class FakeProvider(LLMProvider):
+    """返回固定回答的LLM提供商，记录每次调用"""
+
+    name = 'fake'
+
+    def __init__(self):
+        super().__init__('fake-model')
+        self.answer: List[str] = ['这是', '测试', '回答']
+        # 每个片段之前的等待时间（秒）
+        self.delay = 0.0
+        # 设置后调用时抛出该异常
+        self.error: Optional[Exception] = None
+        self.calls: List[list] = []
+        self.closed = 0
+
+    def _start(self, messages: list, usage: Optional[Dict[str, int]]) -> None:
+        self.calls.append(messages)
+        if self.error is not None:
+            raise self.error
+        if usage is not None:
+            usage.update(prompt_tokens=10, completion_tokens=len(self.answer))
+
+    def stream(self, messages, model=None, usage=None):
+        self._start(messages, usage)
+        try:
+            for part in self.answer:
+                time.sleep(self.delay)
+                yield part
+        finally:
+            self.closed += 1
+
+    def complete(self, messages, model=None, usage=None):
+        self._start(messages, usage)
+        time.sleep(self.delay * len(self.answer))
+        return ''.join(self.answer)
+
+
+@pytest.fixture(scope='session')
+def server():
+    """服务模块"""
+    import src.run_server as server
+    return server
+
+
+@pytest.fixture
+def llm(server, monkeypatch) -> FakeProvider:
+    """本测试使用的假提供商"""
+    provider = FakeProvider()
+    name = f"fake-{uuid.uuid4().hex}"
+    server.provider_registry.register(name, lambda: provider)
+    monkeypatch.setattr(server, 'ACTIVE_PROVIDER', name)
+    return provider
+
+
+@pytest.fixture
+def client(server, llm):
+    """Flask测试客户端"""
+    return server.app.test_client()
+
+
+@pytest.fixture
+def uid() -> str:
+    """本测试专用的ID后缀，避免不同测试共用会议和 log_id"""
+    return uuid.uuid4().hex[:12]
+
+
+@pytest.fixture
+def live_server(server, llm):
+    """在本地端口上运行的服务（需要真实连接的测试，如WebSocket、客户端断开），返回服务地址"""
+    from werkzeug.serving import make_server
+    http_server = make_server('127.0.0.1', 0, server.app, threaded=True)
+    thread = threading.Thread(target=http_server.serve_forever, daemon=True)
+    thread.start()
+    yield f"127.0.0.1:{http_server.server_port}"
+    http_server.shutdown()
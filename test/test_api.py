@@ -5,8 +5,14 @@
 API测试脚本
 """
 
+import os
+import sys
 import requests
 import json
+import time
+
+# 客户端测试需要导入项目根目录下的 meeting_assistant_client
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 BASE_URL = "http://localhost:8000"
 
@@ -210,6 +216,255 @@ def test_multi_turn_chat():
     print(f"响应: {json.dumps(response.json(), ensure_ascii=False, indent=2)}\n")
 
 
+def test_chat_answer_cache():
+    """测试重复问题命中问答缓存"""
+    print("=" * 50)
+    print("测试问答缓存...")
+    print("=" * 50)
+    
+    chat_data = {
+        "log_id": "test_answer_cache",
+        "srt_text": test_srt_text,
+        "meeting_id": "meeting_006",
+        "messages": [
+            {
+                "role": "user",
+                "content": "有哪些行动项？"
+            }
+        ],
+        "stream": False
+    }
+    
+    first = requests.post(f"{BASE_URL}/chat", json=chat_data)
+    
+    # 仅标点和空白不同的问题应命中缓存
+    chat_data["messages"][0]["content"] = "有哪些 行动项?"
+    start = time.time()
+    second = requests.post(f"{BASE_URL}/chat", json=chat_data)
+    elapsed = (time.time() - start) * 1000
+    
+    print(f"状态码: {second.status_code}")
+    print(f"命中缓存: {first.json()['data']['answer'] == second.json()['data']['answer']}")
+    print(f"第二次耗时: {elapsed:.1f}ms\n")
+
+
+def test_upload_transcript():
+    """测试上传转写后仅凭meeting_id问答"""
+    print("=" * 50)
+    print("测试上传会议转写...")
+    print("=" * 50)
+    
+    response = requests.put(
+        f"{BASE_URL}/meetings/meeting_007/transcript",
+        data=test_srt_text.encode('utf-8'),
+        headers={"Content-Type": "text/plain; charset=utf-8"}
+    )
+    print(f"上传状态码: {response.status_code}")
+    print(f"上传响应: {response.json()}")
+    
+    chat_data = {
+        "log_id": "test_transcript_chat",
+        "meeting_id": "meeting_007",
+        "messages": [
+            {
+                "role": "user",
+                "content": "新版本计划什么时候发布？"
+            }
+        ],
+        "stream": False
+    }
+    
+    response = requests.post(f"{BASE_URL}/chat", json=chat_data)
+    print(f"问答状态码: {response.status_code}")
+    print(f"响应: {json.dumps(response.json(), ensure_ascii=False, indent=2)}\n")
+
+
+def test_structured_minutes():
+    """测试结构化纪要生成和字段查询"""
+    print("=" * 50)
+    print("测试结构化会议纪要...")
+    print("=" * 50)
+    
+    data = {
+        "log_id": "test_minutes_001",
+        "srt_text": test_srt_text,
+        "meeting_id": "meeting_008",
+        "format": "json",
+        "stream": False
+    }
+    
+    response = requests.post(f"{BASE_URL}/summary", json=data)
+    print(f"状态码: {response.status_code}")
+    print(f"结构化纪要: {json.dumps(response.json()['data'].get('minutes'), ensure_ascii=False, indent=2)}")
+    
+    response = requests.get(f"{BASE_URL}/meetings/meeting_008/minutes/action_items")
+    print(f"行动项查询状态码: {response.status_code}")
+    print(f"行动项: {json.dumps(response.json(), ensure_ascii=False, indent=2)}\n")
+
+
+def test_search():
+    """测试跨会议检索"""
+    print("=" * 50)
+    print("测试跨会议检索...")
+    print("=" * 50)
+    
+    requests.put(f"{BASE_URL}/meetings/meeting_009/transcript", json={"srt_text": test_srt_text})
+    # 索引在后台建立
+    time.sleep(0.5)
+    
+    response = requests.get(f"{BASE_URL}/search", params={"q": "导出功能", "limit": 5})
+    print(f"状态码: {response.status_code}")
+    print(f"响应: {json.dumps(response.json(), ensure_ascii=False, indent=2)}\n")
+
+
+def test_extractive_summary():
+    """测试本地抽取式摘要"""
+    print("=" * 50)
+    print("测试抽取式摘要...")
+    print("=" * 50)
+    
+    data = {
+        "log_id": "test_extractive_001",
+        "srt_text": test_srt_text,
+        "meeting_id": "meeting_011",
+        "mode": "extractive",
+        "stream": False
+    }
+    
+    start = time.time()
+    response = requests.post(f"{BASE_URL}/summary", json=data)
+    print(f"状态码: {response.status_code}")
+    print(f"耗时: {(time.time() - start) * 1000:.1f}ms")
+    print(f"提纲:\n{response.json()['data']['answer']}\n")
+
+
+def test_meeting_stats():
+    """测试本地发言统计"""
+    print("=" * 50)
+    print("测试发言统计...")
+    print("=" * 50)
+    
+    srt_text = """1
+00:00:01,000 --> 00:00:05,000
+张三：我们先看一下第三季度的预算。
+
+2
+00:00:05,500 --> 00:00:09,000
+李四：市场部的预算超支了百分之十。
+
+3
+00:00:09,500 --> 00:00:12,000
+张三：下周给出调整方案。
+"""
+    requests.put(f"{BASE_URL}/meetings/meeting_010/transcript", json={"srt_text": srt_text})
+    
+    response = requests.get(f"{BASE_URL}/meetings/meeting_010/stats")
+    print(f"状态码: {response.status_code}")
+    print(f"响应: {json.dumps(response.json(), ensure_ascii=False, indent=2)}\n")
+
+
+def test_stream_resume():
+    """测试流式响应断线续传"""
+    print("=" * 50)
+    print("测试断线续传...")
+    print("=" * 50)
+    
+    data = {
+        "log_id": "test_resume_001",
+        "srt_text": test_srt_text,
+        "meeting_id": "meeting_013",
+        "stream": True
+    }
+    
+    # 只读取前两帧后断开
+    response = requests.post(f"{BASE_URL}/summary", json=data, stream=True)
+    received = []
+    for line in response.iter_lines():
+        if line:
+            received.append(json.loads(line))
+        if len(received) == 2:
+            break
+    response.close()
+    stream_id = received[0]['data']['stream_id']
+    print(f"stream_id: {stream_id}，已收到 {len(received)} 帧")
+    
+    # 凭 stream_id 和已收到的帧数续传
+    response = requests.get(f"{BASE_URL}/streams/{stream_id}", params={"offset": len(received)}, stream=True)
+    print(f"状态码: {response.status_code}")
+    print("续传的帧:")
+    for line in response.iter_lines():
+        if line:
+            print(line.decode('utf-8'))
+    print()
+
+
+def test_client_batch_summarize():
+    """测试客户端批量生成纪要"""
+    print("=" * 50)
+    print("测试客户端批量纪要...")
+    print("=" * 50)
+    
+    from meeting_assistant_client import MeetingAssistantClient
+    
+    meetings = [(f"meeting_batch_{i}", test_srt_text.replace("产品讨论会", f"第{i}次产品讨论会")) for i in range(6)]
+    start_time = time.time()
+    with MeetingAssistantClient(BASE_URL, max_connections=3) as client:
+        items = client.batch_summarize(meetings, concurrency=3)
+    print(f"耗时: {time.time() - start_time:.2f}秒")
+    for item in items:
+        print(f"{item.meeting_id}: {item.error or item.result['status']}")
+    print()
+
+
+def test_multipart_upload():
+    """测试以multipart上传WebVTT文件生成纪要"""
+    print("=" * 50)
+    print("测试multipart上传WebVTT...")
+    print("=" * 50)
+    
+    vtt_text = """WEBVTT
+
+00:00:01.000 --> 00:00:03.000
+<v 张三>大家好，欢迎参加今天的产品讨论会。
+
+00:00:04.500 --> 00:00:08.000
+<v 李四>我们计划在下个月15号发布新版本。
+"""
+    response = requests.post(
+        f"{BASE_URL}/summary",
+        files={"file": ("meeting.vtt", vtt_text.encode('utf-8'), "text/vtt")},
+        data={"log_id": "test_multipart_summary", "meeting_id": "meeting_vtt", "stream": "false"}
+    )
+    print(f"状态码: {response.status_code}")
+    print(f"响应: {json.dumps(response.json(), ensure_ascii=False, indent=2)}\n")
+
+
+def test_incremental_resummary():
+    """测试修正转写后只重新总结有改动的块"""
+    print("=" * 50)
+    print("测试修正转写后增量更新纪要...")
+    print("=" * 50)
+    
+    blocks = []
+    for i in range(600):
+        start = i * 5
+        blocks.append(f"{i + 1}\n00:{start // 60:02d}:{start % 60:02d},000 --> 00:{start // 60:02d}:{start % 60 + 4:02d},000\n"
+                      f"第{i + 1}条发言：我们继续讨论新版本的功能规划和发布安排，需要确认导出功能和界面优化的排期。")
+    srt_text = "\n\n".join(blocks)
+    
+    for log_id, text in (("test_resummary_1", srt_text),
+                         ("test_resummary_2", srt_text.replace("第300条发言：我们", "第300条发言：大家"))):
+        response = requests.post(f"{BASE_URL}/summary", json={
+            "log_id": log_id,
+            "meeting_id": "meeting_resummary",
+            "srt_text": text,
+            "stream": False
+        })
+        print(f"状态码: {response.status_code}")
+        print(f"分块统计: {response.json()['data'].get('chunks')}")
+    print()
+
+
 if __name__ == "__main__":
     try:
         # 测试健康检查
@@ -226,6 +481,34 @@ if __name__ == "__main__":
         # 测试多轮对话
         test_multi_turn_chat()
         
+        # 测试问答缓存
+        test_chat_answer_cache()
+        
+        # 测试上传转写
+        test_upload_transcript()
+        test_multipart_upload()
+        
+        # 测试修正转写后增量更新纪要
+        test_incremental_resummary()
+        
+        # 测试结构化纪要
+        test_structured_minutes()
+        
+        # 测试抽取式摘要
+        test_extractive_summary()
+        
+        # 测试发言统计
+        test_meeting_stats()
+        
+        # 测试跨会议检索
+        test_search()
+        
+        # 测试断线续传
+        test_stream_resume()
+        
+        # 测试客户端批量纪要
+        test_client_batch_summarize()
+        
         print("=" * 50)
         print("所有测试完成！")
         print("=" * 50)
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+客户端SDK测试：通过httpx的WSGI传输层直接调用进程内的服务，在流式响应中途切断连接
+"""
+
+import asyncio
+import contextvars
+
+import httpx
+import pytest
+
+from meeting_assistant_client import AsyncMeetingAssistantClient, MeetingAssistantClient, RetryPolicy
+
+SRT_TEXT = """1
+00:00:01,000 --> 00:00:03,000
+张三：大家好，今天讨论客户端续传。
+
+2
+00:00:04,000 --> 00:00:08,000
+李四：连接中断后应当从已收到的帧之后继续。
+"""
+
+RETRY = RetryPolicy(backoff=0.01)
+
+
+class CutStream(httpx.SyncByteStream):
+    """读到指定块数后模拟连接中断"""
+
+    def __init__(self, stream: httpx.SyncByteStream, chunks: int):
+        self.stream = stream
+        self.chunks = chunks
+
+    def __iter__(self):
+        for index, chunk in enumerate(self.stream):
+            if index == self.chunks:
+                raise httpx.ReadError("connection dropped")
+            yield chunk
+
+    def close(self) -> None:
+        self.stream.close()
+
+
+class DroppingTransport(httpx.WSGITransport):
+    """第一个请求的响应在读到 chunks 块后中断，记录所有请求"""
+
+    def __init__(self, app, chunks: int):
+        super().__init__(app=app)
+        self.chunks = chunks
+        self.requests = []
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        response = super().handle_request(request)
+        if len(self.requests) == 1:
+            return httpx.Response(response.status_code, headers=response.headers,
+                                  stream=CutStream(response.stream, self.chunks))
+        return response
+
+
+class AsyncAdapter(httpx.AsyncBaseTransport):
+    """在线程中调用同步传输层，供异步客户端使用"""
+
+    def __init__(self, transport: httpx.BaseTransport):
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        # 服务端的流式响应依赖上下文变量，调用应用、读取和关闭响应都要在同一个上下文中进行
+        context = contextvars.copy_context()
+        response = await asyncio.to_thread(context.run, self.transport.handle_request, request)
+        return httpx.Response(response.status_code, headers=response.headers,
+                              stream=AsyncIterStream(response.stream, context))
+
+
+class AsyncIterStream(httpx.AsyncByteStream):
+    """在线程中读取同步响应流"""
+
+    def __init__(self, stream: httpx.SyncByteStream, context: contextvars.Context):
+        self.stream = stream
+        self.context = context
+
+    async def __aiter__(self):
+        chunks = iter(self.stream)
+        while True:
+            chunk = await asyncio.to_thread(self.context.run, next, chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+
+    async def aclose(self) -> None:
+        await asyncio.to_thread(self.context.run, self.stream.close)
+
+
+@pytest.fixture
+def slow_answer(server, llm, monkeypatch):
+    monkeypatch.setattr(server, 'GENERATION_ORPHAN_GRACE', 30)
+    llm.answer = [f"第{i}段" for i in range(10)]
+    llm.delay = 0.02
+    return llm
+
+
+def assert_resumed(transport: DroppingTransport, frames: list, llm, log_id: str) -> None:
+    # 中断后按流ID续传，收到的帧不重复、不缺失，LLM只调用一次
+    assert [request.method for request in transport.requests] == ['POST', 'GET']
+    assert transport.requests[0].headers['Idempotency-Key'] == log_id
+    assert transport.requests[1].url.params['offset'] == '3'
+    assert ''.join(frame['data']['answer'] for frame in frames) == ''.join(llm.answer)
+    assert frames[-1]['data']['is_end'] == 1
+    assert len(llm.calls) == 1
+
+
+def test_sync_client_resumes_dropped_stream(server, slow_answer, uid):
+    transport = DroppingTransport(server.app, chunks=3)
+    with MeetingAssistantClient("http://testserver", retry=RETRY, transport=transport) as client:
+        frames = list(client.summarize(SRT_TEXT + uid, f"sdk-{uid}", log_id=f"sdk-{uid}", stream=True))
+    assert_resumed(transport, frames, slow_answer, f"sdk-{uid}")
+
+
+def test_async_client_resumes_dropped_stream(server, slow_answer, uid):
+    transport = DroppingTransport(server.app, chunks=3)
+
+    async def run() -> list:
+        async with AsyncMeetingAssistantClient("http://testserver", retry=RETRY,
+                                               transport=AsyncAdapter(transport)) as client:
+            return [frame async for frame in await client.summarize(
+                SRT_TEXT + uid, f"sdk-async-{uid}", log_id=f"sdk-async-{uid}", stream=True)]
+
+    frames = asyncio.run(run())
+    assert_resumed(transport, frames, slow_answer, f"sdk-async-{uid}")
@@ -0,0 +1,1214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+服务端行为测试：在进程内加载服务，LLM调用由 conftest.FakeProvider 返回固定回答
+"""
+
+import json
+import time
+
+import pytest
+
+SRT_TEXT = """1
+00:00:01,000 --> 00:00:03,000
+张三：大家好，欢迎参加今天的产品讨论会。
+
+2
+00:00:04,500 --> 00:00:08,000
+李四：今天我们主要讨论新版本的功能规划。
+
+3
+00:00:09,000 --> 00:00:12,000
+张三：最后，我们计划在下个月15号发布这个版本。
+"""
+
+
+def stream_frames(response) -> list:
+    """解析流式响应（每行一个JSON）"""
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines() if line.strip()]
+
+
+# ===== 提供商与模型路由 =====
+
+def test_unknown_provider_falls_back_to_qianfan(server):
+    assert server.select_provider('deepseek') == 'deepseek'
+    assert server.select_provider('no-such-provider') == 'qianfan'
+
+
+def test_model_routing_rules(server):
+    router = server.build_model_router(
+        '[{"types": ["chat"], "max_tokens": 100, "model": "small"}, {"min_tokens": 101, "model": "large"}]',
+        'default'
+    )
+    assert router.select('chat', 50) == 'small'
+    assert router.select('summary', 50) == 'default'
+    assert router.select('summary', 500) == 'large'
+
+
+def test_invalid_model_routing_rules_keep_provider(server):
+    provider = server.ACTIVE_PROVIDER
+    invalid = ('[{"model": ', '{"model": "x"}', '[{"max_tokens": 10}]', '[{"model": "x", "min_tokens": [1]}]',
+               '[{"model": "x", "max_tokens": {}}]', '[{"model": "x", "max_tokens": "many"}]',
+               '[{"model": "x", "types": 5}]', '[{"model": "x", "types": [["chat"]]}]')
+    for rules in invalid:
+        router = server.build_model_router(rules, 'default')
+        assert router.select('chat', 10) == 'default'
+        assert router.select('summary', 10 ** 6) == 'default'
+    assert server.ACTIVE_PROVIDER == provider
+
+
+def test_only_active_provider_sdk_is_loaded():
+    import os
+    import subprocess
+    import sys
+    # 在独立进程中导入服务：只加载选用的提供商，其他提供商的SDK不导入
+    code = ("import sys, src.run_server as server; "
+            "print(sorted(m for m in ('qianfan', 'openai') if m in sys.modules), server.provider_registry.loaded())")
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, timeout=60,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            env={**os.environ, 'LLM_PROVIDER': 'deepseek'})
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split() == ["['openai']", "['deepseek']"]
+
+
+def test_provider_registry_creates_each_provider_once():
+    import threading
+    from src.llm_providers import ProviderRegistry
+    registry = ProviderRegistry()
+    created = []
+    registry.register('slow', lambda: (time.sleep(0.05), created.append(1), object())[-1])
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get('slow'))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(created) == 1 and all(result is results[0] for result in results)
+    assert registry.loaded() == ['slow'] and 'slow' in registry
+    with pytest.raises(KeyError):
+        registry.get('missing')
+
+
+def test_provider_must_implement_stream_and_complete():
+    from src.llm_providers import LLMProvider
+    
+    class StreamOnly(LLMProvider):
+        def stream(self, messages, model=None, usage=None):
+            yield ''
+    
+    # 缺少方法的提供商在创建时报错，而不是在请求处理中
+    with pytest.raises(TypeError):
+        StreamOnly('model')
+
+
+# ===== 压缩 =====
+
+def test_gzip_request_body(server, client, llm, monkeypatch, uid):
+    import gzip
+    body = json.dumps({"log_id": f"gzip-{uid}", "meeting_id": f"gzip-{uid}", "srt_text": SRT_TEXT}).encode('utf-8')
+    response = client.post('/summary', data=gzip.compress(body),
+                           headers={'Content-Type': 'application/json', 'Content-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.get_json()['data']['answer'] == ''.join(llm.answer)
+    
+    assert client.post('/summary', data=body, headers={'Content-Encoding': 'br'}).status_code == 415
+    assert client.post('/summary', data=b'not gzip', headers={'Content-Encoding': 'gzip'}).status_code == 400
+    monkeypatch.setattr(server, 'MAX_REQUEST_BODY_BYTES', 100)
+    assert client.post('/summary', data=gzip.compress(body), headers={'Content-Encoding': 'gzip'}).status_code == 413
+
+
+def test_compressed_responses(server, client, llm, monkeypatch, uid):
+    import gzip
+    monkeypatch.setattr(server, 'RESPONSE_COMPRESSION_MIN_BYTES', 0)
+    monkeypatch.setattr(server, 'STREAM_COMPRESSION_ENABLED', True)
+    body = {"log_id": f"gzip-{uid}", "meeting_id": f"gzip-{uid}", "srt_text": SRT_TEXT}
+    
+    response = client.post('/summary', json=body, headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(response.get_data()))['data']['answer'] == ''.join(llm.answer)
+    
+    # 流式响应逐帧压缩，解压后仍是完整的NDJSON
+    response = client.post('/summary', json={**body, "log_id": f"gzip-stream-{uid}", "stream": True},
+                           headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    frames = [json.loads(line) for line in gzip.decompress(response.get_data()).splitlines()]
+    assert frames[-1]['data']['is_end'] == 1
+    assert ''.join(frame['data']['answer'] for frame in frames) == ''.join(llm.answer)
+    
+    assert 'Content-Encoding' not in client.post('/summary', json=body).headers
+
+
+
+# ===== 转写资源 =====
+
+def test_transcript_uploaded_once_serves_summary_and_chat(server, client, llm, uid):
+    meeting_id = f"upload-once-{uid}"
+    assert client.get(f"/meetings/{meeting_id}/transcript").status_code == 404
+    assert client.put(f"/meetings/{meeting_id}/transcript", json={"srt_text": " "}).status_code == 400
+    # 未上传转写时必须携带 srt_text
+    response = client.post('/summary', json={"log_id": f"{meeting_id}-0", "meeting_id": meeting_id, "stream": False})
+    assert response.status_code == 400
+    
+    put = client.put(f"/meetings/{meeting_id}/transcript", json={"srt_text": SRT_TEXT + uid}).get_json()['data']
+    info = client.get(f"/meetings/{meeting_id}/transcript").get_json()['data']
+    assert info['content_hash'] == put['content_hash'] and info['text_length'] == put['text_length']
+    assert info['has_summary'] is False
+    
+    # 之后的纪要和问答只携带 meeting_id
+    response = client.post('/summary', json={"log_id": f"{meeting_id}-1", "meeting_id": meeting_id, "stream": False})
+    assert response.status_code == 200
+    assert "新版本的功能规划" in llm.calls[0][-1]['content']
+    assert client.get(f"/meetings/{meeting_id}/transcript").get_json()['data']['has_summary'] is True
+    assert ask(client, meeting_id, f"{meeting_id}-2", "什么时候发布？")['answer'] == ''.join(llm.answer)
+    assert any("新版本的功能规划" in message['content'] for message in llm.calls[-1])
+
+
+# ===== 流式上传 =====
+
+def test_upload_parses_cues_split_across_chunks(server):
+    from src.meeting_stats import compute_meeting_stats
+    from src.transcript_upload import TranscriptUpload
+    data = SRT_TEXT.encode('utf-8')
+    expected = server.parse_srt_cues(SRT_TEXT)
+    # 逐字节喂入：分块边界落在时间轴行中间和UTF-8多字节字符中间
+    for size in (1, 7, len(data)):
+        upload = TranscriptUpload(server.transcript_store, len(data))
+        for start in range(0, len(data), size):
+            upload.feed(data[start:start + size])
+        transcript = upload.finish()
+        assert upload.format == 'srt'
+        assert transcript.cues == expected
+        assert server.transcript_store.get(transcript.text_key) == server.parse_srt_text(SRT_TEXT)
+        # 发言统计随解析逐批累计，与一次计算的结果相同
+        assert transcript.stats == compute_meeting_stats(expected)
+
+
+def test_multipart_upload_stores_transcript_and_stats(server, client, llm, uid):
+    import io
+    meeting_id = f"multipart-{uid}"
+    response = client.post('/summary', content_type='multipart/form-data', data={
+        "file": (io.BytesIO((SRT_TEXT + uid).encode('utf-8')), 'meeting.srt'),
+        "log_id": f"multipart-{uid}", "meeting_id": meeting_id, "stream": "false",
+    })
+    assert response.status_code == 200
+    meeting = server.get_meeting(meeting_id)
+    assert meeting['stats']['cue_count'] == 3 and meeting['stats']['speaker_count'] == 2
+    assert "会议统计" in llm.calls[0][0]['content']
+
+
+def test_multipart_field_size_limit(server, client, monkeypatch, uid):
+    import io
+    monkeypatch.setattr(server, 'MAX_FORM_FIELD_BYTES', 64)
+    response = client.post('/summary', content_type='multipart/form-data', data={
+        "file": (io.BytesIO(SRT_TEXT.encode('utf-8')), 'meeting.srt'),
+        "log_id": f"field-{uid}", "meeting_id": f"field-{uid}", "messages": "x" * 65,
+    })
+    assert response.status_code == 413
+    assert 'messages' in response.get_json()['data']['answer']
+
+
+# ===== 问答 =====
+
+def is_chat_call(messages: list) -> bool:
+    return messages[0]['content'].startswith("你是一个会议助手")
+
+
+def test_first_chat_answers_while_summary_runs_in_background(server, client, llm, monkeypatch, uid):
+    monkeypatch.setattr(server, 'CHAT_SUMMARY_MODE', 'background')
+    meeting_id = f"background-{uid}"
+    client.put(f"/meetings/{meeting_id}/transcript", json={"srt_text": SRT_TEXT})
+    
+    llm.delay = 0.05
+    for question in ("新版本什么时候发布？", "谁主持了会议？"):
+        ask(client, meeting_id, f"background-{uid}", question)
+    # 首轮只基于原文回答，同一会议只有一个后台纪要任务
+    assert "暂无会议纪要" in [call for call in llm.calls if is_chat_call(call)][0][0]['content']
+    assert wait_until(lambda: 'summary' in server.get_meeting(meeting_id))
+    assert len([call for call in llm.calls if not is_chat_call(call)]) == 1
+    
+    ask(client, meeting_id, f"background-{uid}", "有哪些行动项？")
+    assert ''.join(llm.answer) in llm.calls[-1][0]['content']
+
+
+def test_precomputed_answers_after_summary(server, client, llm, monkeypatch, uid):
+    from src.answer_cache import AnswerCache
+    monkeypatch.setattr(server, 'PRECOMPUTE_ENABLED', True)
+    monkeypatch.setattr(server, 'PRECOMPUTE_QUESTION_LIST', ["有哪些行动项？"])
+    meeting_id = f"precompute-{uid}"
+    # 转写内容唯一，避免命中其他测试写入的问答缓存
+    summarize(client, meeting_id, f"precompute-{uid}", SRT_TEXT + uid)
+    assert wait_until(lambda: 'precomputed_answers' in server.get_meeting(meeting_id))
+    assert len(llm.calls) == 2
+    
+    # 随会议保存的预计算回答在问答缓存之外同样可以命中（如重启后或其他worker上）
+    monkeypatch.setattr(server, 'answer_cache', AnswerCache())
+    assert ask(client, meeting_id, f"precompute-chat-{uid}", "有哪些行动项?")['answer'] == ''.join(llm.answer)
+    assert len(llm.calls) == 2
+    
+    # 转写变化后预计算回答失效
+    client.put(f"/meetings/{meeting_id}/transcript", json={"srt_text": SRT_TEXT})
+    assert 'precomputed_answers' not in server.get_meeting(meeting_id)
+
+
+# ===== WebSocket多轮问答 =====
+
+class WSClient:
+    """基于 wsproto 的最小WebSocket客户端，握手响应与首条消息在同一次读取中到达时不会丢失消息"""
+    
+    def __init__(self, address: str, path: str):
+        import socket
+        from wsproto import WSConnection
+        from wsproto.connection import ConnectionType
+        from wsproto.events import Request
+        host, port = address.split(':')
+        self.sock = socket.create_connection((host, int(port)), timeout=5)
+        self.conn = WSConnection(ConnectionType.CLIENT)
+        self.sock.sendall(self.conn.send(Request(host=address, target=path)))
+        self.pending: list = []
+        self.closed = False
+        self._read_events()
+    
+    def _read_events(self) -> None:
+        from wsproto.events import AcceptConnection, CloseConnection, TextMessage
+        data = self.sock.recv(65536)
+        if not data:
+            self.closed = True
+        self.conn.receive_data(data or None)
+        for event in self.conn.events():
+            if isinstance(event, TextMessage):
+                self.pending.append(event.data)
+            elif isinstance(event, CloseConnection):
+                self.closed = True
+            elif not isinstance(event, AcceptConnection):
+                raise AssertionError(f"unexpected websocket event: {event}")
+    
+    def receive(self) -> dict:
+        while not self.pending:
+            assert not self.closed, "连接已关闭"
+            self._read_events()
+        return json.loads(self.pending.pop(0))
+    
+    def send(self, text: str) -> None:
+        from wsproto.events import TextMessage
+        self.sock.sendall(self.conn.send(TextMessage(data=text)))
+    
+    def close(self) -> None:
+        self.sock.close()
+
+
+def test_ws_chat_session(server, client, live_server, llm, uid):
+    pytest.importorskip('wsproto')
+    assert server.sock is not None, "flask-sock 未安装，WebSocket接口未注册"
+    meeting_id = f"ws-{uid}"
+    assert client.put(f"/meetings/{meeting_id}/transcript", json={"srt_text": SRT_TEXT}).status_code == 200
+    
+    ws = WSClient(live_server, f"/ws/meetings/{meeting_id}/chat?log_id=ws-{uid}")
+    try:
+        assert ws.receive()['data']['session'] == 'ready'
+        for question in ("新版本什么时候发布？", "谁主持了会议？"):
+            ws.send(json.dumps({"question": question}))
+            frames = [ws.receive()]
+            while frames[-1]['data']['is_end'] != 1:
+                frames.append(ws.receive())
+            assert all(frame['status'] == 200 for frame in frames)
+            assert ''.join(frame['data']['answer'] for frame in frames) == ''.join(llm.answer)
+        # 第二轮的对话历史包含第一轮的问答（后台纪要生成的调用除外）
+        chat_calls = [call for call in llm.calls if is_chat_call(call)]
+        assert "新版本什么时候发布？" in json.dumps(chat_calls[-1], ensure_ascii=False)
+        
+        ws.send("not json")
+        assert ws.receive()['status'] == 400
+    finally:
+        ws.close()
+
+
+def test_ws_chat_session_limit(server, client, live_server, monkeypatch, uid):
+    pytest.importorskip('wsproto')
+    monkeypatch.setattr(server, 'WS_MAX_SESSIONS', 1)
+    meeting_id = f"ws-{uid}"
+    client.put(f"/meetings/{meeting_id}/transcript", json={"srt_text": SRT_TEXT})
+    
+    first = WSClient(live_server, f"/ws/meetings/{meeting_id}/chat")
+    try:
+        assert first.receive()['data']['session'] == 'ready'
+        second = WSClient(live_server, f"/ws/meetings/{meeting_id}/chat")
+        try:
+            assert second.receive()['status'] == 503
+        finally:
+            second.close()
+    finally:
+        first.close()
+
+
+# ===== 分块纪要 =====
+
+def long_srt(cue_count: int, edit: int = -1) -> str:
+    """生成每条约50字的长转写，edit 指定的字幕内容被修改"""
+    blocks = []
+    for i in range(cue_count):
+        start = i * 5
+        text = f"第{i + 1}条发言：我们继续讨论新版本的功能规划和发布安排，需要确认导出功能和界面优化的排期。"
+        if i == edit:
+            text = text.replace("我们", "大家")
+        blocks.append(f"{i + 1}\n{start // 3600:02d}:{start // 60 % 60:02d}:{start % 60:02d},000 --> "
+                      f"{start // 3600:02d}:{start // 60 % 60:02d}:{start % 60 + 4:02d},000\n{text}")
+    return "\n\n".join(blocks)
+
+
+def summarize(client, meeting_id: str, log_id: str, srt_text: str) -> dict:
+    response = client.post('/summary', json={
+        "log_id": log_id, "meeting_id": meeting_id, "srt_text": srt_text, "stream": False
+    })
+    assert response.status_code == 200
+    return response.get_json()['data']
+
+
+def test_long_summary_single_call_by_default(server, client, llm, uid):
+    assert server.SUMMARY_CHUNK_CHARS == 0
+    data = summarize(client, f"long-{uid}", f"long-{uid}", long_srt(600))
+    assert len(llm.calls) == 1
+    assert 'chunks' not in data
+
+
+def test_resummary_reuses_unchanged_chunks(server, client, llm, monkeypatch, uid):
+    monkeypatch.setattr(server, 'SUMMARY_CHUNK_CHARS', 8000)
+    meeting_id = f"chunked-{uid}"
+    
+    first = summarize(client, meeting_id, f"{meeting_id}-1", long_srt(600))
+    assert first['chunks']['reused'] == 0
+    total = first['chunks']['total']
+    assert total > 1 and len(llm.calls) == total + 1
+    
+    llm.calls.clear()
+    second = summarize(client, meeting_id, f"{meeting_id}-2", long_srt(600, edit=300))
+    assert second['chunks'] == {"total": total, "reused": total - 1}
+    # 一个块重新总结，一次合并
+    assert len(llm.calls) == 2
+
+
+
+# ===== 抽取式摘要 =====
+
+def test_extract_key_sentences_skips_filler_and_duplicates():
+    from src.subtitles import Cue
+    from src.extractive_summary import extract_key_sentences, render_outline
+    lines = ["张三：好的", "李四：我们讨论新版本的发布计划和测试安排", "王五：嗯",
+             "张三：新版本的发布计划需要测试团队确认", "李四：我们讨论新版本的发布计划和测试安排",
+             "王五：测试安排定在下周，发布计划随之调整"]
+    cues = [Cue(i * 10000, i * 10000 + 9000, text) for i, text in enumerate(lines)]
+    assert extract_key_sentences([]) == []
+    
+    # 短句和重复的发言不入选，结果按时间排序
+    sentences = extract_key_sentences(cues, max_sentences=5)
+    assert [sentence['start'] for sentence in sentences] == ["00:00:10", "00:00:30", "00:00:50"]
+    assert sentences[0]['speaker'] == "李四" and sentences[0]['text'] == "我们讨论新版本的发布计划和测试安排"
+    assert len(extract_key_sentences(cues, max_sentences=1)) == 1
+    
+    # 提供话题时按话题分组
+    topics = [{"start_ms": 0, "start": "00:00:00", "end": "00:00:30", "keywords": ["发布计划"]},
+              {"start_ms": 30000, "start": "00:00:30", "end": "00:01:00", "keywords": []}]
+    assert render_outline(sentences, topics).splitlines() == [
+        "## 00:00:00 - 00:00:30 发布计划",
+        "- [00:00:10] 李四：我们讨论新版本的发布计划和测试安排",
+        "## 00:00:30 - 00:01:00",
+        "- [00:00:30] 张三：新版本的发布计划需要测试团队确认",
+        "- [00:00:50] 王五：测试安排定在下周，发布计划随之调整",
+    ]
+
+
+def test_extractive_mode_skips_llm(server, client, llm, uid):
+    body = {"log_id": f"extractive-{uid}", "meeting_id": f"extractive-{uid}", "srt_text": SRT_TEXT + uid,
+            "mode": "extractive"}
+    data = client.post('/summary', json=body).get_json()['data']
+    assert data['mode'] == 'extractive' and 'fallback' not in data
+    assert data['answer'].startswith("## 关键内容")
+    assert data['sentences'] and all(sentence['start'] for sentence in data['sentences'])
+    
+    frames = stream_frames(client.post('/summary', json={**body, "stream": True}))
+    assert frames[0]['data']['answer'] == data['answer'] and frames[-1]['data']['is_end'] == 1
+    assert client.post('/summary', json={**body, "format": "json"}).status_code == 400
+    assert llm.calls == []
+
+
+def test_llm_error_falls_back_to_extractive_summary(server, client, llm, monkeypatch, uid):
+    monkeypatch.setattr(server, 'SUMMARY_FALLBACK_ENABLED', True)
+    llm.error = RuntimeError("provider unavailable")
+    data = summarize(client, f"error-{uid}", f"error-{uid}", SRT_TEXT + uid)
+    assert (data['mode'], data['fallback']) == ('extractive', 'error')
+    assert "新版本的功能规划" in data['answer']
+    
+    frames = stream_frames(client.post('/summary', json={
+        "log_id": f"error-stream-{uid}", "meeting_id": f"error-{uid}", "srt_text": SRT_TEXT + uid, "stream": True
+    }))
+    assert frames[0]['data']['answer'] == data['answer']
+    assert frames[-1]['data']['fallback'] == 'error' and frames[-1]['data']['is_end'] == 1
+
+
+def test_llm_error_without_fallback_returns_error(server, client, llm, monkeypatch, uid):
+    monkeypatch.setattr(server, 'SUMMARY_FALLBACK_ENABLED', False)
+    llm.error = RuntimeError("provider unavailable")
+    body = {"log_id": f"no-fallback-{uid}", "meeting_id": f"no-fallback-{uid}", "srt_text": SRT_TEXT + uid}
+    response = client.post('/summary', json={**body, "stream": False})
+    assert response.status_code == 500 and 'mode' not in response.get_json()['data']
+    
+    frames = stream_frames(client.post('/summary', json={**body, "log_id": f"no-fallback-stream-{uid}",
+                                                         "stream": True}))
+    assert frames[-1]['status'] == 500 and 'fallback' not in frames[-1]['data']
+
+
+
+# ===== 结构化纪要 =====
+
+MINUTES_JSON = json.dumps({
+    "topic": "新版本发布",
+    "discussion": "功能规划",
+    "decisions": ["下个月15号发布"],
+    "action_items": [{"task": "准备发布说明", "owner": "张三", "due_date": None}, "确认测试排期"],
+}, ensure_ascii=False)
+
+
+def test_parse_minutes_normalizes_llm_output():
+    from src.minutes import MinutesValidationError, parse_minutes, render_minutes_text
+    minutes = parse_minutes(f"好的，纪要如下：\n```json\n{MINUTES_JSON}\n```")
+    assert minutes['discussion'] == ["功能规划"]
+    assert minutes['action_items'] == [{"task": "准备发布说明", "owner": "张三", "due_date": None},
+                                       {"task": "确认测试排期", "owner": None, "due_date": None}]
+    assert "- 准备发布说明（负责人：张三）" in render_minutes_text(minutes)
+    for raw in ("没有JSON", '{"discussion": []}', '{"topic": "主题", "decisions": {}}',
+                '{"topic": "主题", "action_items": [{"owner": "张三"}]}'):
+        with pytest.raises(MinutesValidationError):
+            parse_minutes(raw)
+
+
+def test_json_minutes_cached_and_queryable(server, client, llm, uid):
+    meeting_id = f"minutes-{uid}"
+    assert client.get(f"/meetings/{meeting_id}/minutes").status_code == 404
+    llm.answer = [MINUTES_JSON[:20], MINUTES_JSON[20:]]
+    response = client.post('/summary', json={
+        "log_id": meeting_id, "meeting_id": meeting_id, "srt_text": SRT_TEXT + uid, "stream": False, "format": "json"
+    })
+    minutes = response.get_json()['data']['minutes']
+    assert minutes['topic'] == "新版本发布" and len(llm.calls) == 1
+    
+    # 查询接口直接读取缓存，不调用LLM
+    assert client.get(f"/meetings/{meeting_id}/minutes").get_json()['data'] == minutes
+    items = client.get(f"/meetings/{meeting_id}/minutes/action_items?owner=张三").get_json()['data']['action_items']
+    assert [item['task'] for item in items] == ["准备发布说明"]
+    assert client.get(f"/meetings/{meeting_id}/minutes/decisions").get_json()['data'] == {"decisions": ["下个月15号发布"]}
+    assert client.get(f"/meetings/{meeting_id}/minutes/unknown").status_code == 404
+    assert server.get_meeting(meeting_id)['summary'].startswith("会议主题：新版本发布")
+    assert len(llm.calls) == 1
+
+
+def test_invalid_json_minutes_repaired_once(server, client, llm, uid):
+    llm.answer = ["这不是JSON"]
+    response = client.post('/summary', json={
+        "log_id": f"minutes-bad-{uid}", "meeting_id": f"minutes-bad-{uid}", "srt_text": SRT_TEXT + uid,
+        "stream": False, "format": "json"
+    })
+    # 修复一次仍不合法时返回502
+    assert response.status_code == 502 and len(llm.calls) == 2
+    assert "这不是JSON" in llm.calls[1][-1]['content']
+
+
+# ===== 分段总结树 =====
+
+def test_range_summary_reuses_prebuilt_segment_tree(server, client, llm, uid):
+    meeting_id = f"tree-{uid}"
+    assert client.get(f"/meetings/{meeting_id}/range_summary?start=0&end=60").status_code == 404
+    client.put(f"/meetings/{meeting_id}/transcript", json={"srt_text": long_srt(600)})
+    assert client.get(f"/meetings/{meeting_id}/range_summary?start=60&end=10").status_code == 400
+    assert client.get(f"/meetings/{meeting_id}/range_summary?start=a").status_code == 400
+    
+    # 50分钟的会议按5分钟分为10个叶子片段，预生成后缓存全部节点
+    response = client.post(f"/meetings/{meeting_id}/segment_tree")
+    assert response.status_code == 202 and response.get_json()['data']['leaf_count'] == 10
+    assert wait_until(lambda: 'segment_tree' in server.get_meeting(meeting_id))
+    built_calls = len(llm.calls)
+    
+    data = client.get(f"/meetings/{meeting_id}/range_summary?start=650&end=1750").get_json()['data']
+    assert (data['start'], data['end']) == (600, 1800)
+    # 由缓存的节点总结合并，只调用一次LLM
+    assert data['llm_calls'] == 1 and len(llm.calls) == built_calls + 1
+    assert 1 < data['nodes_used'] <= 4
+
+
+def test_range_summary_goes_through_admission_and_quota(server, client, llm, monkeypatch, uid):
+    from src.admission import AdmissionController, PriorityClass
+    meeting_id, tenant = f"tree-guard-{uid}", f"tenant-{uid}"
+    client.put(f"/meetings/{meeting_id}/transcript", json={"srt_text": long_srt(600)})
+    url = f"/meetings/{meeting_id}/range_summary?start=0&end=600"
+    
+    # 与纪要共用名额，纪要名额占满时拒绝
+    controller = AdmissionController(1, [PriorityClass('chat', 0, 1, 0.1), PriorityClass('summary', 1, 0, 0.1)])
+    monkeypatch.setattr(server, 'admission_controller', controller)
+    ticket = controller.acquire('summary')
+    assert client.get(url).status_code == 503
+    controller.release(ticket)
+    
+    # 租户配额用完时不调用LLM
+    monkeypatch.setitem(server.token_usage.quotas, tenant, 0)
+    response = client.get(url, headers={server.TENANT_HEADER: tenant})
+    assert response.status_code == 429 and 'Retry-After' in response.headers
+    assert llm.calls == []
+    assert client.get(url).status_code == 200
+    assert controller.active_counts() == {'chat': 0, 'summary': 0}
+
+
+
+def test_segment_tree_rebuilt_after_transcript_change(server, client, llm, uid):
+    meeting_id = f"tree-edit-{uid}"
+    client.put(f"/meetings/{meeting_id}/transcript", json={"srt_text": long_srt(600)})
+    client.post(f"/meetings/{meeting_id}/segment_tree")
+    assert wait_until(lambda: 'segment_tree' in server.get_meeting(meeting_id))
+    url = f"/meetings/{meeting_id}/range_summary?start=1500&end=1800"
+    assert client.get(url).get_json()['data']['llm_calls'] == 0
+    
+    # 第301条字幕（第6个叶子片段）被修改，缓存的节点总结随转写一起失效
+    client.put(f"/meetings/{meeting_id}/transcript", json={"srt_text": long_srt(600, edit=300)})
+    assert 'segment_tree' not in server.get_meeting(meeting_id)
+    llm.calls.clear()
+    data = client.get(url).get_json()['data']
+    assert data['llm_calls'] == 1 and len(llm.calls) == 1
+    assert "第301条发言：大家继续讨论" in llm.calls[0][-1]['content']
+    assert client.get(url).get_json()['data']['llm_calls'] == 0
+
+
+def test_segment_tree_skips_empty_leaves():
+    from src.subtitles import Cue
+    from src.segment_tree import SegmentSummaryTree
+    leaves, merges = [], []
+    # 0-60秒与240-300秒有发言，中间三个片段为空
+    cues = [Cue(5000, 9000, "开场介绍"), Cue(250000, 299000, "总结发言")]
+    tree = SegmentSummaryTree(cues, 60, lambda text, span: leaves.append(span) or text,
+                              lambda parts, span: merges.append(span) or '+'.join(parts))
+    assert tree.leaf_count == 5
+    assert tree.leaf_range(30, 61) == (0, 2)
+    assert tree.leaf_range(1000, 2000) == (4, 5)
+    
+    result = tree.query(0, 300)
+    assert result['answer'] == "开场介绍+总结发言" and (result['start'], result['end']) == (0, 300)
+    assert leaves == ["00:00:00 - 00:01:00", "00:04:00 - 00:05:00"] and len(merges) == 1
+    assert tree.query(60, 240)['answer'] == ''
+    assert tree.llm_calls == 3
+
+
+# ===== 话题切分接口 =====
+
+def make_srt(texts: list, seconds: int = 10) -> str:
+    """按固定间隔生成SRT转写"""
+    blocks = []
+    for i, text in enumerate(texts):
+        start, end = i * seconds, i * seconds + seconds - 1
+        blocks.append(f"{i + 1}\n{start // 3600:02d}:{start // 60 % 60:02d}:{start % 60:02d},000 --> "
+                      f"{end // 3600:02d}:{end // 60 % 60:02d}:{end % 60:02d},000\n{text}")
+    return "\n\n".join(blocks)
+
+
+def test_topics_endpoint(server, client, llm, monkeypatch, uid):
+    monkeypatch.setattr(server, 'TOPIC_BLOCK_CUES', 4)
+    monkeypatch.setattr(server, 'TOPIC_MIN_SECONDS', 60)
+    meeting_id = f"topics-{uid}"
+    assert client.get(f"/meetings/{meeting_id}/topics").status_code == 404
+    texts = ["我们讨论预算审批和采购成本", "第三季度预算还有缺口", "采购成本需要重新核算"] * 10 + \
+            ["接下来讨论招聘计划和面试安排", "后端工程师的招聘进度", "面试安排放在下周"] * 10
+    client.put(f"/meetings/{meeting_id}/transcript", json={"srt_text": make_srt(texts)})
+    
+    topics = client.get(f"/meetings/{meeting_id}/topics").get_json()['data']['topics']
+    assert [(topic['start_cue'], topic['end_cue']) for topic in topics] == [(0, 29), (30, 59)]
+    assert topics[1]['start'] == "00:05:00"
+    assert any('预算' in keyword for keyword in topics[0]['keywords'])
+    assert any('招聘' in keyword for keyword in topics[1]['keywords'])
+    # 本地计算并随会议缓存，不调用LLM
+    assert server.get_meeting(meeting_id)['topics'] == topics
+    assert llm.calls == []
+
+
+
+def test_topic_shorter_than_min_seconds_is_merged(server, client, monkeypatch, uid):
+    monkeypatch.setattr(server, 'TOPIC_BLOCK_CUES', 4)
+    # 两个长话题之间插入60秒的短话题
+    texts = ["我们讨论预算审批和采购成本", "第三季度预算还有缺口", "采购成本需要重新核算"] * 10 + \
+            ["插一句服务器机房搬迁", "机房搬迁下周完成", "机房网络会中断一天"] * 2 + \
+            ["接下来讨论招聘计划和面试安排", "后端工程师的招聘进度", "面试安排放在下周"] * 10
+    
+    def topic_cues(min_seconds: int) -> list:
+        monkeypatch.setattr(server, 'TOPIC_MIN_SECONDS', min_seconds)
+        meeting_id = f"topics-min-{min_seconds}-{uid}"
+        client.put(f"/meetings/{meeting_id}/transcript", json={"srt_text": make_srt(texts)})
+        topics = client.get(f"/meetings/{meeting_id}/topics").get_json()['data']['topics']
+        return [(topic['start_cue'], topic['end_cue']) for topic in topics]
+    
+    assert topic_cues(60) == [(0, 29), (30, 35), (36, 65)]
+    # 短话题不足最短时长，并入相邻话题
+    assert topic_cues(120) == [(0, 29), (30, 65)]
+
+
+
+# ===== 会议统计 =====
+
+def test_stats_on_empty_transcript():
+    from src.meeting_stats import compute_meeting_stats, render_stats_text
+    stats = compute_meeting_stats([])
+    assert (stats['duration_ms'], stats['cue_count'], stats['word_count'], stats['words_per_minute']) == (0, 0, 0, 0.0)
+    assert stats['speakers'] == [] and stats['speaker_count'] == 0
+    assert render_stats_text(stats) == "会议时长：00:00:00，总字数：0，平均语速：0.0 字/分钟"
+
+
+def test_stats_attribute_cues_to_previous_speaker():
+    from src.subtitles import Cue
+    from src.meeting_stats import compute_meeting_stats
+    stats = compute_meeting_stats([
+        Cue(0, 2000, "大家好"),
+        Cue(2000, 6000, "张三：我们开始 sprint review"),
+        Cue(6000, 8000, "继续说明进度"),
+        Cue(10000, 14000, "李四：测试已经完成"),
+        Cue(14000, 16000, "张三：好的"),
+    ])
+    # 第一位发言人之前的字幕不归属任何人，没有前缀的字幕归属上一位发言人
+    assert (stats['duration_ms'], stats['spoken_ms'], stats['unattributed_ms']) == (16000, 14000, 2000)
+    assert [(entry['speaker'], entry['talk_time_ms'], entry['turns'], entry['word_count'])
+            for entry in stats['speakers']] == [("张三", 8000, 2, 14), ("李四", 4000, 1, 6)]
+    assert stats['speakers'][0]['talk_ratio'] == 0.5714 and stats['speakers'][1]['words_per_minute'] == 90.0
+
+
+def test_stats_endpoint(server, client, llm, uid):
+    meeting_id = f"stats-{uid}"
+    assert client.get(f"/meetings/{meeting_id}/stats").status_code == 404
+    # 没有时间轴的转写无法统计
+    response = client.put(f"/meetings/{meeting_id}/transcript", json={"srt_text": f"张三：没有时间轴的文字 {uid}"})
+    assert response.status_code == 200 and client.get(f"/meetings/{meeting_id}/stats").status_code == 404
+    
+    client.put(f"/meetings/{meeting_id}/transcript", json={"srt_text": SRT_TEXT + uid})
+    data = client.get(f"/meetings/{meeting_id}/stats").get_json()['data']
+    assert data['meeting_id'] == meeting_id and data['duration'] == "00:00:11"
+    assert [entry['speaker'] for entry in data['speakers']] == ["张三", "李四"]
+    assert llm.calls == []
+    
+    # 纪要提示词附带本地统计
+    summarize(client, meeting_id, f"stats-{uid}", SRT_TEXT + uid)
+    assert "会议时长：00:00:11" in llm.calls[0][-1]['content']
+
+
+# ===== 租户用量 =====
+
+def wait_until(condition, timeout: float = 5.0) -> bool:
+    """轮询等待条件成立"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+def test_first_chunk_timeout_charges_request_tenant(server, client, llm, monkeypatch, uid):
+    monkeypatch.setattr(server, 'SUMMARY_FALLBACK_ENABLED', True)
+    monkeypatch.setattr(server, 'SUMMARY_LLM_DEADLINE', 0.05)
+    llm.delay = 0.2
+    tenant, meeting_id = f"tenant-{uid}", f"timeout-{uid}"
+    
+    response = client.post('/summary', headers={server.TENANT_HEADER: tenant}, json={
+        "log_id": f"timeout-{uid}", "meeting_id": meeting_id, "srt_text": SRT_TEXT, "stream": True
+    })
+    assert stream_frames(response)[-1]['data']['fallback'] == 'timeout'
+    
+    # 超时的上游流在首个片段返回后于后台关闭，用量计入发起请求的租户和会议
+    assert wait_until(lambda: llm.closed == 1)
+    assert wait_until(lambda: server.token_usage.report(tenant)['total_tokens'] > 0)
+    assert [m['meeting_id'] for m in server.token_usage.report(tenant)['meetings']] == [meeting_id]
+
+
+def test_tenant_quota_exceeded_returns_429(server, client, llm, monkeypatch, uid):
+    tenant = f"tenant-{uid}"
+    monkeypatch.setitem(server.token_usage.quotas, tenant, 10)
+    headers = {server.TENANT_HEADER: tenant}
+    body = {"log_id": f"quota-{uid}-1", "meeting_id": f"quota-{uid}", "srt_text": SRT_TEXT + uid, "stream": False}
+    assert client.post('/summary', json=body, headers=headers).status_code == 200
+    
+    # 用量达到配额后拒绝新的LLM调用，Retry-After 为当前窗口的剩余时间
+    body = {"log_id": f"quota-{uid}-2", "meeting_id": f"quota-{uid}", "stream": False,
+            "messages": [{"role": "user", "content": "会议讨论了什么？"}]}
+    response = client.post('/chat', json=body, headers=headers)
+    assert response.status_code == 429
+    assert 0 < int(response.headers['Retry-After']) <= server.token_usage.window
+    assert len(llm.calls) == 1
+    
+    # 其他租户不受影响
+    body['log_id'] = f"quota-{uid}-3"
+    assert client.post('/chat', json=body).status_code == 200
+
+
+def test_token_usage_counts_locally_and_syncs_across_workers(tmp_path):
+    from src.token_usage import TokenUsageStore
+    path = str(tmp_path / 'usage.db')
+    worker, other = TokenUsageStore(path, 3600, {}, sync_interval=60), TokenUsageStore(path, 3600, {}, sync_interval=0)
+    try:
+        assert worker.used('t') == 0
+        # 本进程的记录立即计入，不等待写入数据库
+        worker.record('t', 'm1', 10, 5)
+        worker.record('t', 'm2', 3, 2)
+        assert worker.used('t') == 20
+        # 其他worker的用量在下次同步时计入
+        other.record('t', 'm1', 100, 0)
+        other.flush()
+        assert worker.used('t') == 20
+        worker.flush()
+        assert other.used('t') == 120
+        report = other.report('t')
+        assert report['total_tokens'] == 120
+        assert {m['meeting_id']: m['calls'] for m in report['meetings']} == {'m1': 2, 'm2': 1}
+    finally:
+        worker.close()
+        other.close()
+
+
+def test_usage_restricted_to_own_tenant(server, client, monkeypatch, uid):
+    tenant, other = f"tenant-{uid}", f"other-{uid}"
+    assert client.get('/usage', headers={server.TENANT_HEADER: tenant}).get_json()['data']['tenant'] == tenant
+    assert client.get(f"/usage?tenant={tenant}", headers={server.TENANT_HEADER: tenant}).status_code == 200
+    assert client.get(f"/usage?tenant={other}", headers={server.TENANT_HEADER: tenant}).status_code == 403
+    
+    monkeypatch.setattr(server, 'usage_admin_tenants', {tenant})
+    response = client.get(f"/usage?tenant={other}", headers={server.TENANT_HEADER: tenant})
+    assert response.status_code == 200 and response.get_json()['data']['tenant'] == other
+
+
+def test_parse_quotas():
+    from src.token_usage import parse_quotas
+    assert parse_quotas('{"a": 100, "*": "50"}') == {'a': 100, '*': 50}
+    assert parse_quotas('') == {}
+    for text in ('[1]', '{"a": "many"}'):
+        with pytest.raises(ValueError):
+            parse_quotas(text)
+
+
+# ===== 客户端断开与重试幂等 =====
+
+def open_summary_stream(address: str, body: dict, headers: dict = None):
+    """在真实连接上发起流式纪要请求，返回 (连接, 响应, 第一帧)"""
+    import http.client
+    host, port = address.split(':')
+    conn = http.client.HTTPConnection(host, int(port), timeout=5)
+    conn.request('POST', '/summary', json.dumps(body), {'Content-Type': 'application/json', **(headers or {})})
+    response = conn.getresponse()
+    return conn, response, json.loads(response.readline())
+
+
+def disconnect(conn, response) -> None:
+    response.close()
+    conn.close()
+
+
+@pytest.fixture
+def slow_stream(server, llm, monkeypatch):
+    """约2秒才能生成完的流式回答，断开探测间隔缩短"""
+    monkeypatch.setattr(server, 'CANCEL_CHECK_INTERVAL', 0.05)
+    monkeypatch.setattr(server, 'GENERATION_ORPHAN_GRACE', 30)
+    llm.answer = [f"第{i}段" for i in range(20)]
+    llm.delay = 0.1
+    return llm
+
+
+def counter(server, name: str) -> float:
+    return server.metrics.snapshot()['counters'].get(name, 0)
+
+
+def test_disconnect_cancels_stream_and_caches_partial_summary(server, live_server, slow_stream, monkeypatch, uid):
+    monkeypatch.setattr(server, 'IDEMPOTENCY_WINDOW', 0)
+    monkeypatch.setattr(server, 'PARTIAL_OUTPUT_POLICY', 'cache')
+    cancelled = counter(server, 'generations_cancelled{type=summary}')
+    meeting_id = f"partial-{uid}"
+    body = {"log_id": f"partial-{uid}", "meeting_id": meeting_id, "srt_text": SRT_TEXT, "stream": True}
+    conn, response, first = open_summary_stream(live_server, body)
+    disconnect(conn, response)
+    
+    # 上游流在下一个片段之前关闭，已生成的部分按 PARTIAL_OUTPUT_POLICY 缓存
+    assert wait_until(lambda: slow_stream.closed == 1, timeout=1.5)
+    assert wait_until(lambda: counter(server, 'generations_cancelled{type=summary}') == cancelled + 1)
+    meeting = server.get_meeting(meeting_id)
+    assert meeting['summary_partial'] is True
+    assert first['data']['answer'] and ''.join(slow_stream.answer).startswith(meeting['summary'])
+    assert len(meeting['summary']) < len(''.join(slow_stream.answer))
+
+
+def test_disconnect_cancels_immediately_without_idempotency_key(server, live_server, slow_stream, uid):
+    body = {"log_id": f"cancel-{uid}", "meeting_id": f"cancel-{uid}", "srt_text": SRT_TEXT, "stream": True}
+    conn, response, first = open_summary_stream(live_server, body)
+    # 断开即取消的流不能续传，不返回流ID
+    assert 'stream_id' not in first['data']
+    disconnect(conn, response)
+    
+    # 不等待 GENERATION_ORPHAN_GRACE，上游流立即关闭
+    assert wait_until(lambda: slow_stream.closed == 1, timeout=1.5)
+
+
+def test_disconnect_waits_for_retry_with_idempotency_key(server, client, live_server, slow_stream, uid):
+    body = {"log_id": f"grace-{uid}", "meeting_id": f"grace-{uid}", "srt_text": SRT_TEXT, "stream": True}
+    headers = {server.IDEMPOTENCY_KEY_HEADER: f"grace-{uid}"}
+    conn, response, first = open_summary_stream(live_server, body, headers)
+    disconnect(conn, response)
+    time.sleep(0.5)
+    assert slow_stream.closed == 0
+    
+    # 相同幂等键的重试接入仍在进行的生成，不重复调用LLM
+    frames = stream_frames(client.post('/summary', json=body, headers=headers))
+    assert frames[0]['data']['stream_id'] == first['data']['stream_id']
+    assert ''.join(frame['data']['answer'] for frame in frames) == ''.join(slow_stream.answer)
+    assert len(slow_stream.calls) == 1
+
+
+def test_completed_generation_replayed_on_retry(server, client, llm, uid):
+    replays = counter(server, 'idempotent_retries{state=completed}')
+    first = summarize(client, f"replay-{uid}", f"replay-{uid}", SRT_TEXT + uid)
+    
+    # 相同 log_id 的重试直接返回已完成的结果，不重复调用LLM
+    second = summarize(client, f"replay-{uid}", f"replay-{uid}", SRT_TEXT + uid)
+    assert second['answer'] == first['answer'] == ''.join(llm.answer)
+    assert len(llm.calls) == 1
+    assert counter(server, 'idempotent_retries{state=completed}') == replays + 1
+
+
+def test_resume_stream_from_offset(server, client, llm, uid):
+    llm.answer = [f"第{i}段" for i in range(5)]
+    body = {"log_id": f"resume-{uid}", "meeting_id": f"resume-{uid}", "srt_text": SRT_TEXT + uid, "stream": True}
+    headers = {server.IDEMPOTENCY_KEY_HEADER: f"resume-{uid}"}
+    frames = stream_frames(client.post('/summary', json=body, headers=headers))
+    stream_id = frames[0]['data']['stream_id']
+    
+    # 只返回客户端尚未收到的帧
+    resumed = stream_frames(client.get(f"/streams/{stream_id}?offset=2"))
+    assert resumed == frames[2:]
+    
+    assert client.get(f"/streams/missing-{uid}").status_code == 404
+    assert client.get(f"/streams/{stream_id}?offset=abc").status_code == 400
+    assert client.get(f"/streams/{stream_id}?offset=-1").status_code == 400
+
+
+def test_resume_stream_while_generating(server, client, live_server, slow_stream, uid):
+    body = {"log_id": f"midway-{uid}", "meeting_id": f"midway-{uid}", "srt_text": SRT_TEXT + uid, "stream": True}
+    headers = {server.IDEMPOTENCY_KEY_HEADER: f"midway-{uid}"}
+    conn, response, first = open_summary_stream(live_server, body, headers)
+    disconnect(conn, response)
+    
+    # 生成仍在进行，续传返回第一帧之后的全部帧，包括断线后生成的帧
+    frames = stream_frames(client.get(f"/streams/{first['data']['stream_id']}?offset=1"))
+    assert ''.join(frame['data']['answer'] for frame in [first] + frames) == ''.join(slow_stream.answer)
+    assert frames[-1]['data']['is_end'] == 1
+    assert len(slow_stream.calls) == 1
+
+
+def test_fallback_summary_not_replayed(server, client, llm, monkeypatch, uid):
+    monkeypatch.setattr(server, 'SUMMARY_FALLBACK_ENABLED', True)
+    monkeypatch.setattr(server, 'SUMMARY_LLM_DEADLINE', 0.05)
+    llm.delay = 0.2
+    first = summarize(client, f"fallback-{uid}", f"fallback-{uid}", SRT_TEXT)
+    assert first['fallback'] == 'timeout'
+    
+    # 相同 log_id 的重试不重放降级结果，重新调用LLM
+    llm.delay = 0
+    second = summarize(client, f"fallback-{uid}", f"fallback-{uid}", SRT_TEXT)
+    assert 'fallback' not in second
+    assert second['answer'] == ''.join(llm.answer)
+    assert len(llm.calls) == 2
+
+
+# ===== 跨会议检索 =====
+
+def test_reindex_meetings_lost_from_pending_buffer(server, client, monkeypatch, tmp_path, uid):
+    from src.meeting_store import MeetingStore
+    from src.search_index import SearchIndex
+    meeting_id = f"search-{uid}"
+    assert client.put(f"/meetings/{meeting_id}/transcript", json={"srt_text": SRT_TEXT}).status_code == 200
+    store = MeetingStore(str(tmp_path / 'meetings.db'))
+    meeting = server.meeting_cache[meeting_id]
+    store.save(meeting_id, meeting, server.persisted_transcripts(meeting))
+    store.save(f"empty-{uid}", {"summary": "没有转写"})
+    store.flush()
+    monkeypatch.setattr(server, 'meeting_store', store)
+    
+    # 会议只进入了待写缓冲区，进程未写盘就退出
+    index = SearchIndex(str(tmp_path / 'index'), flush_meetings=100)
+    index.add_meeting(meeting_id, server.get_meeting_cues(server.meeting_cache[meeting_id]))
+    index._queue.join()
+    assert [r['meeting_id'] for r in index.search("产品讨论会")] == [meeting_id]
+    
+    restarted = SearchIndex(str(tmp_path / 'index'))
+    assert restarted.search("产品讨论会") == []
+    assert restarted.reindex_missing(store.meeting_ids(), server._load_stored_cues) == 1
+    assert restarted.reindex_missing(store.meeting_ids(), server._load_stored_cues) == 0
+    # 补建的会议已写入磁盘段，其他进程可见
+    assert [r['meeting_id'] for r in SearchIndex(str(tmp_path / 'index')).search("产品讨论会")] == [meeting_id]
+    store.close()
+
+
+
+def test_search_results_survive_segment_flush_and_merge(tmp_path):
+    import os
+    from src.subtitles import Cue
+    from src.search_index import SearchIndex
+    index = SearchIndex(str(tmp_path), flush_meetings=2, max_segments=2)
+    
+    def add(meeting_id: str, text: str) -> None:
+        index.add_meeting(meeting_id, [Cue(1000, 3000, f"张三：{text}"), Cue(4000, 6000, "李四：好的，我记下了")])
+        index._queue.join()
+    
+    def segment_dirs() -> list:
+        return [name for name in os.listdir(tmp_path) if name.startswith('seg-')]
+    
+    def found(query: str, directory_index: SearchIndex = index) -> list:
+        return sorted(result['meeting_id'] for result in directory_index.search(query))
+    
+    add("m1", "预算审批流程需要简化")
+    # 待写缓冲区中的会议同样可检索
+    assert segment_dirs() == [] and found("预算审批") == ["m1"]
+    add("m2", "招聘计划下周确定")
+    assert len(segment_dirs()) == 1 and found("预算审批") == ["m1"] and found("招聘计划") == ["m2"]
+    add("m3", "机房搬迁安排在周末")
+    add("m4", "预算审批由财务负责")
+    assert len(segment_dirs()) == 2 and found("预算审批") == ["m1", "m4"]
+    
+    # 第三个段触发合并；m1 重新索引后以新内容为准
+    add("m1", "客户反馈需要尽快跟进")
+    add("m5", "招聘计划增加两名测试")
+    assert len(segment_dirs()) == 1
+    assert found("预算审批") == ["m4"]
+    assert found("招聘计划") == ["m2", "m5"]
+    assert found("客户反馈") == ["m1"] and found("机房搬迁") == ["m3"]
+    assert index.meeting_count() == 5
+    snippet = index.search("客户反馈")[0]['snippets'][0]
+    assert (snippet['start'], snippet['text']) == ("00:00:01", "张三：客户反馈需要尽快跟进")
+    
+    index.close()
+    restarted = SearchIndex(str(tmp_path))
+    assert found("预算审批", restarted) == ["m4"] and restarted.meeting_count() == 5
+    restarted.close()
+
+
+# ===== 准入控制 =====
+
+def test_admission_sheds_requests_when_saturated(server, client, llm, monkeypatch, uid):
+    from src.admission import AdmissionController, PriorityClass
+    controller = AdmissionController(1, [
+        PriorityClass('chat', 0, 1, 0.1),
+        PriorityClass('summary', 1, 0, 0.1),
+    ])
+    monkeypatch.setattr(server, 'admission_controller', controller)
+    shed = counter(server, 'admission_shed{reason=queue_full,type=summary}')
+    body = {"log_id": f"admission-{uid}", "meeting_id": f"admission-{uid}", "srt_text": SRT_TEXT}
+    
+    ticket = controller.acquire('summary')
+    # 纪要不排队，立即拒绝；问答排队超时后拒绝
+    response = client.post('/summary', json=body)
+    assert response.status_code == 503 and int(response.headers['Retry-After']) >= 1
+    assert counter(server, 'admission_shed{reason=queue_full,type=summary}') == shed + 1
+    response = client.post('/chat', json={**body, "messages": [{"role": "user", "content": "谁主持了会议？"}]})
+    assert response.status_code == 503
+    assert llm.calls == []
+    
+    controller.release(ticket)
+    assert client.post('/summary', json=body).status_code == 200
+    assert controller.active_counts() == {'chat': 0, 'summary': 0}
+
+
+def test_admission_prefers_chat_over_summary():
+    import threading
+    from src.admission import AdmissionController, PriorityClass
+    controller = AdmissionController(1, [PriorityClass('chat', 0, 4, 5), PriorityClass('summary', 1, 4, 5)])
+    ticket = controller.acquire('summary')
+    admitted = []
+    
+    def wait_in_queue(class_name):
+        thread = threading.Thread(target=lambda: admitted.append(controller.acquire(class_name)))
+        thread.start()
+        assert wait_until(lambda: controller.queue_depths()[class_name] == 1)
+        return thread
+    
+    summary, chat = wait_in_queue('summary'), wait_in_queue('chat')
+    # 后到的问答先于排队中的纪要获得名额
+    controller.release(ticket)
+    chat.join(5)
+    assert [t.class_name for t in admitted] == ['chat']
+    controller.release(admitted[0])
+    summary.join(5)
+    assert [t.class_name for t in admitted] == ['chat', 'summary']
+
+
+# ===== 会议持久化 =====
+
+@pytest.fixture
+def meeting_store(server, monkeypatch, tmp_path):
+    """本测试使用的持久化存储"""
+    from src.meeting_store import MeetingStore
+    store = MeetingStore(str(tmp_path / 'meetings.db'))
+    monkeypatch.setattr(server, 'meeting_store', store)
+    yield store
+    store.close()
+
+
+def test_transcripts_compressed_and_shared(server, client, uid):
+    srt_text = long_srt(200) + f"\n\n201\n00:20:00,000 --> 00:20:04,000\n{uid}"
+    first, second = f"dedup-{uid}-1", f"dedup-{uid}-2"
+    for meeting_id in (first, second):
+        client.put(f"/meetings/{meeting_id}/transcript", json={"srt_text": srt_text})
+    
+    # 内容相同的会议共用同一份压缩数据
+    meetings = [server.get_meeting(first), server.get_meeting(second)]
+    assert meetings[0]['text_key'] == meetings[1]['text_key']
+    assert server.transcript_store._blobs[meetings[0]['text_key']].refs == 2
+    usage = server.transcript_usage(meetings[0])
+    assert usage['shared'] == 2 and usage['compressed_bytes'] * 3 < usage['raw_bytes']
+    assert server.get_text_content(meetings[0]) == server.parse_srt_text(srt_text)
+    assert len(server.get_meeting_cues(meetings[0])) == 201
+    
+    # 修改转写后释放旧数据的引用
+    client.put(f"/meetings/{second}/transcript", json={"srt_text": SRT_TEXT + uid})
+    assert server.transcript_store._blobs[meetings[0]['text_key']].refs == 1
+    assert client.get('/health').get_json()['transcript_storage']['blobs'] >= 2
+
+
+def evict_meeting(server, store, monkeypatch, meeting_id: str) -> None:
+    """模拟重启：写完持久化数据后从内存中移除会议，会议只在持久化存储中"""
+    store.flush()
+    meeting = server.meeting_cache[meeting_id]
+    for field in server.TRANSCRIPT_BLOB_FIELDS:
+        server.transcript_store.release(meeting[field])
+    monkeypatch.delitem(server.meeting_cache, meeting_id)
+
+
+def ask(client, meeting_id: str, log_id: str, question: str) -> dict:
+    response = client.post('/chat', json={
+        "log_id": log_id, "meeting_id": meeting_id, "stream": False,
+        "messages": [{"role": "user", "content": question}]
+    })
+    assert response.status_code == 200
+    return response.get_json()['data']
+
+
+def test_warm_start_reuses_stored_summary(server, client, llm, meeting_store, monkeypatch, uid):
+    meeting_id = f"warm-{uid}"
+    summarize(client, meeting_id, f"warm-{uid}", SRT_TEXT + uid)
+    evict_meeting(server, meeting_store, monkeypatch, meeting_id)
+    
+    server._warm_load_meetings()
+    assert server.meeting_cache[meeting_id]['summary'] == ''.join(llm.answer)
+    # 问答直接使用恢复的纪要，不重新生成
+    llm.calls.clear()
+    ask(client, meeting_id, f"warm-chat-{uid}", "新版本什么时候发布？")
+    time.sleep(0.1)
+    assert len(llm.calls) == 1
+    assert ''.join(llm.answer) in llm.calls[0][0]['content']
+
+
+def test_transcript_persisted_only_when_changed(server, client, llm, meeting_store, monkeypatch, uid):
+    meeting_id = f"persist-{uid}"
+    writes = []
+    for op in ('save', 'update'):
+        original = getattr(meeting_store, op)
+        monkeypatch.setattr(meeting_store, op, lambda *args, op=op, original=original: (
+            writes.append((op, args)), original(*args))[-1])
+    
+    client.put(f"/meetings/{meeting_id}/transcript", json={"srt_text": SRT_TEXT + uid})
+    summarize(client, meeting_id, f"persist-{uid}", SRT_TEXT + uid)
+    # 上传转写时整条保存一次（含压缩转写），之后生成纪要、统计等只写入变化的字段
+    assert [op for op, _ in writes] == ['save'] + ['update'] * (len(writes) - 1)
+    assert set(writes[0][1][2]) == {'text_zlib', 'cues_zlib'}
+    assert {'summary', 'summary_partial'} in [set(args[1]) for _, args in writes[1:]]
+    assert not any(set(args[1]) & set(server.TRANSCRIPT_BLOB_FIELDS) for _, args in writes[1:])
+    
+    meeting_store.flush()
+    data = meeting_store.load(meeting_id)
+    assert data['summary'] == ''.join(llm.answer)
+    restored = server.restore_meeting(data)
+    assert server.get_text_content(restored) == server.get_text_content(server.meeting_cache[meeting_id])
+
+
+def test_concurrent_store_misses_restore_once(server, client, meeting_store, monkeypatch, uid):
+    import threading
+    meeting_id = f"restore-{uid}"
+    client.put(f"/meetings/{meeting_id}/transcript", json={"srt_text": SRT_TEXT + uid})
+    meeting = server.meeting_cache[meeting_id]
+    keys = [meeting[field] for field in server.TRANSCRIPT_BLOB_FIELDS]
+    evict_meeting(server, meeting_store, monkeypatch, meeting_id)
+    
+    barrier = threading.Barrier(8)
+    results = []
+    
+    def load():
+        barrier.wait()
+        results.append(server.get_meeting(meeting_id))
+    
+    threads = [threading.Thread(target=load) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(result is results[0] for result in results)
+    assert [server.transcript_store._blobs[key].refs for key in keys] == [1, 1]
+
+
+# ===== 问答缓存 =====
+
+def test_normalize_question_keeps_meaningful_symbols():
+    from src.answer_cache import normalize_question
+    assert normalize_question("有哪些行动项？") == normalize_question(" 有哪些 行动项?") == normalize_question("有哪些行动项")
+    assert normalize_question("ＡＰＩ 的进度！") == normalize_question("api的进度")
+    for a, b in (("C++ 的进度", "C 的进度"), ("预算是$100吗", "预算是100吗"), ("完成50%了吗", "完成50了吗"),
+                 ("C# 模块", "C 模块"), ("1.5版本", "15版本")):
+        assert normalize_question(a) != normalize_question(b)
+
+
+
+def test_answer_cache_hits_only_equivalent_questions(server, client, llm, uid):
+    meeting_id = f"cache-{uid}"
+    client.put(f"/meetings/{meeting_id}/transcript", json={"srt_text": SRT_TEXT + uid})
+    
+    def chat_calls() -> int:
+        return len([call for call in llm.calls if is_chat_call(call)])
+    
+    ask(client, meeting_id, f"cache-{uid}-1", "收入增长5%了吗？")
+    # 只有空白、全角和句末标点不同的问题命中缓存
+    ask(client, meeting_id, f"cache-{uid}-2", "收入增长 5% 了吗?")
+    assert chat_calls() == 1
+    # 数字和符号不同的问题是不同的问题
+    for index, question in enumerate(("收入增长50%了吗？", "收入增长5了吗？", "收入增长0.5%了吗？")):
+        ask(client, meeting_id, f"cache-{uid}-miss-{index}", question)
+        assert chat_calls() == index + 2
+
+
+# ===== 话题切分 =====
+
+def test_topic_keywords_ignore_speaker_names():
+    from src.subtitles import Cue
+    from src.topic_segmentation import segment_topics
+    lines = ["我们讨论预算审批和采购成本", "第三季度预算还有缺口", "采购成本需要重新核算"] * 10 + \
+            ["接下来讨论招聘计划和面试安排", "后端工程师的招聘进度", "面试安排放在下周"] * 10
+    # 每个话题主要由一位说话人发言，姓名在段内高频出现
+    cues = [Cue(i * 10000, i * 10000 + 9000, f"{'张三丰' if i < 30 else '李四光'}：{text}")
+            for i, text in enumerate(lines)]
+    topics = segment_topics(cues, block_cues=4, min_topic_seconds=60)
+    keywords = [keyword for topic in topics for keyword in topic['keywords']]
+    assert keywords and not any(name in keyword for keyword in keywords for name in ('张三', '三丰', '李四', '四光'))
+    assert len(topics) == 2 and topics[1]['start_cue'] == 30
+
+
+# ===== 热路径基准 =====
+
+def test_benchmark_compare_flags_only_regressions():
+    from benchmarks.bench_hotpath import compare
+    baseline = {
+        "parse/zh/10m": {"ms": 1.0, "relative": 1.0, "peak_kb": 1000.0},
+        "prompt/zh/10m": {"ms": 1.0, "relative": 1.0, "peak_kb": 1000.0},
+        "frames/zh/10m": {"ms": 0.1, "relative": 0.1, "peak_kb": 10.0},
+    }
+    results = {
+        "parse/zh/10m": {"ms": 1.2, "relative": 1.2, "peak_kb": 1100.0},
+        "prompt/zh/10m": {"ms": 1.5, "relative": 1.5, "peak_kb": 1300.0},
+        # 低于噪声下限的差异不判为回归
+        "frames/zh/10m": {"ms": 0.2, "relative": 0.25, "peak_kb": 60.0},
+        "new/zh/10m": {"ms": 9.0, "relative": 9.0, "peak_kb": 9000.0},
+    }
+    regressions = compare(results, baseline, time_tolerance=0.3, memory_tolerance=0.2)
+    assert list(regressions) == ['prompt/zh/10m']
+    assert 'relative time' in regressions['prompt/zh/10m'] and 'KB' in regressions['prompt/zh/10m']